@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Body, File, UploadFile, status
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.responses import Response
 from typing import Dict, List, Optional, Any
 import logging
 import io
@@ -10,15 +10,17 @@ import json
 from datetime import datetime
 from bson import ObjectId
 from types import SimpleNamespace
-import google.generativeai as genai
 import time
 
 from app.models.user import User
 from app.models.resume import Resume
 from app.models.job import Job
-from app.services import resume_service, user_service, job_service
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services import resume_service, user_service, job_service, llm_client, artifact_store, ats_engine
+from app.services.resume_optimization_cache import optimization_cache_key, get_cached_optimization, store_optimization
 from app.utils import gridfs
-from ..endpoints.auth import get_current_user
+from ..endpoints.auth import get_current_user, get_current_user_claims
 from pydantic import BaseModel
 
 # Define models for request and response
@@ -30,15 +32,21 @@ class ResumeOptimizationRequest(BaseModel):
 class ResumeOptimizationResponse(BaseModel):
     latexCode: str
 
+class BatchAnalysisRequest(BaseModel):
+    resumeId: str
+    jobIds: Optional[List[str]] = None  # Defaults to the user's saved jobs
+    limit: Optional[int] = None  # Number of ranked results to return
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Define Gemini API key
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_AVAILABLE = GEMINI_API_KEY is not None
-
 router = APIRouter()
 
+# Bump when the optimization prompt changes so cached results are not reused
+RESUME_OPTIMIZATION_PROMPT_VERSION = "1"
+
+TEX_CONTENT_TYPE = "application/x-tex"
+
 @router.post("/analyze")
 async def analyze_resume(
     data: dict = Body(...),
@@ -46,39 +54,112 @@ async def analyze_resume(
 ):
     """
     Analyze a resume against a job description
+
+    Scores the resume's stored text locally with ats_engine: weighted skill
+    and term keywords from the description, BM25-style credit for each one
+    the resume contains. No LLM call is made. Only the caller's own resumes
+    can be analyzed; others are reported as not found.
     """
     resume_id = data.get("resumeId")
     job_description = data.get("jobDescription")
+    required_skills = data.get("requiredSkills") or []
     
     if not resume_id or not job_description:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Both resumeId and jobDescription are required"
         )
+    if not isinstance(required_skills, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="requiredSkills must be a list"
+        )
     
     # Get the resume
     resume = await resume_service.get_resume_by_id(resume_id)
-    if not resume:
+    if not resume or not await resume_service.is_resume_owner(resume, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resume not found"
+        )
+    
+    resume_content = await resume_service.get_parsed_content(resume_id) or {}
+    
+    started = time.monotonic()
+    result = ats_engine.analyze(
+        resume_content.get("text") or "",
+        job_description,
+        [str(skill) for skill in required_skills]
+    )
+    metrics.observe("ats.analyze", time.monotonic() - started)
+    
+    return result.to_dict()
+
+@router.post("/analyze-batch")
+async def analyze_resume_batch(
+    request: BatchAnalysisRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Score one resume against many jobs at once
+
+    Scores against the given job IDs, or the user's saved jobs when none are
+    given, in one vectorized pass. Results are ranked best first, each with
+    the keywords the resume is missing for that job. Only the caller's own
+    resumes can be scored.
+    """
+    max_jobs = settings.ATS_BATCH_MAX_JOBS
+    if request.jobIds is not None and len(request.jobIds) > max_jobs:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {max_jobs} jobs can be scored at once"
+        )
+    if request.limit is not None and request.limit < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="limit must be positive"
+        )
+    
+    resume = await resume_service.get_resume_by_id(request.resumeId)
+    if not resume or not await resume_service.is_resume_owner(resume, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Resume not found"
         )
     
-    # Here you would implement the actual ATS analysis logic
-    # For now, we'll return mock data
+    if request.jobIds is None:
+        jobs, _ = await user_service.get_saved_jobs(current_user.id, limit=max_jobs)
+        not_found = []
+    else:
+        jobs_by_id = await job_service.get_jobs_by_ids(request.jobIds)
+        requested = list(dict.fromkeys(request.jobIds))
+        jobs = [jobs_by_id[job_id] for job_id in requested if job_id in jobs_by_id]
+        not_found = [job_id for job_id in requested if job_id not in jobs_by_id]
+    
+    resume_content = await resume_service.get_parsed_content(request.resumeId) or {}
+    
+    started = time.monotonic()
+    ranked = ats_engine.rank_jobs(resume_content.get("text") or "", jobs, request.limit)
+    metrics.observe("ats.analyze_batch", time.monotonic() - started)
     
     return {
-        "score": 72,
-        "suggestions": [
-            {"type": "warning", "message": "Add more specific technical skills relevant to the job description"},
-            {"type": "warning", "message": "Use more industry standard terminology in your experience section"},
-            {"type": "success", "message": "Your resume format is ATS-friendly"}
-        ],
-        "keywordAnalysis": [
-            {"name": "Vue.js", "found": True},
-            {"name": "TypeScript", "found": True},
-            {"name": "CI/CD Experience", "found": False},
-            {"name": "Agile Development", "found": True}
+        "resumeId": request.resumeId,
+        "jobCount": len(jobs),
+        "notFound": not_found,
+        "results": [
+            {
+                "jobId": job.id,
+                "title": job.title,
+                "company": job.company,
+                "score": result.score,
+                "skillCoverage": result.skill_coverage,
+                "keywordCoverage": result.keyword_coverage,
+                "missingKeywords": [
+                    {"name": keyword.name, "weight": keyword.weight, "isSkill": keyword.skill}
+                    for keyword in result.missing
+                ]
+            }
+            for job, result in ranked
         ]
     }
 
@@ -90,14 +171,14 @@ async def optimize_resume(
     """
     Optimize a resume based on job description and required skills.
     Uses the actual resume data from the database and Gemini API for optimization.
-    Saves the LaTeX code as a .tex file for download.
+    Stores the LaTeX code in the artifact store for download; identical requests reuse the stored result.
     """
     resume_id = request.resumeId
     job_description = request.jobDescription
     required_skills = request.requiredSkills
     
     logger.info(f"Optimize resume request received for resume_id: {resume_id}")
-    logger.info(f"Gemini available: {GEMINI_AVAILABLE}")
+    logger.info(f"Gemini available: {llm_client.is_available()}")
     
     # Get the actual resume from the database
     try:
@@ -117,10 +198,9 @@ async def optimize_resume(
             detail=f"Resume not found: {str(e)}"
         )
     
-    # Get resume content if available
-    resume_content = {}
-    if hasattr(resume, 'parsed_content') and resume.parsed_content:
-        resume_content = resume.parsed_content
+    # Get the content parsed at upload time (older resumes are parsed on first use)
+    resume_content = await resume_service.get_parsed_content(resume_id) or {}
+    if resume_content.get("text"):
         logger.info(f"Resume content available, keys: {resume_content.keys() if resume_content else 'None'}")
     else:
         logger.warning(f"No parsed content available for resume: {resume_id}")
@@ -132,54 +212,72 @@ async def optimize_resume(
         }
         logger.info(f"Created minimal resume content with email and name")
 
-    # Generate the LaTeX content using Gemini or fallback
-    latex_code = await optimize_resume_with_gemini(current_user.email, required_skills, job_description, resume_content) if resume_content and GEMINI_AVAILABLE else generate_mock_latex_resume(resume_content.get("name", current_user.name if hasattr(current_user, 'name') else current_user.email.split('@')[0]), current_user.email, required_skills, job_description, [skill.get("name", "") for skill in resume_content.get("skills", [])] if resume_content and "skills" in resume_content else [])
-    
-    # Create a unique filename for the .tex file
-    current_time = int(time.time())
-    file_name = f"optimized_resume_{current_time}.tex"
-    
-    # Change from /app/data/temp to /tmp which should be writable
-    temp_dir = "/tmp"
-    os.makedirs(temp_dir, exist_ok=True)
-    
-    # Save the LaTeX code to a file
-    file_path = os.path.join(temp_dir, file_name)
-    with open(file_path, "w") as f:
-        f.write(latex_code)
-    
-    logger.info(f"LaTeX resume saved to {file_path}")
+    name = resume_content.get("name", current_user.name if hasattr(current_user, 'name') else current_user.email.split('@')[0])
+    user_skills = [skill.get("name", "") for skill in resume_content.get("skills", [])] if resume_content and "skills" in resume_content else []
+    
+    # Identical requests reuse the stored result instead of calling Gemini again
+    cache_key = optimization_cache_key(
+        resume_content, job_description, required_skills,
+        applicant=f"{name}\0{current_user.email}",
+        model=settings.LLM_MODEL,
+        prompt_version=RESUME_OPTIMIZATION_PROMPT_VERSION
+    )
+    artifact_id = await get_cached_optimization(cache_key)
+    artifact = await artifact_store.get_artifact(artifact_id) if artifact_id else None
+    cached = artifact is not None
     
-    # Generate download URL
-    download_url = f"/api/ats/download-tex/{file_name}"
+    if cached:
+        latex_code = artifact["content"].decode("utf-8")
+        logger.info(f"Reusing optimized resume {artifact_id}")
+    else:
+        # Generate the LaTeX content using Gemini or fallback
+        generated_by_llm = False
+        if resume_content and llm_client.is_available():
+            latex_code, generated_by_llm = await optimize_resume_with_gemini(current_user.email, required_skills, job_description, resume_content)
+        else:
+            latex_code = generate_mock_latex_resume(name, current_user.email, required_skills, job_description, user_skills)
+        
+        artifact_id = artifact_store.artifact_id_for(latex_code.encode("utf-8"))
+        try:
+            await artifact_store.put_artifact(
+                latex_code.encode("utf-8"), f"optimized_resume_{artifact_id[:12]}.tex", TEX_CONTENT_TYPE
+            )
+        except artifact_store.ArtifactTooLarge as e:
+            logger.error(f"Optimized resume not stored: {str(e)}")
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+        
+        # Fallback resumes are cheap to rebuild and should not hide a transient Gemini failure
+        if generated_by_llm:
+            await store_optimization(cache_key, artifact_id, settings.LLM_MODEL, RESUME_OPTIMIZATION_PROMPT_VERSION)
+        logger.info(f"LaTeX resume stored as artifact {artifact_id}")
     
-    # Return the LaTeX code and file info
+    # Return the LaTeX code and file info; downloads are served from the artifact store by any worker
     return {
         "latexCode": latex_code,  # Return the full code
-        "filename": file_name,
-        "downloadUrl": download_url
+        "filename": f"optimized_resume_{artifact_id[:12]}.tex",
+        "downloadUrl": f"/api/ats/download-tex/{artifact_id}",
+        "cached": cached
     }
 
-@router.get("/download-tex/{filename}")
+@router.get("/download-tex/{artifact_id}")
 async def download_tex_file(
-    filename: str,
-    current_user: User = Depends(get_current_user)
+    artifact_id: str,
+    current_user: User = Depends(get_current_user_claims)
 ):
     """
-    Download the generated LaTeX file
+    Download a generated LaTeX file
     """
-    file_path = os.path.join("/tmp", filename)
-    
-    if not os.path.exists(file_path):
+    artifact = await artifact_store.get_artifact(artifact_id)
+    if not artifact:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found"
         )
     
-    return FileResponse(
-        path=file_path,
-        filename=filename,
-        media_type="application/x-tex"
+    return Response(
+        content=artifact["content"],
+        media_type=artifact.get("content_type") or TEX_CONTENT_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{artifact["filename"]}"'}
     )
 
 def generate_mock_latex_resume(name, email, required_skills, job_description, user_skills=None):
@@ -301,12 +399,13 @@ def clean_latex_code(latex_code: str) -> str:
     return latex_code.strip()
 
 async def optimize_resume_with_gemini(email, required_skills, job_description, resume_content):
-    """Use Google's Gemini to optimize a resume for ATS by fine-tuning the existing resume data."""
-    logger.info(f"Optimizing resume with Gemini for email: {email}, job requires skills: {required_skills}")
+    """
+    Use Google's Gemini to optimize a resume for ATS by fine-tuning the existing resume data.
     
-    # Configure Gemini
-    genai.configure(api_key=GEMINI_API_KEY)
-    logger.info(f"Configured Gemini with API key: {GEMINI_API_KEY[:4]}...{GEMINI_API_KEY[-4:]}")
+    Returns:
+        (latex_code, generated_by_llm); generated_by_llm is False when the fallback template was used
+    """
+    logger.info(f"Optimizing resume with Gemini for email: {email}, job requires skills: {required_skills}")
     
     # Extract the user's name
     name = resume_content.get("name", "Applicant")
@@ -346,6 +445,13 @@ async def optimize_resume_with_gemini(email, required_skills, job_description, r
             resume_data += f"  Description: {description}\n"
         resume_data += "\n"
     
+    # Add the sections parsed from the uploaded resume
+    if resume_content and resume_content.get("sections"):
+        for section, text in resume_content["sections"].items():
+            if section == "header":
+                continue
+            resume_data += f"{section.replace('_', ' ').title()}:\n{text}\n\n"
+    
     # Add projects if available
     if resume_content and "projects" in resume_content:
         projects = resume_content.get("projects", [])
@@ -386,8 +492,7 @@ async def optimize_resume_with_gemini(email, required_skills, job_description, r
     
     try:
         # Get response from Gemini
-        model = genai.GenerativeModel('gemini-1.5-pro')
-        response = model.generate_content(prompt)
+        response = await llm_client.generate(prompt, feature="resume_optimization")
         
         # Extract the LaTeX code from the response
         latex_code = response.text.strip()
@@ -399,10 +504,10 @@ async def optimize_resume_with_gemini(email, required_skills, job_description, r
         # If the response doesn't look like LaTeX, create a fallback
         if not latex_code.startswith("\\documentclass") and not "\\begin{document}" in latex_code:
             logger.warning("Response doesn't appear to be valid LaTeX, generating fallback")
-            return generate_mock_latex_resume(name, email, required_skills, job_description, [skill.get("name", "") for skill in resume_content.get("skills", [])] if resume_content and "skills" in resume_content else [])
+            return generate_mock_latex_resume(name, email, required_skills, job_description, [skill.get("name", "") for skill in resume_content.get("skills", [])] if resume_content and "skills" in resume_content else []), False
         
-        return latex_code
+        return latex_code, True
     except Exception as e:
         logger.error(f"Error using Gemini API: {str(e)}")
         # Generate a fallback if Gemini fails
-        return generate_mock_latex_resume(name, email, required_skills, job_description, [skill.get("name", "") for skill in resume_content.get("skills", [])] if resume_content and "skills" in resume_content else [])
\ No newline at end of file
+        return generate_mock_latex_resume(name, email, required_skills, job_description, [skill.get("name", "") for skill in resume_content.get("skills", [])] if resume_content and "skills" in resume_content else []), False
\ No newline at end of file
@@ -1,23 +1,25 @@
-from datetime import timedelta
+import time
+from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import jwt, JWTError
 from typing import Any
 
 from ...core.config import settings
-from ...models.user import User, UserCreate, Token, TokenData
+from ...core.metrics import metrics
+from ...models.user import ADMIN_ROLE, User, UserCreate, Token
 from ...services.user_service import (
     authenticate_user,
     create_access_token,
     create_user,
-    get_user_by_id
+    get_auth_user,
+    PasswordHasherBusy
 )
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-# Dependency to get current user from token
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+def _decode_token(token: str) -> dict:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -28,23 +30,65 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        if payload.get("sub") is None:
             raise credentials_exception
-        token_data = TokenData(user_id=user_id)
     except JWTError:
         raise credentials_exception
+    return payload
+
+# Dependency to get current user from token
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    payload = _decode_token(token)
     
-    user = await get_user_by_id(token_data.user_id)
+    # Cached per (user, token issue time) for a short while; see user_service.get_auth_user
+    user = await get_auth_user(payload["sub"], payload.get("iat"))
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
-    return User(
-        _id=str(user.id),
-        email=user.email,
-        name=user.name,
-        created_at=user.created_at,
-        last_login=user.last_login
+    return user
+
+# Dependency for read-only endpoints: with AUTH_TRUST_TOKEN_CLAIMS the user is
+# built from the signed token claims without a database lookup, so a deleted
+# user keeps read access until the token expires
+async def get_current_user_claims(token: str = Depends(oauth2_scheme)) -> User:
+    if not settings.AUTH_TRUST_TOKEN_CLAIMS:
+        return await get_current_user(token)
+    
+    payload = _decode_token(token)
+    if not all(claim in payload for claim in ("email", "name", "created_at")):
+        # Token issued before profile claims were added
+        return await get_current_user(token)
+    
+    return User.model_construct(
+        id=payload["sub"],
+        email=payload["email"],
+        name=payload["name"],
+        created_at=datetime.fromisoformat(payload["created_at"])
+    )
+
+def require_role(role: str):
+    """
+    Dependency requiring the database-backed current user to hold a role
+    
+    Admins hold every role. Role changes apply within USER_CACHE_TTL_SECONDS.
+    """
+    async def dependency(current_user: User = Depends(get_current_user)) -> User:
+        roles = current_user.roles or []
+        if role not in roles and ADMIN_ROLE not in roles:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not permitted")
+        return current_user
+    return dependency
+
+def _busy_exception(error: PasswordHasherBusy) -> HTTPException:
+    # Shed load quickly instead of queueing logins behind a long bcrypt backlog
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": "1"},
     )
 
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
@@ -52,9 +96,13 @@ async def register(user_data: UserCreate) -> Any:
     """
     Register a new user.
     """
+    started = time.perf_counter()
     try:
         user = await create_user(user_data)
+        metrics.observe("auth.register", time.perf_counter() - started)
         return user
+    except PasswordHasherBusy as e:
+        raise _busy_exception(e)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -66,7 +114,12 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    user = await authenticate_user(form_data.username, form_data.password)
+    started = time.perf_counter()
+    try:
+        user = await authenticate_user(form_data.username, form_data.password)
+    except PasswordHasherBusy as e:
+        raise _busy_exception(e)
+    metrics.observe("auth.login", time.perf_counter() - started)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -77,7 +130,13 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()) -> Any:
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.id)}, expires_delta=access_token_expires
+        data={
+            "sub": str(user.id),
+            "email": user.email,
+            "name": user.name,
+            "created_at": user.created_at.isoformat()
+        },
+        expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
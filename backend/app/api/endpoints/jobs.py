@@ -1,20 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from typing import List, Optional
 import logging
 from bson import ObjectId
 from datetime import datetime
 
+from app.core.config import settings
 from app.models.job import Job, JobRecommendation
 from app.services.job_service import (
-    search_jobs, get_job_by_id, get_all_jobs, fetch_jobs, save_jobs,
-    match_jobs_with_gemini  # Import the new Gemini matching function
+    search_jobs, search_jobs_page, get_job_by_id, get_all_jobs, get_jobs_page, fetch_jobs, save_jobs,
+    match_jobs_with_gemini, basic_job_matching, get_semantic_recommendations
 )
 from app.services.user_service import (
     get_saved_jobs, add_saved_job, remove_saved_job
 )
 from app.services.skill_service import get_user_skills_from_current_resume
-from app.models.user import User
-from ..endpoints.auth import get_current_user
+from app.services.candidate_index import rank_candidates
+from app.services.resume_service import get_current_resume
+from app.models.user import ADMIN_ROLE, RECRUITER_ROLE, User
+from app.utils.pagination import InvalidCursor, NEXT_CURSOR_HEADER
+from ..endpoints.auth import get_current_user, get_current_user_claims, require_role
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -24,21 +28,30 @@ router = APIRouter()
 # Add a default endpoint that forwards to search for compatibility with the test script
 @router.get("", response_model=List[Job])
 async def get_jobs(
+    response: Response,
     query: Optional[str] = Query(None, description="Search query for job title, company, or description"),
     limit: int = Query(10, description="Maximum number of jobs to return"),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    current_user: User = Depends(get_current_user_claims)
 ):
     """
     Get jobs with optional search parameters.
     This endpoint forwards to the search endpoint for compatibility.
+    Pages are linked through the X-Next-Cursor response header.
     """
     try:
         # Search for jobs with the given query or get all jobs if no query
         jobs = []
         if query:
-            jobs = await search_jobs(query=query, limit=limit)
+            jobs, next_cursor = await search_jobs_page(query=query, limit=limit, cursor=cursor)
         else:
-            jobs = await get_all_jobs(limit=limit)
+            jobs, next_cursor = await get_jobs_page(limit=limit, cursor=cursor)
+        
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        if cursor:
+            # Later pages never fall back to fetching new jobs
+            return jobs
         
         if not jobs or len(jobs) == 0:
             # If no jobs found, fetch some jobs
@@ -76,6 +89,8 @@ async def get_jobs(
         
         return jobs
         
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting jobs: {str(e)}")
         # Return empty list instead of raising an exception
@@ -83,7 +98,7 @@ async def get_jobs(
 
 @router.get("/recommend", response_model=List[JobRecommendation])
 async def get_job_recommendations(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_claims),
     limit: int = Query(5, description="Maximum number of recommendations to return"),
     use_gemini: bool = Query(True, description="Whether to use Gemini for enhanced matching")
 ):
@@ -106,7 +121,8 @@ async def get_job_recommendations(
         search_query = " ".join(query_skills)
         
         # Search for jobs based on the skills
-        jobs = await search_jobs(query=search_query, limit=20)  # Get more jobs to allow for better matching
+        # Pull a wide candidate set; matching pre-ranks all of it before any Gemini call
+        jobs = await search_jobs(query=search_query, limit=settings.JOB_MATCH_CANDIDATES)
         
         if not jobs or len(jobs) == 0:
             # If no jobs found with the query, fetch some jobs
@@ -137,7 +153,7 @@ async def get_job_recommendations(
                 jobs = processed_jobs
             else:
                 # Fallback to existing jobs if any
-                jobs = await get_all_jobs(limit=20)
+                jobs = await get_all_jobs(limit=settings.JOB_MATCH_CANDIDATES)
             
             if not jobs or len(jobs) == 0:
                 logger.warning("No job recommendations available")
@@ -178,120 +194,62 @@ async def get_job_recommendations(
             jobs = test_jobs
             
         # Create recommendations with match scores (basic matching - fallback)
-        recommendations = []
-        for job in jobs:
-            job_text = ""
-            if job.title:
-                job_text += job.title.lower() + " "
-            if job.company:
-                job_text += job.company.lower() + " "
-            if job.job_description:
-                job_text += job.job_description.lower()
-            
-            # Calculate matching skills (case-insensitive match)
-            matching_skills = []
-            for skill in skill_names:
-                # For better matching, consider variations of the skill name
-                skill_variations = [
-                    skill.lower(),                      # exact match
-                    skill.lower().replace(" ", ""),     # without spaces
-                    skill.lower().replace(" ", "-"),    # with hyphens
-                    skill.lower().replace(".", ""),     # without dots
-                ]
-                
-                for variation in skill_variations:
-                    if variation in job_text:
-                        matching_skills.append(skill)
-                        break
-            
-            # Deduplicate matching skills
-            matching_skills = list(set(matching_skills))
-            
-            # Extract some keywords that might be missing skills
-            # This is a simple approach - in a real implementation, you might use NLP or a predefined list
-            common_skills = [
-                "Python", "JavaScript", "Java", "React", "Angular", "Vue", "Node.js", 
-                "SQL", "MongoDB", "Express", "Django", "Flask", "AWS", "Azure", "GCP", 
-                "Docker", "Kubernetes", "CI/CD", "Git", "Agile", "TypeScript", "Redux",
-                "REST API", "GraphQL", "NoSQL", "CSS", "HTML", "Spring", "Hibernate",
-                "Microservices", "Unit Testing", "TDD", "Ruby", "Go", "Swift"
-            ]
-            
-            missing_skills = []
-            for skill in common_skills:
-                skill_lower = skill.lower()
-                if skill_lower in job_text and skill not in matching_skills:
-                    missing_skills.append(skill)
-            
-            # Limit to top 3 missing skills
-            missing_skills = missing_skills[:3]
-            
-            # Calculate match score - base it on percentage of user skills that match
-            # This is a more optimistic scoring that will show higher percentages
-            if matching_skills:
-                # Base score on number of matching skills relative to what's needed for the job
-                match_score = len(matching_skills) / (len(matching_skills) + len(missing_skills)) if (len(matching_skills) + len(missing_skills)) > 0 else 0
-                
-                # Boost the score if critical skills are present (those in title)
-                if job.title:
-                    title_lower = job.title.lower()
-                    for skill in matching_skills:
-                        if skill.lower() in title_lower:
-                            match_score += 0.2  # Significant boost for matching title skills
-                            break
-                
-                # Cap score at 1.0
-                match_score = min(match_score, 1.0)
-            else:
-                match_score = 0
-            
-            try:
-                # Create a JobRecommendation object directly without nesting
-                recommendation = JobRecommendation(
-                    id=job.id,
-                    title=job.title,
-                    company=job.company,
-                    location=job.location,
-                    url=job.url,
-                    job_description=job.job_description,
-                    fetched_at=job.fetched_at,
-                    extracted_skills=job.extracted_skills,
-                    relevance_score=job.relevance_score,
-                    match_score=round(match_score, 2),
-                    matching_skills=matching_skills,
-                    missing_skills=missing_skills,
-                    source=getattr(job, 'source', None),
-                    source_id=getattr(job, 'source_id', None)
-                )
-                recommendations.append(recommendation)
-            except Exception as e:
-                logger.error(f"Error creating job recommendation: {str(e)}")
-                continue
-        
-        # Sort by match score
-        recommendations.sort(key=lambda x: x.match_score, reverse=True)
-        return recommendations[:limit]  # Ensure we return at most 'limit' recommendations
+        return await basic_job_matching(user_skills, jobs, limit)
         
     except Exception as e:
         logger.error(f"Error getting job recommendations: {str(e)}")
         return []  # Return empty list instead of raising an exception
 
+@router.get("/recommend/semantic", response_model=List[JobRecommendation])
+async def get_semantic_job_recommendations(
+    current_user: User = Depends(get_current_user_claims),
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of recommendations to return")
+):
+    """
+    Get the jobs most similar to the user's current resume.
+    Uses local text embeddings, so related skills match without calling Gemini.
+    """
+    try:
+        resume = await get_current_resume(user_id=current_user.id)
+        if not resume:
+            logger.warning(f"No current resume found for user {current_user.id}")
+            return []
+        
+        return await get_semantic_recommendations(str(resume.id), limit)
+        
+    except Exception as e:
+        logger.error(f"Error getting semantic job recommendations: {str(e)}")
+        return []
+
 @router.get("/search", response_model=List[Job])
 async def search_jobs_endpoint(
+    response: Response,
     query: Optional[str] = Query(None, description="Search query for job title, company, or description"),
     limit: int = Query(10, description="Maximum number of jobs to return"),
-    current_user: User = Depends(get_current_user)
+    backend: Optional[str] = Query(
+        None, pattern="^(index|mongo)$",
+        description="Search backend: index (BM25, supports \"phrases\" and prefix*) or mongo; defaults to JOB_SEARCH_BACKEND"
+    ),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    current_user: User = Depends(get_current_user_claims)
 ):
     """
     Search for jobs with optional filters.
+    Pages are linked through the X-Next-Cursor response header.
     """
     try:
         if not query:
             # If no query, return all jobs
-            jobs = await get_all_jobs(limit=limit)
+            jobs, next_cursor = await get_jobs_page(limit=limit, cursor=cursor)
         else:
             # Search for jobs with the given query
-            jobs = await search_jobs(query=query, limit=limit)
+            jobs, next_cursor = await search_jobs_page(query=query, limit=limit, cursor=cursor, backend=backend)
+        
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        if cursor:
+            # Later pages never fall back to fetching new jobs
+            return jobs
         
         if not jobs or len(jobs) == 0:
             # If no jobs found, fetch some jobs
@@ -318,7 +276,7 @@ async def search_jobs_endpoint(
             
             # If we couldn't fetch any jobs, try one more time with the database
             if query:
-                jobs = await search_jobs(query=query, limit=limit)
+                jobs = await search_jobs(query=query, limit=limit, backend=backend)
             else:
                 jobs = await get_all_jobs(limit=limit)
             
@@ -328,15 +286,40 @@ async def search_jobs_endpoint(
         
         return jobs
         
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error searching jobs: {str(e)}")
         # Return empty list instead of raising an exception
         return []
 
+@router.get("/saved", response_model=List[Job])
+async def get_saved_jobs_endpoint(
+    response: Response,
+    limit: int = Query(100, description="Maximum number of jobs to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    current_user: User = Depends(get_current_user_claims)
+):
+    """
+    Get the jobs saved by the current user, newest first.
+    Pages are linked through the X-Next-Cursor response header.
+    """
+    try:
+        jobs, next_cursor = await get_saved_jobs(current_user.id, limit=limit, cursor=cursor)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return jobs
+        
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting saved jobs: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting saved jobs: {str(e)}")
+
 @router.get("/{job_id}", response_model=Job)
 async def get_job(
     job_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_claims)
 ):
     """
     Get details for a specific job by ID.
@@ -351,21 +334,6 @@ async def get_job(
         logger.error(f"Error getting job {job_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting job: {str(e)}")
 
-@router.get("/saved", response_model=List[Job])
-async def get_saved_jobs_endpoint(
-    current_user: User = Depends(get_current_user)
-):
-    """
-    Get all jobs saved by the current user.
-    """
-    try:
-        jobs = await get_saved_jobs(current_user.id)
-        return jobs
-        
-    except Exception as e:
-        logger.error(f"Error getting saved jobs: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error getting saved jobs: {str(e)}")
-
 @router.post("/{job_id}/save", response_model=dict)
 async def save_job(
     job_id: str,
@@ -412,12 +380,37 @@ async def unsave_job(
         logger.error(f"Error removing saved job {job_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error removing saved job: {str(e)}")
 
+@router.get("/{job_id}/candidates", response_model=List[dict])
+async def get_job_candidates(
+    job_id: str,
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of candidates to return"),
+    current_user: User = Depends(require_role(RECRUITER_ROLE))
+):
+    """
+    Rank every candidate's current resume against a job, best fit first.
+    Each candidate lists the job keywords their resume is missing.
+    Only for recruiters; candidates' user and profile ids and resume
+    filenames are included for admins only.
+    """
+    try:
+        job = await get_job_by_id(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
+        
+        return await rank_candidates(job, limit, include_identity=ADMIN_ROLE in current_user.roles)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error ranking candidates for job {job_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error ranking candidates: {str(e)}")
+
 # Add compatibility endpoint for matching the test script's "/jobs/match" endpoint
 @router.get("/match", response_model=List[JobRecommendation])
 async def match_jobs_to_resume(
     resume_id: Optional[str] = Query(None, description="Resume ID to match against"),
     limit: int = Query(5, description="Maximum number of recommendations to return"),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_claims)
 ):
     """
     Match jobs to a resume based on skills.
@@ -5,7 +5,7 @@ from bson import ObjectId
 from ...models.user import User
 from ...models.profile import Profile, ProfileCreate, ProfileUpdate
 from ...services import profile_service
-from ..endpoints.auth import get_current_user
+from ..endpoints.auth import get_current_user, get_current_user_claims
 
 router = APIRouter()
 
@@ -30,7 +30,7 @@ async def create_profile(
         )
 
 @router.get("/me", response_model=Profile)
-async def get_my_profile(current_user: User = Depends(get_current_user)) -> Any:
+async def get_my_profile(current_user: User = Depends(get_current_user_claims)) -> Any:
     """
     Get the current user's profile.
     """
@@ -71,7 +71,7 @@ async def update_my_profile(
 @router.get("/{profile_id}", response_model=Profile)
 async def get_profile(
     profile_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_claims)
 ) -> Any:
     """
     Get a profile by ID.
@@ -1,15 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, status, BackgroundTasks, Request, Response
 from fastapi.responses import StreamingResponse
-from typing import List, Dict, Any, Optional
-import io
+from typing import List, Dict, Any, Optional, Set
+from datetime import timezone
+from email.utils import format_datetime
 
+from ...core.config import settings
 from ...models.user import User
-from ...models.resume import Resume, ResumeVersion, ResumeWithVersions
+from ...models.resume import Resume, ResumeSummary, ResumeVersion, ResumeWithVersions
 from ...services import resume_service, profile_service, skill_service
-from ..endpoints.auth import get_current_user
+from ...utils import gridfs
+from ...utils.http import parse_range_header, etag_matches, RangeNotSatisfiable
+from ..endpoints.auth import get_current_user, get_current_user_claims
 
 router = APIRouter()
 
+# Optional expansions of the resume list endpoints (?include=)
+RESUME_EXPANSIONS = {"parsed_content"}
+
+def _parse_include(include: Optional[str]) -> Set[str]:
+    """Comma-separated ?include= values, rejecting unknown expansions"""
+    requested = {value.strip() for value in (include or "").split(",") if value.strip()}
+    unknown = requested - RESUME_EXPANSIONS
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown include value(s): {', '.join(sorted(unknown))}"
+        )
+    return requested
+
 @router.post("/upload", response_model=Resume, status_code=status.HTTP_201_CREATED)
 async def upload_resume(
     file: UploadFile = File(...),
@@ -37,15 +55,12 @@ async def upload_resume(
             detail="Invalid file type. Only PDF, Word, and text documents are allowed."
         )
     
-    # Read file content
-    file_content = await file.read()
-    
-    # Upload resume
+    # Upload resume, streaming the file into GridFS
     try:
         if profile_id:
             # Link to profile if provided
-            resume = await resume_service.upload_resume(
-                file_content=file_content,
+            resume = await resume_service.upload_resume_stream(
+                file.read,
                 original_filename=file.filename,
                 file_type=file.content_type,
                 profile_id=profile_id
@@ -53,18 +68,21 @@ async def upload_resume(
             
             # Analyze skills if requested
             if analyze_skills:
-                # Run skill analysis in background
-                background_tasks.add_task(
-                    skill_service.analyze_resume_skills,
-                    resume_id=resume.id,
-                    file_content=file_content,
-                    file_type=file.content_type,
-                    profile_id=profile_id
-                )
+                if settings.SKILL_ANALYSIS_USE_QUEUE:
+                    # Picked up by the worker process; status at GET /skills/analyze/{resume_id}
+                    await skill_service.queue_resume_analysis(resume.id, profile_id=profile_id)
+                else:
+                    # Run skill analysis in background
+                    background_tasks.add_task(
+                        skill_service.analyze_resume_skills,
+                        resume_id=resume.id,
+                        resume_text=(resume.parsed_content or {}).get("text", ""),
+                        profile_id=profile_id
+                    )
         else:
             # Otherwise link directly to user
-            resume = await resume_service.upload_resume(
-                file_content=file_content,
+            resume = await resume_service.upload_resume_stream(
+                file.read,
                 original_filename=file.filename,
                 file_type=file.content_type,
                 user_id=current_user.id
@@ -72,15 +90,23 @@ async def upload_resume(
             
             # Analyze skills if requested
             if analyze_skills:
-                # Run skill analysis in background
-                background_tasks.add_task(
-                    skill_service.analyze_resume_skills,
-                    resume_id=resume.id,
-                    file_content=file_content,
-                    file_type=file.content_type,
-                    user_id=current_user.id
-                )
+                if settings.SKILL_ANALYSIS_USE_QUEUE:
+                    # Picked up by the worker process; status at GET /skills/analyze/{resume_id}
+                    await skill_service.queue_resume_analysis(resume.id, user_id=current_user.id)
+                else:
+                    # Run skill analysis in background
+                    background_tasks.add_task(
+                        skill_service.analyze_resume_skills,
+                        resume_id=resume.id,
+                        resume_text=(resume.parsed_content or {}).get("text", ""),
+                        user_id=current_user.id
+                    )
         return resume
+    except gridfs.FileTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -89,7 +115,7 @@ async def upload_resume(
 
 @router.get("/user/current", response_model=Resume)
 async def get_current_user_resume(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_claims)
 ):
     """
     Get the current resume for the authenticated user.
@@ -104,41 +130,48 @@ async def get_current_user_resume(
     
     return resume
 
-@router.get("/user", response_model=List[Resume])
+@router.get("/user", response_model=List[ResumeSummary])
 async def get_user_resumes(
-    current_user: User = Depends(get_current_user)
+    include: Optional[str] = Query(None, description="Set to parsed_content to include each resume's parsed content"),
+    current_user: User = Depends(get_current_user_claims)
 ):
     """
-    Get all resumes for the authenticated user.
+    Get all resumes for the authenticated user as summaries.
     """
-    resumes = await resume_service.get_resumes_by_user(current_user.id)
+    expansions = _parse_include(include)
+    resumes = await resume_service.get_resumes_by_user(
+        current_user.id, include_content="parsed_content" in expansions
+    )
     return resumes
 
 @router.get("/user/count", response_model=int)
 async def get_user_resume_count(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_claims)
 ):
     """
     Get the count of resumes for the authenticated user.
     """
-    resumes = await resume_service.get_resumes_by_user(current_user.id)
-    return len(resumes)
+    return await resume_service.count_resumes_by_user(current_user.id)
 
-@router.get("/profile/{profile_id}", response_model=List[Resume])
+@router.get("/profile/{profile_id}", response_model=List[ResumeSummary])
 async def get_resumes_by_profile(
     profile_id: str,
-    current_user: User = Depends(get_current_user)
+    include: Optional[str] = Query(None, description="Set to parsed_content to include each resume's parsed content"),
+    current_user: User = Depends(get_current_user_claims)
 ):
     """
-    Get all resumes for a profile.
+    Get all resumes for a profile as summaries.
     """
-    resumes = await resume_service.get_resumes_by_profile(profile_id)
+    expansions = _parse_include(include)
+    resumes = await resume_service.get_resumes_by_profile(
+        profile_id, include_content="parsed_content" in expansions
+    )
     return resumes
 
 @router.get("/profile/{profile_id}/current", response_model=Resume)
 async def get_current_resume(
     profile_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_claims)
 ):
     """
     Get the current resume for a profile.
@@ -156,7 +189,7 @@ async def get_current_resume(
 @router.get("/{resume_id}", response_model=ResumeWithVersions)
 async def get_resume_with_versions(
     resume_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_claims)
 ):
     """
     Get a resume with all its versions.
@@ -174,12 +207,16 @@ async def get_resume_with_versions(
 @router.get("/{resume_id}/download")
 async def download_resume(
     resume_id: str,
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    current_user: User = Depends(get_current_user_claims)
 ):
     """
     Download a resume file.
+    
+    The file is streamed from GridFS chunk by chunk. Supports single byte
+    ranges (Range / If-Range) and conditional requests (If-None-Match -> 304).
     """
-    file_data = await resume_service.download_resume(resume_id)
+    file_data = await resume_service.open_resume_download(resume_id)
     
     if not file_data:
         raise HTTPException(
@@ -187,13 +224,50 @@ async def download_resume(
             detail="Resume not found or unable to download file."
         )
     
-    # Create file-like object
-    file_obj = io.BytesIO(file_data["content"])
+    grid_out = file_data["grid_out"]
+    length = file_data["length"]
+    headers = {
+        "Content-Disposition": f"attachment; filename={file_data['filename']}",
+        "ETag": file_data["etag"],
+        "Accept-Ranges": "bytes",
+        # Let browsers keep the file but revalidate with If-None-Match each time
+        "Cache-Control": "private, no-cache"
+    }
+    if file_data["last_modified"]:
+        headers["Last-Modified"] = format_datetime(file_data["last_modified"].replace(tzinfo=timezone.utc), usegmt=True)
+    
+    if etag_matches(request.headers.get("if-none-match"), file_data["etag"]):
+        grid_out.close()
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if not if_range or if_range == file_data["etag"]:
+        try:
+            byte_range = parse_range_header(request.headers.get("range"), length)
+        except RangeNotSatisfiable:
+            grid_out.close()
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{length}"}
+            )
+    
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{length}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            gridfs.iter_chunks(grid_out, start, end),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=file_data["file_type"],
+            headers=headers
+        )
     
+    headers["Content-Length"] = str(length)
     return StreamingResponse(
-        file_obj,
+        gridfs.iter_chunks(grid_out),
         media_type=file_data["file_type"],
-        headers={"Content-Disposition": f"attachment; filename={file_data['filename']}"}
+        headers=headers
     )
 
 @router.delete("/{resume_id}", status_code=status.HTTP_204_NO_CONTENT)
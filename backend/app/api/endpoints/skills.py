@@ -1,17 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query, Request
 from typing import List, Dict, Any, Optional
 
 from ...models.user import User
-from ...models.skill import Skill, UserSkill, SkillAnalysisResult
+from ...models.skill import Skill, UserSkill, SkillAnalysisResult, AnalysisTask
 from ...services import skill_service, resume_service
-from ..endpoints.auth import get_current_user
+from ...services.text_extraction import ExtractionCancelled
+from ..endpoints.auth import get_current_user, get_current_user_claims
 
 router = APIRouter()
 
 @router.get("/resume/{resume_id}", response_model=Optional[UserSkill])
 async def get_skills_by_resume(
     resume_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_claims)
 ):
     """
     Get skills extracted from a specific resume.
@@ -29,14 +30,37 @@ async def get_skills_by_resume(
     skills = await skill_service.get_skills_by_resume(resume_id)
     return skills
 
+@router.get("/analyze/{resume_id}", response_model=AnalysisTask)
+async def get_resume_analysis_status(
+    resume_id: str,
+    current_user: User = Depends(get_current_user_claims)
+):
+    """
+    Get the status of the latest queued skill analysis for a resume.
+    """
+    task = await skill_service.get_resume_analysis_task(resume_id)
+    
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No skill analysis has been queued for this resume."
+        )
+    
+    return task
+
 @router.post("/analyze/{resume_id}", response_model=UserSkill)
 async def analyze_resume_skills(
     resume_id: str,
+    request: Request,
     background_tasks: BackgroundTasks,
+    refresh: bool = Query(False, description="Bypass the analysis cache and re-run the analysis"),
     current_user: User = Depends(get_current_user)
 ):
     """
     Manually trigger skill analysis for a resume.
+    
+    Results for unchanged resumes are served from the analysis cache unless
+    refresh is set.
     """
     # Check if the resume exists and belongs to the user
     try:
@@ -48,30 +72,24 @@ async def analyze_resume_skills(
                 detail="Resume not found."
             )
         
-        # Get the resume file content
-        file_data = await resume_service.download_resume(resume_id)
-        
-        if not file_data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Resume file not found."
-            )
-        
         # Determine if linked to profile or user
         profile_id = getattr(resume, "profile_id", None)
         user_id = getattr(resume, "user_id", None) or current_user.id
         
-        # Run skill analysis
+        # Run skill analysis on the text parsed at upload time
         try:
             user_skill = await skill_service.analyze_resume_skills(
                 resume_id=resume_id,
-                file_content=file_data["content"],
-                file_type=file_data["file_type"],
                 profile_id=profile_id,
-                user_id=user_id
+                user_id=user_id,
+                use_cache=not refresh,
+                is_disconnected=request.is_disconnected
             )
             
             return user_skill
+        except ExtractionCancelled:
+            # The client is gone; nobody will read this response
+            raise HTTPException(status_code=499, detail="Client closed request")
         except ValueError as e:
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -93,7 +111,7 @@ async def analyze_resume_skills(
 
 @router.get("/user", response_model=List[UserSkill])
 async def get_user_skills(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_claims)
 ):
     """
     Get all skills for the current user.
@@ -104,7 +122,7 @@ async def get_user_skills(
 @router.get("/profile/{profile_id}", response_model=List[UserSkill])
 async def get_profile_skills(
     profile_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_claims)
 ):
     """
     Get all skills for a specific profile.
@@ -1,4 +1,5 @@
 import os
+from typing import Dict
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -20,19 +21,111 @@ class Settings(BaseSettings):
     )
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    USER_CACHE_TTL_SECONDS: float = Field(default=60.0, env="USER_CACHE_TTL_SECONDS")  # Authenticated user records
+    USER_CACHE_MAX_ENTRIES: int = Field(default=10000, env="USER_CACHE_MAX_ENTRIES")
+    # Password hashing runs on its own thread pool; requests beyond the pending limit get a 503
+    BCRYPT_ROUNDS: int = Field(default=12, env="BCRYPT_ROUNDS")  # Changing it rehashes passwords on login
+    PASSWORD_HASH_WORKERS: int = Field(default=2, env="PASSWORD_HASH_WORKERS")
+    PASSWORD_HASH_MAX_PENDING: int = Field(default=16, env="PASSWORD_HASH_MAX_PENDING")  # Running + queued
+    # Read-only endpoints build the user from the signed token instead of the database
+    AUTH_TRUST_TOKEN_CLAIMS: bool = Field(default=False, env="AUTH_TRUST_TOKEN_CLAIMS")
     
     # App settings
     DEBUG: bool = Field(default=False, env="DEBUG")
     ENVIRONMENT: str = Field(default="production", env="ENVIRONMENT")
     
+    # Build missing indexes from app/db/indexes.py at startup; disable for very large
+    # collections and run `python -m app.db.indexes apply --background` instead
+    CREATE_INDEXES_ON_STARTUP: bool = Field(default=True, env="CREATE_INDEXES_ON_STARTUP")
+    
     # Upload settings
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_UPLOAD_TYPES: list = ["application/pdf", "application/msword", 
                                  "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]
     
+    # Resume text extraction (PDF/Word parsing runs on a process pool)
+    TEXT_EXTRACTION_WORKERS: int = Field(default=2, env="TEXT_EXTRACTION_WORKERS")
+    TEXT_EXTRACTION_MAX_PAGES: int = Field(default=20, env="TEXT_EXTRACTION_MAX_PAGES")
+    TEXT_EXTRACTION_TIMEOUT_SECONDS: float = Field(default=20.0, env="TEXT_EXTRACTION_TIMEOUT_SECONDS")  # Per document
+    
     # Gemini API settings
     GEMINI_API_KEY: str = Field(default="", env="GEMINI_API_KEY")
+
+    # Shared LLM client; LLM_BACKEND=fake answers locally after LLM_FAKE_LATENCY_SECONDS
+    LLM_BACKEND: str = Field(default="gemini", env="LLM_BACKEND")  # gemini | fake
+    LLM_MODEL: str = Field(default="gemini-1.5-pro", env="LLM_MODEL")
+    LLM_MAX_CONCURRENCY: int = Field(default=8, env="LLM_MAX_CONCURRENCY")  # Calls in flight per process
+    LLM_FEATURE_CONCURRENCY: Dict[str, int] = Field(
+        default={"skill_analysis": 4, "job_matching": 4, "resume_optimization": 2},
+        env="LLM_FEATURE_CONCURRENCY"
+    )
+    LLM_TIMEOUT_SECONDS: float = Field(default=60.0, env="LLM_TIMEOUT_SECONDS")  # Per call, including queueing
+    LLM_FAKE_LATENCY_SECONDS: float = Field(default=0.5, env="LLM_FAKE_LATENCY_SECONDS")
+
+    # Skill analysis cache (keyed by normalized resume text + model + prompt version)
+    SKILL_ANALYSIS_CACHE_ENABLED: bool = Field(default=True, env="SKILL_ANALYSIS_CACHE_ENABLED")
+    SKILL_ANALYSIS_CACHE_TTL_SECONDS: int = Field(default=30 * 24 * 3600, env="SKILL_ANALYSIS_CACHE_TTL_SECONDS")  # Since last use
+    SKILL_ANALYSIS_CACHE_MAX_ENTRIES: int = Field(default=10000, env="SKILL_ANALYSIS_CACHE_MAX_ENTRIES")
+    # Run upload-triggered analysis on the task queue (python -m app.worker) instead of in the API process
+    SKILL_ANALYSIS_USE_QUEUE: bool = Field(default=True, env="SKILL_ANALYSIS_USE_QUEUE")
+
+    # Task queue / worker settings
+    TASK_MAX_ATTEMPTS: int = Field(default=5, env="TASK_MAX_ATTEMPTS")
+    TASK_LEASE_SECONDS: float = Field(default=120.0, env="TASK_LEASE_SECONDS")  # Renewed while a task runs
+    TASK_RETRY_BASE_SECONDS: float = Field(default=10.0, env="TASK_RETRY_BASE_SECONDS")  # Doubles per attempt
+    TASK_RETRY_MAX_SECONDS: float = Field(default=15 * 60.0, env="TASK_RETRY_MAX_SECONDS")
+    TASK_RETENTION_SECONDS: int = Field(default=7 * 24 * 3600, env="TASK_RETENTION_SECONDS")  # Finished tasks
+    WORKER_CONCURRENCY: int = Field(default=4, env="WORKER_CONCURRENCY")  # Tasks per worker process
+    WORKER_POLL_SECONDS: float = Field(default=1.0, env="WORKER_POLL_SECONDS")  # Sleep when the queue is empty
+
+    # JSearch API settings
+    JSEARCH_API_KEY: str = Field(default="", env="JSEARCH_API_KEY")
+    JSEARCH_API_URL: str = Field(default="https://jsearch.p.rapidapi.com/search", env="JSEARCH_API_URL")
+    JSEARCH_API_HOST: str = Field(default="jsearch.p.rapidapi.com", env="JSEARCH_API_HOST")
+    JSEARCH_MAX_CONCURRENCY: int = Field(default=4, env="JSEARCH_MAX_CONCURRENCY")  # Pages fetched in parallel
+    JSEARCH_RATE_LIMIT: float = Field(default=1.0, env="JSEARCH_RATE_LIMIT")  # Requests per second
+    JSEARCH_RATE_BURST: int = Field(default=2, env="JSEARCH_RATE_BURST")
+    JSEARCH_TIMEOUT_SECONDS: float = Field(default=15.0, env="JSEARCH_TIMEOUT_SECONDS")
+    JSEARCH_MAX_RETRIES: int = Field(default=3, env="JSEARCH_MAX_RETRIES")
+    JSEARCH_RETRY_BACKOFF_SECONDS: float = Field(default=0.5, env="JSEARCH_RETRY_BACKOFF_SECONDS")
+    JSEARCH_MAX_RETRY_DELAY_SECONDS: float = Field(default=30.0, env="JSEARCH_MAX_RETRY_DELAY_SECONDS")  # Cap on backoff and Retry-After
+    
+    # Job ingestion settings
+    JOB_INGEST_BATCH_SIZE: int = Field(default=1000, env="JOB_INGEST_BATCH_SIZE")  # Upserts per bulk_write
+    
+    # Two-stage job matching for /jobs/recommend: local pre-ranking, then Gemini on the shortlist
+    JOB_MATCH_CANDIDATES: int = Field(default=200, env="JOB_MATCH_CANDIDATES")  # Jobs pre-ranked locally
+    JOB_MATCH_LLM_TOP_N: int = Field(default=20, env="JOB_MATCH_LLM_TOP_N")  # Jobs sent to Gemini
+    JOB_MATCH_BATCH_TOKENS: int = Field(default=3000, env="JOB_MATCH_BATCH_TOKENS")  # Job data per prompt
+    JOB_MATCH_MAX_BATCH_SIZE: int = Field(default=10, env="JOB_MATCH_MAX_BATCH_SIZE")
+    JOB_MATCH_CACHE_ENABLED: bool = Field(default=True, env="JOB_MATCH_CACHE_ENABLED")
+    JOB_MATCH_CACHE_TTL_SECONDS: int = Field(default=7 * 24 * 3600, env="JOB_MATCH_CACHE_TTL_SECONDS")  # Since stored
     
+    # Generated files (optimized resumes) and the /ats/optimize-resume result cache
+    ARTIFACT_TTL_SECONDS: int = Field(default=7 * 24 * 3600, env="ARTIFACT_TTL_SECONDS")  # Since last download
+    ARTIFACT_MAX_BYTES: int = Field(default=4 * 1024 * 1024, env="ARTIFACT_MAX_BYTES")
+    RESUME_OPTIMIZATION_CACHE_ENABLED: bool = Field(default=True, env="RESUME_OPTIMIZATION_CACHE_ENABLED")
+    RESUME_OPTIMIZATION_CACHE_TTL_SECONDS: int = Field(default=7 * 24 * 3600, env="RESUME_OPTIMIZATION_CACHE_TTL_SECONDS")
+    
+    # Batch ATS scoring (/ats/analyze-batch)
+    ATS_BATCH_MAX_JOBS: int = Field(default=500, env="ATS_BATCH_MAX_JOBS")  # Jobs scored per request
+    ATS_KEYWORD_CACHE_SIZE: int = Field(default=4096, env="ATS_KEYWORD_CACHE_SIZE")  # Job keyword lists kept in memory
+    
+    # In-process index settings
+    INDEX_DATA_DIR: str = Field(default="data/indexes", env="INDEX_DATA_DIR")  # Snapshot directory
+    INDEX_WATERMARK_OVERLAP_SECONDS: float = Field(default=60.0, env="INDEX_WATERMARK_OVERLAP_SECONDS")  # Changes re-read on each catch-up
+    JOB_TOMBSTONE_TTL_SECONDS: int = Field(default=7 * 24 * 3600, env="JOB_TOMBSTONE_TTL_SECONDS")  # How long removals are kept for other workers
+    SKILL_INDEX_REFRESH_SECONDS: float = Field(default=30.0, env="SKILL_INDEX_REFRESH_SECONDS")
+    SEARCH_INDEX_REFRESH_SECONDS: float = Field(default=30.0, env="SEARCH_INDEX_REFRESH_SECONDS")
+    CANDIDATE_INDEX_REFRESH_SECONDS: float = Field(default=30.0, env="CANDIDATE_INDEX_REFRESH_SECONDS")
+    VECTOR_INDEX_REFRESH_SECONDS: float = Field(default=30.0, env="VECTOR_INDEX_REFRESH_SECONDS")
+    VECTOR_INDEX_NPROBE: int = Field(default=8, env="VECTOR_INDEX_NPROBE")  # Lists scanned per query
+    VECTOR_INDEX_RETRAIN_FRACTION: float = Field(default=0.2, env="VECTOR_INDEX_RETRAIN_FRACTION")  # Untrained or removed share that triggers retraining
+    # Size of the local hashed n-gram vectors stored on jobs and resumes
+    EMBEDDING_DIM: int = Field(default=256, env="EMBEDDING_DIM")
+    # Default backend for /jobs/search: index (in-process BM25) or mongo ($text)
+    JOB_SEARCH_BACKEND: str = Field(default="index", env="JOB_SEARCH_BACKEND")
+
     # CORS settings
     FRONTEND_URL: str = Field(default="http://localhost:3000", env="FRONTEND_URL")
     
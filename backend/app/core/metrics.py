@@ -0,0 +1,42 @@
+"""
+In-process metrics.
+
+Counters, gauges and timings are kept per worker process and exposed at
+GET /metrics; they reset when the process restarts.
+"""
+import threading
+from collections import defaultdict
+from typing import Dict
+
+class Metrics:
+    """Thread-safe named counters, gauges and timings"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(int)
+        self._gauges: Dict[str, float] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record a duration as <name>.count, <name>.seconds_total and <name>.seconds_max"""
+        with self._lock:
+            self._counters[f"{name}.count"] += 1
+            self._counters[f"{name}.seconds_total"] += seconds
+            self._gauges[f"{name}.seconds_max"] = max(self._gauges.get(f"{name}.seconds_max", 0.0), seconds)
+
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, self._gauges.get(name, 0))
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(sorted({**self._counters, **self._gauges}.items()))
+
+metrics = Metrics()
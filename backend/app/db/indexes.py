@@ -0,0 +1,253 @@
+"""
+Declarative index registry.
+
+Every index the services rely on is declared here and applied once at
+application startup. Applying is idempotent: only missing indexes are built,
+and differences between the declared and actual indexes are reported as drift.
+
+Large collections can be indexed out of band with the CLI:
+
+    python -m app.db.indexes check
+    python -m app.db.indexes apply --background [--collection jobs] [--rebuild-changed]
+"""
+import argparse
+import asyncio
+import logging
+from typing import Dict, List, Any, Optional
+
+from pymongo import IndexModel, ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
+
+from ..core.config import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Options that change index semantics and therefore count as drift when they differ
+COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+def index(keys: List[tuple], **options) -> Dict[str, Any]:
+    """Declare an index as its key pattern plus createIndexes options"""
+    return {"keys": keys, **options}
+
+# Collection name -> declared indexes. Names are left to MongoDB's defaults so
+# indexes created before the registry existed are recognised as the same index.
+INDEXES: Dict[str, List[Dict[str, Any]]] = {
+    "jobs": [
+        index([("dedupe_key", ASCENDING)], unique=True,
+              partialFilterExpression={"dedupe_key": {"$exists": True}}),
+        index([("source", ASCENDING), ("source_id", ASCENDING)], unique=True,
+              partialFilterExpression={"source_id": {"$type": "string"}}),
+        index([("title", TEXT), ("job_description", TEXT)]),
+        index([("fetched_at", DESCENDING), ("_id", DESCENDING)]),
+        index([("updated_at", ASCENDING)]),
+    ],
+    "job_tombstones": [
+        index([("deleted_at", ASCENDING)], expireAfterSeconds=settings.JOB_TOMBSTONE_TTL_SECONDS),
+    ],
+    "resumes": [
+        index([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        index([("profile_id", ASCENDING), ("created_at", DESCENDING)]),
+        index([("user_id", ASCENDING), ("is_current", ASCENDING)]),
+        index([("profile_id", ASCENDING), ("is_current", ASCENDING)]),
+    ],
+    "resume_versions": [
+        index([("resume_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "user_skills": [
+        index([("resume_id", ASCENDING)]),
+        index([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        index([("profile_id", ASCENDING), ("created_at", DESCENDING)]),
+        index([("updated_at", ASCENDING)]),
+    ],
+    "skill_analysis_cache": [
+        index([("last_used_at", ASCENDING)], expireAfterSeconds=settings.SKILL_ANALYSIS_CACHE_TTL_SECONDS),
+    ],
+    "job_match_cache": [
+        index([("created_at", ASCENDING)], expireAfterSeconds=settings.JOB_MATCH_CACHE_TTL_SECONDS),
+    ],
+    "artifacts": [
+        index([("last_used_at", ASCENDING)], expireAfterSeconds=settings.ARTIFACT_TTL_SECONDS),
+    ],
+    "resume_optimization_cache": [
+        index([("created_at", ASCENDING)], expireAfterSeconds=settings.RESUME_OPTIMIZATION_CACHE_TTL_SECONDS),
+    ],
+    "task_queue": [
+        index([("status", ASCENDING), ("type", ASCENDING), ("run_at", ASCENDING)]),
+        index([("status", ASCENDING), ("lease_expires_at", ASCENDING)]),
+        index([("key", ASCENDING), ("type", ASCENDING), ("created_at", DESCENDING)]),
+        index([("finished_at", ASCENDING)], expireAfterSeconds=settings.TASK_RETENTION_SECONDS),
+    ],
+    "profiles": [
+        index([("user_id", ASCENDING)], unique=True),
+    ],
+    "users": [
+        index([("email", ASCENDING)], unique=True),
+    ],
+}
+
+def build_index_models(collection: str, background: bool = False) -> List[IndexModel]:
+    """Turn the declarations for a collection into pymongo IndexModels"""
+    models = []
+    for spec in INDEXES.get(collection, []):
+        options = {k: v for k, v in spec.items() if k != "keys"}
+        if background:
+            options["background"] = True
+        models.append(IndexModel(spec["keys"], **options))
+    return models
+
+def _normalize_options(document: Dict[str, Any]) -> Dict[str, Any]:
+    options = {option: document[option] for option in COMPARED_OPTIONS if option in document}
+    # Key patterns of text indexes are stored as _fts/_ftsx, so compare their weights instead
+    if document.get("weights"):
+        options["weights"] = dict(document["weights"])
+    return options
+
+def _describe(document: Dict[str, Any]) -> Dict[str, Any]:
+    key = document["key"]
+    if "_fts" in key or TEXT in key.values():
+        return _normalize_options(document)
+    return {"key": list(key.items()), **_normalize_options(document)}
+
+async def get_index_drift(db, collections: Optional[List[str]] = None) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Compare declared indexes with the ones that exist in the database
+
+    Args:
+        db: Database handle
+        collections: Collections to check (defaults to every declared collection)
+
+    Returns:
+        Dict of collection name to {"missing", "extra", "changed"} index names.
+        Collections without drift are omitted.
+    """
+    drift = {}
+    for collection in collections or list(INDEXES):
+        declared = {}
+        for model in build_index_models(collection):
+            document = dict(model.document)
+            if any(direction == TEXT for _, direction in document["key"].items()):
+                # Text index weights default to 1 per field
+                document.setdefault("weights", {field: 1 for field, _ in document["key"].items()})
+            declared[document["name"]] = document
+
+        actual = {}
+        async for document in db[collection].list_indexes():
+            if document["name"] != "_id_":
+                actual[document["name"]] = document
+
+        missing = [name for name in declared if name not in actual]
+        extra = [name for name in actual if name not in declared]
+        changed = [
+            name for name in declared
+            if name in actual and _describe(declared[name]) != _describe(actual[name])
+        ]
+
+        if missing or extra or changed:
+            drift[collection] = {"missing": missing, "extra": extra, "changed": changed}
+
+    return drift
+
+async def ensure_indexes(
+    db,
+    collections: Optional[List[str]] = None,
+    background: bool = False,
+    rebuild_changed: bool = False
+) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Build every declared index that does not exist yet
+
+    Safe to call on every startup: existing indexes are left alone and a
+    failure on one index is logged without stopping the others.
+
+    Args:
+        db: Database handle
+        collections: Collections to index (defaults to every declared collection)
+        background: Request background builds (for large collections)
+        rebuild_changed: Drop and recreate indexes whose options drifted
+
+    Returns:
+        The drift that remains after applying
+    """
+    drift = await get_index_drift(db, collections)
+
+    for collection, report in drift.items():
+        to_build = set(report["missing"])
+
+        if report["changed"]:
+            if rebuild_changed:
+                for name in report["changed"]:
+                    logger.warning(f"Dropping drifted index {collection}.{name} for rebuild")
+                    await db[collection].drop_index(name)
+                to_build.update(report["changed"])
+            else:
+                logger.warning(f"Indexes on {collection} differ from the registry: {report['changed']}")
+
+        if report["extra"]:
+            logger.info(f"Indexes on {collection} not declared in the registry: {report['extra']}")
+
+        for model in build_index_models(collection, background=background):
+            name = model.document["name"]
+            if name not in to_build:
+                continue
+            try:
+                await db[collection].create_indexes([model])
+                logger.info(f"Created index {collection}.{name}")
+            except OperationFailure as e:
+                logger.error(f"Error creating index {collection}.{name}: {str(e)}")
+
+    return await get_index_drift(db, collections) if drift else drift
+
+async def _run_cli(args) -> int:
+    from .mongodb import connect_to_mongo, close_mongo_connection, get_database
+
+    await connect_to_mongo()
+    try:
+        db = get_database()
+        collections = args.collection or None
+
+        if args.command == "check":
+            drift = await get_index_drift(db, collections)
+        else:
+            if args.backfill_dedupe_keys:
+                from ..services.job_service import backfill_dedupe_keys
+                await backfill_dedupe_keys()
+            if args.backfill_skill_ids:
+                from ..services.job_service import backfill_skill_ids
+                await backfill_skill_ids()
+            drift = await ensure_indexes(
+                db,
+                collections,
+                background=args.background,
+                rebuild_changed=args.rebuild_changed
+            )
+
+        if not drift:
+            print("Indexes match the registry")
+        for collection, report in drift.items():
+            for kind in ("missing", "changed", "extra"):
+                for name in report[kind]:
+                    print(f"{collection}: {kind} {name}")
+
+        # Extra indexes are informational; missing or changed ones fail the check
+        return 1 if any(r["missing"] or r["changed"] for r in drift.values()) else 0
+    finally:
+        await close_mongo_connection()
+
+def main():
+    parser = argparse.ArgumentParser(description="Check or build the declared MongoDB indexes")
+    parser.add_argument("command", choices=["check", "apply"])
+    parser.add_argument("--collection", action="append", help="Limit to a collection (repeatable)")
+    parser.add_argument("--background", action="store_true", help="Build indexes in the background")
+    parser.add_argument("--rebuild-changed", action="store_true", help="Drop and recreate drifted indexes")
+    parser.add_argument("--backfill-dedupe-keys", action="store_true",
+                        help="Assign dedupe keys to legacy jobs before building the jobs indexes")
+    parser.add_argument("--backfill-skill-ids", action="store_true",
+                        help="Resolve the skills of legacy jobs to canonical names and skill ids")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    raise SystemExit(asyncio.run(_run_cli(args)))
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,21 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+import asyncio
 import logging
 
 from .api.api import api_router
 from .core.config import settings
-from .db.mongodb import connect_to_mongo, close_mongo_connection
+from .core.metrics import metrics
+from .db.mongodb import connect_to_mongo, close_mongo_connection, get_database
+from .db.indexes import ensure_indexes
+from .services.jsearch_client import close_jsearch_client
+from .services.job_skill_index import get_job_skill_index
+from .services.job_search_index import get_job_search_index
+from .services.job_vector_index import get_job_vector_index
+from .services.text_extraction import shutdown_extraction_pool
+from .services.llm_client import shutdown_llm_client
+from .services.user_service import shutdown_password_hasher
 
 # Configure logging
 logging.basicConfig(
@@ -26,18 +36,58 @@ app.add_middleware(
     allow_origins=["http://localhost:3000"],  # Use specific frontend URL
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Origin", "X-Requested-With", "Content-Type", "Accept", "Authorization"],
-    expose_headers=["Content-Length"],
+    allow_headers=["Origin", "X-Requested-With", "Content-Type", "Accept", "Authorization",
+                   "Range", "If-None-Match", "If-Range"],
+    expose_headers=["Content-Length", "Content-Range", "Accept-Ranges", "ETag", "Content-Disposition",
+                    "X-Next-Cursor"],
     max_age=1728000,  # 20 days
 )
 
+# Reject bodies that cannot fit under the upload limit before they are read
+# (uploads are also counted while streaming into GridFS)
+MULTIPART_OVERHEAD = 64 * 1024
+
+@app.middleware("http")
+async def limit_request_size(request: Request, call_next):
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Request body exceeds the upload limit of {settings.MAX_UPLOAD_SIZE:,} bytes"}
+        )
+    return await call_next(request)
+
 # Register startup and shutdown events
 @app.on_event("startup")
 async def startup_db_client():
     await connect_to_mongo()
+    if settings.CREATE_INDEXES_ON_STARTUP:
+        try:
+            await ensure_indexes(get_database())
+        except Exception as e:
+            logging.error(f"Error ensuring database indexes: {str(e)}")
+    
+    # Warm the in-process indexes without delaying startup; requests wait for them if needed
+    app.state.skill_index_task = asyncio.create_task(get_job_skill_index().ensure_loaded())
+    if settings.JOB_SEARCH_BACKEND == "index":
+        app.state.search_index_task = asyncio.create_task(get_job_search_index().ensure_loaded())
+    app.state.vector_index_task = asyncio.create_task(get_job_vector_index().ensure_loaded())
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    skill_index = get_job_skill_index()
+    if skill_index.loaded:
+        skill_index.save_snapshot()
+    search_index = get_job_search_index()
+    if search_index.loaded:
+        search_index.save_snapshot()
+    vector_index = get_job_vector_index()
+    if vector_index.loaded:
+        await vector_index.save_snapshot_async()
+    shutdown_extraction_pool()
+    shutdown_llm_client()
+    shutdown_password_hasher()
+    await close_jsearch_client()
     await close_mongo_connection()
 
 # Include API router
@@ -64,6 +114,11 @@ async def root():
         "status": "online"
     }
 
+# In-process counters (cache hit rates etc.) for this worker
+@app.get("/metrics")
+async def get_metrics():
+    return metrics.snapshot()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
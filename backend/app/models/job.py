@@ -24,6 +24,7 @@ class JobInDB(JobBase):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     fetched_at: datetime = Field(default_factory=datetime.utcnow)
     extracted_skills: List[str] = []
+    skill_ids: List[int] = []
     relevance_score: Optional[float] = None
     
     model_config = {
@@ -40,6 +41,7 @@ class Job(JobBase):
     id: str = Field(alias="_id")
     fetched_at: datetime
     extracted_skills: List[str] = []
+    skill_ids: List[int] = []
     relevance_score: Optional[float] = None
     source: Optional[str] = None
     source_id: Optional[str] = None
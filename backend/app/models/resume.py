@@ -55,12 +55,14 @@ class ResumeInDB(ResumeBase):
         return str(user_id) if user_id else None
 
 
-class Resume(ResumeBase):
+class ResumeSummary(ResumeBase):
+    """Resume as returned by list endpoints"""
     id: str = Field(alias="_id")
     file_id: str
+    file_size: Optional[int] = None
     created_at: datetime
     is_current: bool
-    parsed_content: Optional[Dict[str, Any]] = {}
+    parsed_content: Optional[Dict[str, Any]] = None  # Only loaded with ?include=parsed_content
 
     model_config = {
         "json_encoders": {ObjectId: str},
@@ -68,6 +70,10 @@ class Resume(ResumeBase):
     }
 
 
+class Resume(ResumeSummary):
+    parsed_content: Optional[Dict[str, Any]] = {}
+
+
 class ResumeVersionBase(BaseModel):
     resume_id: PyObjectId
     job_id: PyObjectId
@@ -29,6 +29,7 @@ class UserSkill(BaseModel):
     profile_id: Optional[str] = None
     resume_id: str
     skills: List[Skill]
+    skill_ids: List[int] = []
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -39,4 +40,23 @@ class SkillAnalysisResult(BaseModel):
     certifications: List[Skill] = []
     
     def all_skills(self) -> List[Skill]:
-        return self.technical_skills + self.soft_skills + self.domain_knowledge + self.certifications 
\ No newline at end of file
+        return self.technical_skills + self.soft_skills + self.domain_knowledge + self.certifications 
+
+class AnalysisTaskStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    DEAD = "dead"
+
+class AnalysisTask(BaseModel):
+    id: str
+    resume_id: str
+    status: AnalysisTaskStatus
+    attempts: int = 0
+    max_attempts: int
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    run_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, field_serializer, field_validator
-from typing import Optional, Any, Annotated
+from typing import Optional, Any, Annotated, List
 from datetime import datetime
 from bson import ObjectId
 
@@ -32,6 +32,11 @@ class PyObjectId(ObjectId):
         field_schema.update(type="string")
 
 
+# Roles are granted by setting them on the user document; nobody has one by default
+RECRUITER_ROLE = "recruiter"  # May rank candidates' resumes against jobs
+ADMIN_ROLE = "admin"  # Everything a recruiter may do, plus candidates' user/profile ids and filenames
+
+
 class UserBase(BaseModel):
     email: EmailStr
     name: str
@@ -45,6 +50,7 @@ class UserInDB(UserBase):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     last_login: Optional[datetime] = None
+    roles: List[str] = []
     hashed_password: str
     
     model_config = {
@@ -62,6 +68,7 @@ class User(UserBase):
     id: str = Field(alias="_id")
     created_at: datetime
     last_login: Optional[datetime] = None
+    roles: List[str] = []
     
     model_config = {
         "json_encoders": {ObjectId: str},
@@ -0,0 +1,81 @@
+"""
+Benchmark the local ATS scoring engine.
+
+Scores synthetic resumes against synthetic job descriptions one pair at a
+time (what /ats/analyze does) and one resume against a whole keyword matrix
+of jobs at once, and reports throughput in pairs/sec for both.
+
+    python -m app.scripts.benchmark_ats_engine --jobs 2000 --resumes 20
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Add the parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from app.services.ats_engine import KeywordMatrix, analyze, extract_keywords
+from app.services.skill_matcher import COMMON_SKILLS
+
+FILLER_WORDS = (
+    "we are looking for an engineer to join our team and build scalable services "
+    "you will collaborate with product design and data partners to deliver features "
+    "experience with modern tooling testing and code review is expected benefits include "
+    "remote work health insurance and a learning budget distributed systems observability "
+    "event driven architecture payments platform customer facing mentoring on call"
+).split()
+
+def make_texts(count: int, length: int, seed: int) -> list:
+    """Build texts of ~length characters with a handful of skill mentions"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        words = []
+        while sum(len(w) + 1 for w in words) < length:
+            if rng.random() < 0.08:
+                words.append(rng.choice(COMMON_SKILLS))
+            else:
+                words.append(rng.choice(FILLER_WORDS))
+        texts.append(" ".join(words))
+    return texts
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ATS scoring throughput")
+    parser.add_argument("--jobs", type=int, default=2000, help="Number of job descriptions")
+    parser.add_argument("--resumes", type=int, default=20, help="Number of resumes")
+    args = parser.parse_args()
+
+    descriptions = make_texts(args.jobs, 1000, seed=42)
+    resumes = make_texts(args.resumes, 4000, seed=7)
+
+    pairs = min(len(descriptions), 500)
+    started = time.perf_counter()
+    for description in descriptions[:pairs]:
+        analyze(resumes[0], description)
+    elapsed = time.perf_counter() - started
+    logger.info(f"{'single pair':<18} {pairs} pairs in {elapsed:.3f}s -> {pairs / elapsed:,.0f} pairs/sec")
+
+    started = time.perf_counter()
+    matrix = KeywordMatrix([extract_keywords(description) for description in descriptions])
+    logger.info(f"{'matrix build':<18} {len(descriptions)} jobs, {len(matrix.keys)} keywords in {time.perf_counter() - started:.3f}s")
+
+    started = time.perf_counter()
+    for resume in resumes:
+        matrix.score(resume)
+    elapsed = time.perf_counter() - started
+    pairs = len(resumes) * len(descriptions)
+    logger.info(f"{'matrix scoring':<18} {pairs} pairs in {elapsed:.3f}s -> {pairs / elapsed:,.0f} pairs/sec")
+
+if __name__ == "__main__":
+    main()
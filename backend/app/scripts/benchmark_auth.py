@@ -0,0 +1,99 @@
+"""
+Benchmark per-request authentication overhead.
+
+Creates a throwaway user in the configured database, issues a token and
+times the auth dependency three ways: the original lookup (decode, full
+UserInDB load, rebuild User), the cached lookup, and trusting the signed
+claims. The user is deleted afterwards.
+
+    python -m app.scripts.benchmark_auth --requests 2000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Add the parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from jose import jwt
+
+from app.core.config import settings
+from app.db.mongodb import connect_to_mongo, close_mongo_connection, get_database
+from app.models.user import User
+from app.services import user_service
+from app.api.endpoints.auth import get_current_user, get_current_user_claims
+
+async def uncached_lookup(token: str) -> User:
+    """get_current_user as it was before the user cache"""
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    user = await user_service.get_user_by_id(payload["sub"])
+    return User(
+        _id=str(user.id),
+        email=user.email,
+        name=user.name,
+        created_at=user.created_at,
+        last_login=user.last_login
+    )
+
+async def time_requests(label: str, dependency, token: str, requests: int) -> None:
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        await dependency(token)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    timings.sort()
+    logger.info(
+        f"{label:>10}: median {timings[len(timings) // 2]:.0f} us, "
+        f"p95 {timings[int(len(timings) * 0.95) - 1]:.0f} us per request"
+    )
+
+async def run(requests: int) -> None:
+    await connect_to_mongo()
+    db = get_database()
+    created_at = datetime.utcnow()
+    result = await db["users"].insert_one({
+        "email": f"auth-benchmark-{uuid.uuid4().hex[:8]}@example.com",
+        "name": "Auth Benchmark",
+        "hashed_password": "unused",
+        "created_at": created_at
+    })
+    user_id = str(result.inserted_id)
+    try:
+        user = await user_service.get_user_by_id(user_id)
+        token = user_service.create_access_token({
+            "sub": user_id,
+            "email": user.email,
+            "name": user.name,
+            "created_at": user.created_at.isoformat()
+        })
+
+        await time_requests("uncached", uncached_lookup, token, requests)
+        await time_requests("cached", get_current_user, token, requests)
+        settings.AUTH_TRUST_TOKEN_CLAIMS = True
+        await time_requests("claims", get_current_user_claims, token, requests)
+    finally:
+        await db["users"].delete_one({"_id": result.inserted_id})
+        user_service.invalidate_cached_user(user_id)
+        await close_mongo_connection()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the auth dependency")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per variant")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark recommendation lookups on the job skill index.
+
+Builds an in-memory index over synthetic jobs (no database needed) with skills
+drawn from the shared skill dictionary, then times top-k queries for random
+user skill sets.
+
+    python -m app.scripts.benchmark_job_skill_index --jobs 1000000
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Add the parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from app.services.skill_matcher import COMMON_SKILLS
+from app.services.job_skill_index import JobSkillIndex
+from app.services.skill_taxonomy import skill_ids
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark job skill index lookups")
+    parser.add_argument("--jobs", type=int, default=1_000_000, help="Number of synthetic jobs")
+    parser.add_argument("--queries", type=int, default=50, help="Number of recommendation queries")
+    parser.add_argument("--user-skills", type=int, default=12, help="Skills per simulated user")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    # Skew popularity so common skills have long posting lists, as in real postings
+    weights = [1.0 / (rank + 1) for rank in range(len(COMMON_SKILLS))]
+
+    index = JobSkillIndex(snapshot_path=os.devnull)
+    started = time.perf_counter()
+    for job_number in range(args.jobs):
+        skills = set(rng.choices(COMMON_SKILLS, weights=weights, k=rng.randint(3, 10)))
+        index.add(f"job-{job_number}", skill_ids(skills))
+    logger.info(f"Indexed {len(index):,} jobs in {time.perf_counter() - started:.1f}s")
+
+    timings = []
+    for _ in range(args.queries):
+        user_skills = rng.sample(COMMON_SKILLS, args.user_skills)
+        started = time.perf_counter()
+        index.top_k(skill_ids(user_skills), args.limit)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    logger.info(
+        f"top_k over {len(index):,} jobs: median {timings[len(timings) // 2]:.1f} ms, "
+        f"p95 {timings[int(len(timings) * 0.95) - 1]:.1f} ms, max {timings[-1]:.1f} ms"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark the shared LLM client offline.
+
+Runs the client against its fake backend (fixed latency, deterministic
+responses) and reports throughput and latency percentiles for a burst of
+concurrent calls, so concurrency limits and deadlines can be tuned without
+calling Gemini.
+
+    python -m app.scripts.benchmark_llm_client --calls 200 --latency 0.5 --max-concurrency 8
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Add the parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services import llm_client
+
+async def run(args):
+    features = args.features.split(",")
+
+    async def call(number: int):
+        started = time.perf_counter()
+        try:
+            await llm_client.generate(f"prompt {number}", feature=features[number % len(features)], timeout=args.timeout)
+            return time.perf_counter() - started
+        except llm_client.LLMTimeout:
+            return None
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(call(number) for number in range(args.calls)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(result for result in results if result is not None)
+    timeouts = len(results) - len(latencies)
+    logger.info(f"{args.calls} calls in {elapsed:.2f}s ({args.calls / elapsed:.1f} calls/s), {timeouts} timed out")
+    if latencies:
+        logger.info(
+            f"latency: median {latencies[len(latencies) // 2]:.2f}s, "
+            f"p95 {latencies[max(int(len(latencies) * 0.95) - 1, 0)]:.2f}s, max {latencies[-1]:.2f}s"
+        )
+    for name, value in metrics.snapshot().items():
+        if name.startswith("llm.") and name.endswith((".count", ".seconds_max", ".timeout")):
+            logger.info(f"{name}: {value:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LLM client with the fake backend")
+    parser.add_argument("--calls", type=int, default=200, help="Concurrent calls to issue")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake backend latency in seconds")
+    parser.add_argument("--max-concurrency", type=int, default=settings.LLM_MAX_CONCURRENCY)
+    parser.add_argument("--features", default="skill_analysis,job_matching,resume_optimization",
+                        help="Comma-separated features to spread the calls over")
+    parser.add_argument("--timeout", type=float, default=settings.LLM_TIMEOUT_SECONDS, help="Per-call deadline")
+    args = parser.parse_args()
+
+    settings.LLM_BACKEND = "fake"
+    settings.LLM_FAKE_LATENCY_SECONDS = args.latency
+    settings.LLM_MAX_CONCURRENCY = args.max_concurrency
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
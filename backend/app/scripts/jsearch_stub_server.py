@@ -0,0 +1,128 @@
+"""
+Local stub of the JSearch API that replays recorded payloads.
+
+Serves `page_<n>.json` files from a fixtures directory for `GET /search?page=<n>`
+so fetch_jobs can be exercised offline. Point the backend at it with:
+
+    python -m app.scripts.jsearch_stub_server --port 8765
+    JSEARCH_API_URL=http://127.0.0.1:8765/search uvicorn app.main:app
+
+Use --latency and --fail-rate to exercise the client's concurrency, timeouts
+and retry handling. Run with --self-test to fetch a few pages through the real
+client against a freshly started stub.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Add the parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+DEFAULT_FIXTURES_DIR = os.path.join(parent_dir, "data", "jsearch_fixtures")
+
+def load_fixtures(fixtures_dir: str) -> dict:
+    """Load recorded payloads keyed by page number"""
+    pages = {}
+    for name in sorted(os.listdir(fixtures_dir)):
+        if name.startswith("page_") and name.endswith(".json"):
+            page = int(name[len("page_"):-len(".json")])
+            with open(os.path.join(fixtures_dir, name), "r", encoding="utf-8") as f:
+                pages[page] = json.load(f)
+    return pages
+
+def make_handler(pages: dict, latency: float, fail_rate: float):
+    class JSearchStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/search":
+                self.send_error(404)
+                return
+
+            time.sleep(latency)
+            if random.random() < fail_rate:
+                self.send_response(503)
+                self.send_header("Retry-After", "0.1")
+                self.end_headers()
+                return
+
+            page = int(parse_qs(url.query).get("page", ["1"])[0])
+            payload = pages.get(page, {"status": "OK", "data": []})
+            body = json.dumps(payload).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return JSearchStubHandler
+
+def start_server(port: int, fixtures_dir: str, latency: float = 0.0, fail_rate: float = 0.0) -> ThreadingHTTPServer:
+    """Start the stub server on a background thread"""
+    pages = load_fixtures(fixtures_dir)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(pages, latency, fail_rate))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"JSearch stub serving {len(pages)} recorded pages on http://127.0.0.1:{server.server_port}/search")
+    return server
+
+async def self_test(server: ThreadingHTTPServer, max_pages: int):
+    """Fetch pages through the real client and report timings"""
+    from app.services.jsearch_client import JSearchClient
+
+    client = JSearchClient(
+        api_url=f"http://127.0.0.1:{server.server_port}/search",
+        api_key="stub",
+        rate_limit=50,
+        rate_burst=max_pages,
+        backoff=0.05
+    )
+    try:
+        started = time.perf_counter()
+        pages = await client.search("python developer", max_pages=max_pages)
+        elapsed = time.perf_counter() - started
+        logger.info(f"Fetched {sum(len(p) for p in pages)} jobs across {len(pages)} pages in {elapsed:.3f}s")
+    finally:
+        await client.aclose()
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded JSearch payloads locally")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR, help="Directory of page_<n>.json files")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to delay each response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--self-test", action="store_true", help="Run the client against the stub and exit")
+    parser.add_argument("--pages", type=int, default=4, help="Pages to fetch in --self-test mode")
+    args = parser.parse_args()
+
+    server = start_server(0 if args.self_test else args.port, args.fixtures, args.latency, args.fail_rate)
+    try:
+        if args.self_test:
+            asyncio.run(self_test(server, args.pages))
+        else:
+            threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import hashlib
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from bson import Binary
+
+from ..core.config import settings
+from ..core.metrics import metrics
+from ..db.mongodb import get_database
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+ARTIFACTS_COLLECTION = "artifacts"
+
+ARTIFACT_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+class ArtifactTooLarge(Exception):
+    """The artifact is bigger than ARTIFACT_MAX_BYTES"""
+
+def artifact_id_for(content: bytes) -> str:
+    """Content address of an artifact: the hex sha256 of its bytes"""
+    return hashlib.sha256(content).hexdigest()
+
+async def put_artifact(content: bytes, filename: str, content_type: str) -> str:
+    """
+    Store a generated file under its content hash
+
+    Storing the same bytes again only refreshes the existing entry. Artifacts
+    are kept inline in the artifacts collection rather than GridFS so a TTL
+    index on last_used_at (app/db/indexes.py) can expire them, which GridFS
+    chunks cannot do.
+
+    Args:
+        content: File content
+        filename: Name the file was first stored under
+        content_type: MIME type served on download
+
+    Returns:
+        The artifact ID
+
+    Raises:
+        ArtifactTooLarge: The content exceeds ARTIFACT_MAX_BYTES
+    """
+    if len(content) > settings.ARTIFACT_MAX_BYTES:
+        raise ArtifactTooLarge(f"Artifact of {len(content):,} bytes exceeds {settings.ARTIFACT_MAX_BYTES:,}")
+
+    artifact_id = artifact_id_for(content)
+    db = get_database()
+    now = datetime.utcnow()
+    result = await db[ARTIFACTS_COLLECTION].update_one(
+        {"_id": artifact_id},
+        {
+            "$set": {"last_used_at": now},
+            "$setOnInsert": {
+                "content": Binary(content),
+                "length": len(content),
+                "filename": filename,
+                "content_type": content_type,
+                "created_at": now
+            }
+        },
+        upsert=True
+    )
+    metrics.increment("artifacts.stored" if result.upserted_id else "artifacts.deduplicated")
+    return artifact_id
+
+async def get_artifact(artifact_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Load an artifact and mark it as recently used
+
+    Args:
+        artifact_id: ID returned by put_artifact
+
+    Returns:
+        Dict with content, filename, content_type and length, or None if it
+        does not exist or has expired
+    """
+    if not ARTIFACT_ID_PATTERN.match(artifact_id or ""):
+        return None
+
+    db = get_database()
+    doc = await db[ARTIFACTS_COLLECTION].find_one_and_update(
+        {"_id": artifact_id},
+        {"$set": {"last_used_at": datetime.utcnow()}},
+        projection={"content": 1, "filename": 1, "content_type": 1, "length": 1}
+    )
+    if not doc:
+        return None
+
+    doc["content"] = bytes(doc["content"])
+    return doc
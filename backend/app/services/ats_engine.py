@@ -0,0 +1,468 @@
+import math
+import logging
+from collections import Counter
+from functools import lru_cache
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..core.config import settings
+from ..models.job import Job
+from .job_search_index import get_job_search_index, tokenize
+from .skill_matcher import SOFT_SKILLS, common_skill_matcher, get_user_skill_matcher
+from .skill_taxonomy import normalize_skill
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Keyword weights: skills the caller says are required, hard skills the
+# description mentions, soft skills, and the best-scoring plain term
+REQUIRED_SKILL_WEIGHT = 3.0
+MENTIONED_SKILL_WEIGHT = 2.0
+SOFT_SKILL_WEIGHT = 0.75
+TERM_WEIGHT = 1.0
+
+# Plain terms taken from a description besides its skills
+MAX_TERM_KEYWORDS = 15
+
+# Two-word terms rank above single words with the same frequency and idf
+BIGRAM_BOOST = 1.5
+
+# The job search index only supplies idf once it holds this many jobs
+MIN_IDF_JOBS = 50
+
+# Share of the score from skill coverage; the rest comes from plain terms
+SKILL_SHARE = 0.65
+
+# Credit for a keyword appearing at all; further occurrences add up to the
+# rest with BM25 saturation, normalized by resume length
+PRESENCE_CREDIT = 0.7
+K1 = 1.2
+B = 0.75
+AVERAGE_RESUME_TOKENS = 500.0
+
+# Resumes with less text than this are flagged as too thin to rank well
+MIN_RESUME_TOKENS = 150
+
+STOPWORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can could do does
+during each either etc for from had has have having he her here his how i if in into is it its just
+may me more most must my no not of off on one only or other our out over own per same she should so
+some such than that the their them then there these they this those through to too under until up
+us very via was we were what when where which while who whom why will with within without would you
+your yours
+
+ability able apply applicant applicants benefits bonus candidate candidates career company day days
+description duties employer employment environment equal excellent experience experienced familiarity
+familiar full good great help highly ideal including job join knowledge looking make new offer
+opportunity opportunities part plus position preferred proven qualifications related required
+requirement requirements responsibilities responsible role salary skills strong successful support
+team teams time understanding using use well work working world year years
+""".split())
+
+@dataclass
+class Keyword:
+    """A weighted keyword the engine looks for in a resume"""
+    name: str
+    key: str
+    weight: float
+    skill: bool
+
+@dataclass
+class KeywordResult:
+    """How a resume did on one keyword"""
+    name: str
+    found: bool
+    weight: float
+    skill: bool
+    count: int
+
+@dataclass
+class ATSResult:
+    """Score of one resume against one job"""
+    score: float
+    skill_coverage: float
+    keyword_coverage: float
+    keywords: List[KeywordResult] = field(default_factory=list)
+    suggestions: List[Dict[str, str]] = field(default_factory=list)
+
+    @property
+    def missing(self) -> List[KeywordResult]:
+        """Missing keywords, most important first"""
+        return [keyword for keyword in self.keywords if not keyword.found]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Response shape of /ats/analyze"""
+        return {
+            "score": self.score,
+            "skillCoverage": self.skill_coverage,
+            "keywordCoverage": self.keyword_coverage,
+            "suggestions": self.suggestions,
+            "keywordAnalysis": [
+                {
+                    "name": keyword.name,
+                    "found": keyword.found,
+                    "weight": keyword.weight,
+                    "isSkill": keyword.skill,
+                    "count": keyword.count
+                }
+                for keyword in self.keywords
+            ]
+        }
+
+def _skill_key(skill: str) -> str:
+    return "skill:" + normalize_skill(skill)
+
+def _usable_term(token: str) -> bool:
+    return len(token) > 1 and token[0].isalpha() and token not in STOPWORDS
+
+def _idf_lookup() -> Callable[[str], float]:
+    """idf over the job corpus when the search index is loaded, else a constant"""
+    index = get_job_search_index()
+    if index.loaded and len(index) >= MIN_IDF_JOBS:
+        return index.idf
+    return lambda term: 1.0
+
+def _idf_generation() -> int:
+    """
+    Which idf weights extract_keywords currently uses: 0 for the flat
+    fallback, else the bit length of the corpus size, so cached keywords are
+    recomputed once the index loads and each time the corpus doubles
+    """
+    index = get_job_search_index()
+    if index.loaded and len(index) >= MIN_IDF_JOBS:
+        return len(index).bit_length()
+    return 0
+
+def extract_keywords(
+    job_description: str,
+    required_skills: Optional[Iterable[str]] = None,
+    max_terms: int = MAX_TERM_KEYWORDS
+) -> List[Keyword]:
+    """
+    Pick the weighted keywords a resume is scored on for a job
+
+    Skills come from the caller and from the skill dictionary; plain terms
+    are the description's words and two-word phrases ranked by frequency
+    times their idf over the indexed jobs, so wording every posting uses
+    ranks below wording specific to this one.
+
+    Args:
+        job_description: Job description
+        required_skills: Skills the job lists as required
+        max_terms: Most plain terms to keep
+
+    Returns:
+        Keywords, highest weight first
+    """
+    keywords: Dict[str, Keyword] = {}
+    for skill in required_skills or []:
+        skill = (skill or "").strip()
+        if skill:
+            keywords.setdefault(_skill_key(skill), Keyword(skill, _skill_key(skill), REQUIRED_SKILL_WEIGHT, True))
+
+    for skill, hit in common_skill_matcher.scan(job_description).items():
+        base = SOFT_SKILL_WEIGHT if skill in SOFT_SKILLS else MENTIONED_SKILL_WEIGHT
+        weight = round(base * (1.0 + 0.25 * math.log(hit.count)), 3)
+        keywords.setdefault(_skill_key(skill), Keyword(skill, _skill_key(skill), weight, True))
+
+    # Words already covered by a skill keyword are not counted again as terms
+    skill_tokens = {token for keyword in keywords.values() for token in tokenize(keyword.name)}
+    tokens = tokenize(job_description)
+    usable = [_usable_term(token) and token not in skill_tokens for token in tokens]
+
+    counts: Counter = Counter(token for token, ok in zip(tokens, usable) if ok)
+    bigrams: Counter = Counter(
+        tokens[i] + " " + tokens[i + 1] for i in range(len(tokens) - 1) if usable[i] and usable[i + 1]
+    )
+    # A two-word phrase seen once is usually an accident of the sentence, and
+    # a word that only ever appears inside a kept phrase adds nothing to it
+    phrases = {bigram: count for bigram, count in bigrams.items() if count > 1}
+    for bigram, count in phrases.items():
+        for word in bigram.split(" "):
+            if counts.get(word, 0) <= count:
+                counts.pop(word, None)
+    counts.update(phrases)
+
+    idf = _idf_lookup()
+    ranked: List[Tuple[float, str]] = []
+    for term, count in counts.items():
+        words = term.split(" ")
+        term_idf = sum(idf(word) for word in words) / len(words)
+        boost = BIGRAM_BOOST if len(words) > 1 else 1.0
+        ranked.append(((1.0 + math.log(count)) * term_idf * boost, term))
+    ranked.sort(key=lambda item: (-item[0], item[1]))
+
+    if ranked:
+        top = ranked[0][0]
+        for score, term in ranked[:max_terms]:
+            key = "term:" + term
+            keywords[key] = Keyword(term, key, round(TERM_WEIGHT * score / top, 3), False)
+
+    return sorted(keywords.values(), key=lambda keyword: (-keyword.weight, keyword.name))
+
+def keyword_credit(found: np.ndarray, length: Any) -> np.ndarray:
+    """
+    Credit 0-1 for keyword counts in resumes of the given token length(s)
+
+    Presence earns PRESENCE_CREDIT; repetition earns the rest with BM25
+    saturation, so a long resume needs more mentions for the same credit.
+    """
+    norm = K1 * (1.0 - B + B * np.asarray(length, dtype=np.float32) / AVERAGE_RESUME_TOKENS)
+    return np.where(found > 0, PRESENCE_CREDIT + (1.0 - PRESENCE_CREDIT) * found / (found + norm), 0.0)
+
+def blend_scores(
+    skill_earned: np.ndarray,
+    term_earned: np.ndarray,
+    skill_totals: Any,
+    term_totals: Any
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Combine earned keyword weight into scores
+
+    Returns:
+        (score 0-100, skill coverage 0-1, term coverage 0-1)
+    """
+    skill_totals = np.broadcast_to(np.asarray(skill_totals, dtype=np.float64), skill_earned.shape)
+    term_totals = np.broadcast_to(np.asarray(term_totals, dtype=np.float64), term_earned.shape)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        skill_coverage = np.where(skill_totals > 0, skill_earned / skill_totals, np.nan)
+        term_coverage = np.where(term_totals > 0, term_earned / term_totals, np.nan)
+
+    # Jobs without skills or without terms are scored on what they have
+    skill_share = np.where(np.isnan(term_coverage), 1.0, np.where(np.isnan(skill_coverage), 0.0, SKILL_SHARE))
+    scores = 100.0 * (
+        skill_share * np.nan_to_num(skill_coverage) + (1.0 - skill_share) * np.nan_to_num(term_coverage)
+    )
+    return scores, np.nan_to_num(skill_coverage), np.nan_to_num(term_coverage)
+
+def score_candidates(
+    keywords: Sequence[Keyword],
+    counts: np.ndarray,
+    lengths: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Score many resumes against one job's keywords
+
+    Args:
+        keywords: Keywords of the job
+        counts: Keyword counts, one row per resume and one column per keyword
+        lengths: Token length of each resume
+
+    Returns:
+        (score 0-100, skill coverage 0-1, term coverage 0-1), one entry per resume
+    """
+    weights = np.array([keyword.weight for keyword in keywords], dtype=np.float32)
+    is_skill = np.array([keyword.skill for keyword in keywords], dtype=bool)
+    credit = keyword_credit(counts, lengths[:, None])
+    skill_weights = np.where(is_skill, weights, 0.0)
+    return blend_scores(
+        credit @ skill_weights,
+        credit @ (weights - skill_weights),
+        skill_weights.sum(),
+        (weights - skill_weights).sum()
+    )
+
+class KeywordMatrix:
+    """
+    Sparse job-by-keyword weight matrix.
+
+    Keywords of every job share one column space, stored as (row, column,
+    weight) triplets. A resume is read once into a count per column; scoring
+    it against all rows is then a gather and a weighted np.bincount, so one
+    resume against hundreds of jobs costs little more than against one.
+    """
+
+    def __init__(self, keyword_lists: Sequence[Sequence[Keyword]]):
+        columns: Dict[str, int] = {}
+        self.keys: List[str] = []
+        self.names: List[str] = []
+        rows, cols, weights = [], [], []
+        for row, keywords in enumerate(keyword_lists):
+            for keyword in keywords:
+                col = columns.get(keyword.key)
+                if col is None:
+                    col = columns[keyword.key] = len(self.keys)
+                    self.keys.append(keyword.key)
+                    self.names.append(keyword.name)
+                rows.append(row)
+                cols.append(col)
+                weights.append(keyword.weight)
+
+        self.size = len(keyword_lists)
+        self.rows = np.array(rows, dtype=np.int32)
+        self.cols = np.array(cols, dtype=np.int32)
+        self.weights = np.array(weights, dtype=np.float32)
+        self.column_is_skill = np.array([key.startswith("skill:") for key in self.keys], dtype=bool)
+        self.is_skill = self.column_is_skill[self.cols]
+
+        skill_weights = np.where(self.is_skill, self.weights, 0.0)
+        self.skill_totals = np.bincount(self.rows, skill_weights, minlength=self.size)
+        self.term_totals = np.bincount(self.rows, self.weights - skill_weights, minlength=self.size)
+        # Row boundaries, for reading one job's keywords back out
+        self.offsets = np.searchsorted(self.rows, np.arange(self.size + 1))
+
+        self._skill_columns = {
+            key: col for col, key in enumerate(self.keys) if self.column_is_skill[col]
+        }
+        # Dictionary skills are found with the shared precompiled matcher; only
+        # skills outside it need a matcher of their own (cached by name tuple)
+        extra_skills = sorted({
+            self.names[col] for col in self._skill_columns.values() if self.names[col] not in common_skill_matcher
+        })
+        self._skill_matchers = [common_skill_matcher]
+        if extra_skills:
+            self._skill_matchers.append(get_user_skill_matcher(tuple(extra_skills)))
+        self._term_columns = {
+            key[len("term:"):]: col for col, key in enumerate(self.keys) if not self.column_is_skill[col]
+        }
+        self._phrase_starts = {term.split(" ")[0] for term in self._term_columns if " " in term}
+
+    def resume_counts(self, resume_text: str) -> Tuple[np.ndarray, int]:
+        """
+        Count each column's keyword in a resume
+
+        Returns:
+            (counts per column, number of tokens in the resume)
+        """
+        counts = np.zeros(len(self.keys), dtype=np.float32)
+        # The skill matchers also find skills tokenize() splits, such as ci/cd or tailwind css
+        for matcher in self._skill_matchers:
+            for skill, hit in matcher.scan(resume_text).items():
+                col = self._skill_columns.get(_skill_key(skill))
+                if col is not None:
+                    counts[col] = max(counts[col], hit.count)
+
+        tokens = tokenize(resume_text)
+        if self._term_columns:
+            grams = Counter(tokens)
+            if self._phrase_starts:
+                starts = self._phrase_starts
+                grams.update(tokens[i] + " " + tokens[i + 1] for i in range(len(tokens) - 1) if tokens[i] in starts)
+            for term, col in self._term_columns.items():
+                counts[col] = grams.get(term, 0)
+        return counts, len(tokens)
+
+    def score_counts(self, counts: np.ndarray, length: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Score resume keyword counts against every row
+
+        Returns:
+            (score 0-100, skill coverage 0-1, term coverage 0-1, count per triplet)
+        """
+        found = counts[self.cols]
+        earned = self.weights * keyword_credit(found, length)
+        skill_earned = np.bincount(self.rows, np.where(self.is_skill, earned, 0.0), minlength=self.size)
+        term_earned = np.bincount(self.rows, np.where(self.is_skill, 0.0, earned), minlength=self.size)
+        scores, skill_coverage, term_coverage = blend_scores(
+            skill_earned, term_earned, self.skill_totals, self.term_totals
+        )
+        return scores, skill_coverage, term_coverage, found
+
+    def score(self, resume_text: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Score a resume's text against every row; see score_counts"""
+        counts, length = self.resume_counts(resume_text)
+        return self.score_counts(counts, length)
+
+    def result(self, row: int, scored: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray], resume_length: int) -> ATSResult:
+        """Build the detailed result for one row of a score() call"""
+        scores, skill_coverage, term_coverage, found = scored
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        keywords = [
+            KeywordResult(
+                name=self.names[self.cols[i]],
+                found=bool(found[i] > 0),
+                weight=round(float(self.weights[i]), 3),
+                skill=bool(self.is_skill[i]),
+                count=int(found[i])
+            )
+            for i in range(start, end)
+        ]
+        result = ATSResult(
+            score=round(float(scores[row]), 1),
+            skill_coverage=round(float(skill_coverage[row]), 3),
+            keyword_coverage=round(float(term_coverage[row]), 3),
+            keywords=keywords
+        )
+        result.suggestions = build_suggestions(result, resume_length)
+        return result
+
+def _names(keywords: List[KeywordResult]) -> str:
+    return ", ".join(keyword.name for keyword in keywords)
+
+def build_suggestions(result: ATSResult, resume_length: int) -> List[Dict[str, str]]:
+    """Turn a result into the success/warning messages shown with the score"""
+    suggestions = []
+    if resume_length == 0:
+        return [{"type": "warning", "message": "No text could be read from this resume; upload a text-based PDF or DOCX"}]
+    if resume_length < MIN_RESUME_TOKENS:
+        suggestions.append({"type": "warning", "message": "Your resume has very little text; describe your experience in more detail"})
+
+    missing_skills = [keyword for keyword in result.missing if keyword.skill][:3]
+    missing_terms = [keyword for keyword in result.missing if not keyword.skill][:3]
+    if missing_skills:
+        suggestions.append({
+            "type": "warning",
+            "message": f"The job asks for {_names(missing_skills)}; add them if you have that experience"
+        })
+    if missing_terms:
+        suggestions.append({
+            "type": "warning",
+            "message": f"Use the posting's own terminology where it applies, such as {_names(missing_terms)}"
+        })
+    if any(keyword.skill for keyword in result.keywords) and result.skill_coverage >= 0.8:
+        suggestions.append({"type": "success", "message": "Your resume covers most of the skills in the job description"})
+    if any(not keyword.skill for keyword in result.keywords) and result.keyword_coverage >= 0.6:
+        suggestions.append({"type": "success", "message": "Your resume uses much of the job description's terminology"})
+    return suggestions
+
+@lru_cache(maxsize=settings.ATS_KEYWORD_CACHE_SIZE)
+def _cached_job_keywords(text: str, idf_generation: int) -> Tuple[Keyword, ...]:
+    return tuple(extract_keywords(text))
+
+def job_keywords(job: Job) -> Tuple[Keyword, ...]:
+    """Keywords of a stored job, from its title and description; cached on that text and the idf generation"""
+    return _cached_job_keywords(f"{job.title}\n{job.job_description}", _idf_generation())
+
+def rank_jobs(resume_text: str, jobs: Sequence[Job], limit: Optional[int] = None) -> List[Tuple[Job, ATSResult]]:
+    """
+    Score one resume against many jobs in a single pass
+
+    The jobs' keywords form one KeywordMatrix and the resume is read once,
+    so every job's score comes out of the same sparse product.
+
+    Args:
+        resume_text: Text of the resume
+        jobs: Jobs to score against
+        limit: Only build results for this many of the best jobs
+
+    Returns:
+        (job, result) pairs, best score first, ties broken by job ID
+    """
+    if not jobs:
+        return []
+    matrix = KeywordMatrix([job_keywords(job) for job in jobs])
+    counts, length = matrix.resume_counts(resume_text)
+    scored = matrix.score_counts(counts, length)
+
+    order = sorted(range(len(jobs)), key=lambda row: (-scored[0][row], jobs[row].id))
+    if limit is not None:
+        order = order[:limit]
+    return [(jobs[row], matrix.result(row, scored, length)) for row in order]
+
+def analyze(resume_text: str, job_description: str, required_skills: Optional[Iterable[str]] = None) -> ATSResult:
+    """
+    Score one resume against one job description
+
+    Args:
+        resume_text: Text of the resume
+        job_description: Job description
+        required_skills: Skills the job lists as required
+
+    Returns:
+        ATSResult with the 0-100 score, per-keyword findings and suggestions
+    """
+    matrix = KeywordMatrix([extract_keywords(job_description, required_skills)])
+    counts, length = matrix.resume_counts(resume_text)
+    return matrix.result(0, matrix.score_counts(counts, length), length)
@@ -0,0 +1,422 @@
+import time
+import heapq
+import asyncio
+import logging
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from bson import ObjectId
+
+from ..core.config import settings
+from ..db.mongodb import get_database
+from ..models.job import Job
+from ..models.skill import UserSkill
+from .ats_engine import Keyword, job_keywords, score_candidates
+from .job_search_index import tokenize
+from .skill_matcher import common_skill_matcher
+from .skill_taxonomy import normalize_skill
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+RESUMES_COLLECTION = "resumes"
+USER_SKILLS_COLLECTION = "user_skills"
+
+# user_skills documents read per resumes lookup while catching up
+CATCH_UP_BATCH_SIZE = 200
+
+# Term id placed before every resume so a two-word keyword never spans two of them
+TERM_GAP = 0
+
+def _owner_key(resume_id: str, user_id: Optional[Any], profile_id: Optional[Any]) -> str:
+    """Candidates are users, or profiles, or on their own a resume with neither"""
+    if user_id:
+        return f"user:{user_id}"
+    if profile_id:
+        return f"profile:{profile_id}"
+    return f"resume:{resume_id}"
+
+class CandidateIndex:
+    """
+    Inverted index over every candidate's current resume.
+
+    Each candidate (a user, or a profile) has one entry: the last analyzed
+    resume that is still current. Skills from user_skills and from the skill
+    dictionary run over the resume text keep posting lists of resume numbers
+    with counts; resume words keep the same, and the term ids of all resumes
+    are kept back to back so two-word keywords are counted by adjacency.
+
+    Ranking candidates for a job reads the job's ATS keywords from the
+    posting lists into a resume-by-keyword count matrix, scores it with
+    ats_engine.score_candidates and keeps the best with a top-k heap.
+
+    The index is built from MongoDB on first use, caught up from user_skills
+    by updated_at and updated as skill analysis stores results.
+    """
+
+    def __init__(self):
+        self._resume_ids: List[str] = []
+        self._docnos: Dict[str, int] = {}
+        self._owners: List[str] = []
+        self._owner_docnos: Dict[str, int] = {}
+        self._lengths = np.zeros(1024, dtype=np.float32)
+        self._alive = np.zeros(1024, dtype=bool)
+        # Term ids of all resumes back to back, each preceded by TERM_GAP
+        self._tokens = array("I")
+        self._starts = array("Q")
+        self._skill_postings: Dict[str, Tuple[array, array]] = {}
+        self._terms: Dict[str, int] = {}
+        self._term_postings: List[Tuple[array, array]] = [(array("I"), array("f"))]
+        self._live = 0
+        self._watermark: Optional[datetime] = None
+        # updated_at of the analysis each resume was last indexed from
+        self._updated_at: Dict[str, datetime] = {}
+        self._refreshed_at = 0.0
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return self._live
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def add(self, resume_id: str, owner: str, text: Optional[str], skills: Iterable[str]) -> None:
+        """
+        Index a candidate's current resume, replacing their previous one
+
+        Args:
+            resume_id: ID of the resume
+            owner: Candidate key from _owner_key
+            text: Resume text
+            skills: Skill names stored for the resume by skill analysis
+        """
+        resume_id = str(resume_id)
+        self.remove(resume_id)
+        previous = self._owner_docnos.get(owner)
+        if previous is not None:
+            self.remove(self._resume_ids[previous])
+
+        docno = len(self._resume_ids)
+        self._resume_ids.append(resume_id)
+        self._docnos[resume_id] = docno
+        self._owners.append(owner)
+        self._owner_docnos[owner] = docno
+        if docno >= len(self._lengths):
+            self._lengths = np.resize(self._lengths, len(self._lengths) * 2)
+            self._alive = np.resize(self._alive, len(self._alive) * 2)
+            self._alive[docno:] = False
+
+        tokens = tokenize(text)
+        sequence = np.fromiter(
+            (self._term_id(token) for token in tokens), dtype=np.uint32, count=len(tokens)
+        )
+        self._starts.append(len(self._tokens))
+        self._tokens.append(TERM_GAP)
+        self._tokens.frombytes(sequence.tobytes())
+        self._lengths[docno] = len(tokens)
+        self._alive[docno] = True
+
+        term_ids, term_counts = np.unique(sequence, return_counts=True)
+        for term_id, count in zip(term_ids.tolist(), term_counts.tolist()):
+            docnos, counts = self._term_postings[term_id]
+            docnos.append(docno)
+            counts.append(count)
+
+        skill_counts = {normalize_skill(skill): hit.count for skill, hit in common_skill_matcher.scan(text).items()}
+        # Skills found by analysis count even when the text spells them differently
+        for skill in skills:
+            if skill and skill.strip():
+                key = normalize_skill(skill)
+                skill_counts[key] = max(skill_counts.get(key, 0), 1)
+        for key, count in skill_counts.items():
+            posting = self._skill_postings.get(key)
+            if posting is None:
+                posting = self._skill_postings[key] = (array("I"), array("f"))
+            posting[0].append(docno)
+            posting[1].append(count)
+
+        self._live += 1
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._terms.get(term)
+        if term_id is None:
+            term_id = self._terms[term] = len(self._term_postings)
+            self._term_postings.append((array("I"), array("f")))
+        return term_id
+
+    def remove(self, resume_id: str) -> bool:
+        """
+        Remove a resume from the index
+
+        Its number and terms stay in the posting lists and token store but are
+        masked out; the space is reclaimed when the process restarts.
+
+        Returns:
+            True if the resume was indexed
+        """
+        docno = self._docnos.pop(str(resume_id), None)
+        if docno is None:
+            return False
+        if self._owner_docnos.get(self._owners[docno]) == docno:
+            del self._owner_docnos[self._owners[docno]]
+        self._alive[docno] = False
+        self._live -= 1
+        return True
+
+    def _posting(self, keyword: Keyword) -> Tuple[np.ndarray, np.ndarray]:
+        """Resume numbers containing a keyword, with its count in each"""
+        empty = (np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.float32))
+        if keyword.skill:
+            posting = self._skill_postings.get(keyword.key[len("skill:"):])
+            if posting is None:
+                return empty
+            return np.frombuffer(posting[0], dtype=np.uint32), np.frombuffer(posting[1], dtype=np.float32)
+
+        words = keyword.name.split(" ")
+        term_ids = [self._terms.get(word) for word in words]
+        if any(term_id is None for term_id in term_ids):
+            return empty
+        if len(term_ids) == 1:
+            docnos, counts = self._term_postings[term_ids[0]]
+            return np.frombuffer(docnos, dtype=np.uint32), np.frombuffer(counts, dtype=np.float32)
+
+        # Two-word keyword: find adjacent pairs across all resumes in one pass
+        # and map each back to the resume it starts in
+        first, second = term_ids
+        tokens = np.frombuffer(self._tokens, dtype=np.uint32)
+        positions = np.flatnonzero((tokens[:-1] == first) & (tokens[1:] == second))
+        if not len(positions):
+            return empty
+        owners = np.searchsorted(np.frombuffer(self._starts, dtype=np.uint64), positions, side="right") - 1
+        docnos, counts = np.unique(owners, return_counts=True)
+        return docnos.astype(np.uint32), counts.astype(np.float32)
+
+    def top_k(self, keywords: Sequence[Keyword], k: int = 20) -> List[Tuple[str, float, float, float, np.ndarray]]:
+        """
+        Rank indexed resumes against a job's keywords
+
+        Args:
+            keywords: Keywords of the job, from ats_engine.job_keywords
+            k: Number of resumes to return
+
+        Returns:
+            List of (resume_id, score, skill_coverage, keyword_coverage,
+            keyword counts), best first, ties broken by resume ID
+        """
+        if not keywords or k <= 0 or not self._live:
+            return []
+
+        size = len(self._resume_ids)
+        counts = np.zeros((size, len(keywords)), dtype=np.float32)
+        for col, keyword in enumerate(keywords):
+            docnos, found = self._posting(keyword)
+            counts[docnos, col] = found
+
+        live = np.flatnonzero(self._alive[:size] & (counts.any(axis=1)))
+        if not len(live):
+            return []
+        scores, skill_coverage, term_coverage = score_candidates(keywords, counts[live], self._lengths[live])
+
+        best = heapq.nlargest(k, range(len(live)), key=scores.__getitem__)
+        best.sort(key=lambda i: (-scores[i], self._resume_ids[live[i]]))
+        return [
+            (
+                self._resume_ids[live[i]],
+                float(scores[i]),
+                float(skill_coverage[i]),
+                float(term_coverage[i]),
+                counts[live[i]]
+            )
+            for i in best
+        ]
+
+    async def catch_up(self) -> int:
+        """
+        Index skill analyses stored since the last watermark
+
+        The watermark is moved back by INDEX_WATERMARK_OVERLAP_SECONDS so an
+        analysis stamped before the newest one seen but committed after it is
+        still picked up; analyses already indexed are skipped by their updated_at.
+
+        Returns:
+            Number of user_skills documents read from the database
+        """
+        db = get_database()
+        query = {}
+        if self._watermark:
+            query = {"updated_at": {"$gte": self._watermark - timedelta(seconds=settings.INDEX_WATERMARK_OVERLAP_SECONDS)}}
+        cursor = db[USER_SKILLS_COLLECTION].find(
+            query, {"resume_id": 1, "skills.name": 1, "updated_at": 1}
+        ).sort("updated_at", 1)
+
+        count = 0
+        batch: List[Dict[str, Any]] = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= CATCH_UP_BATCH_SIZE:
+                await self._index_batch(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            await self._index_batch(batch)
+            count += len(batch)
+
+        self._refreshed_at = time.monotonic()
+        return count
+
+    async def _index_batch(self, docs: List[Dict[str, Any]]) -> None:
+        for doc in docs:
+            updated_at = doc.get("updated_at")
+            if updated_at and (self._watermark is None or updated_at > self._watermark):
+                self._watermark = updated_at
+        docs = [doc for doc in docs if self._is_newer(doc)]
+        if not docs:
+            return
+
+        db = get_database()
+        resume_ids = [doc["resume_id"] for doc in docs if doc.get("resume_id")]
+        resumes = {}
+        async for resume in db[RESUMES_COLLECTION].find(
+            {"_id": {"$in": resume_ids}, "is_current": True},
+            {"user_id": 1, "profile_id": 1, "parsed_content.text": 1}
+        ):
+            resumes[resume["_id"]] = resume
+
+        for doc in docs:
+            resume_id = doc.get("resume_id")
+            resume = resumes.get(resume_id)
+            if resume is None:
+                # Deleted, or no longer the candidate's current resume
+                self.remove(str(resume_id))
+            else:
+                self.add(
+                    str(resume_id),
+                    _owner_key(str(resume_id), resume.get("user_id"), resume.get("profile_id")),
+                    (resume.get("parsed_content") or {}).get("text"),
+                    [skill.get("name", "") for skill in doc.get("skills") or []]
+                )
+
+    def _is_newer(self, doc: Dict[str, Any]) -> bool:
+        """Whether an analysis is newer than the one its resume was indexed from; records it"""
+        resume_id = str(doc.get("resume_id"))
+        updated_at = doc.get("updated_at")
+        indexed_at = self._updated_at.get(resume_id)
+        if updated_at is None:
+            return indexed_at is None
+        if indexed_at is not None and updated_at <= indexed_at:
+            return False
+        self._updated_at[resume_id] = updated_at
+        return True
+
+    async def ensure_loaded(self) -> None:
+        """Build the index once, and keep up with analyses stored by other workers"""
+        if self._loaded and time.monotonic() - self._refreshed_at < settings.CANDIDATE_INDEX_REFRESH_SECONDS:
+            return
+
+        async with self._lock:
+            if not self._loaded:
+                started = time.perf_counter()
+                read = await self.catch_up()
+                self._loaded = True
+                logger.info(
+                    f"Candidate index ready with {len(self)} resumes ({read} analyses read) "
+                    f"in {time.perf_counter() - started:.2f}s"
+                )
+            elif time.monotonic() - self._refreshed_at >= settings.CANDIDATE_INDEX_REFRESH_SECONDS:
+                await self.catch_up()
+
+_candidate_index: Optional[CandidateIndex] = None
+
+def get_candidate_index() -> CandidateIndex:
+    """Get the process-wide candidate index"""
+    global _candidate_index
+    if _candidate_index is None:
+        _candidate_index = CandidateIndex()
+    return _candidate_index
+
+async def index_analyzed_resume(user_skill: UserSkill, resume_text: str) -> None:
+    """
+    Update the candidate index after skill analysis stores a resume's skills
+
+    Only loaded indexes are updated; an index built later reads the stored
+    analysis itself.
+    """
+    index = get_candidate_index()
+    if not index.loaded:
+        return
+
+    db = get_database()
+    resume = await db[RESUMES_COLLECTION].find_one(
+        {"_id": ObjectId(user_skill.resume_id)}, {"is_current": 1, "user_id": 1, "profile_id": 1}
+    )
+    if not resume or not resume.get("is_current"):
+        index.remove(user_skill.resume_id)
+        return
+    index.add(
+        user_skill.resume_id,
+        _owner_key(user_skill.resume_id, resume.get("user_id"), resume.get("profile_id")),
+        resume_text,
+        [skill.name for skill in user_skill.skills]
+    )
+
+async def rank_candidates(job: Job, limit: int = 20, include_identity: bool = False) -> List[Dict[str, Any]]:
+    """
+    Rank every candidate's current resume against a job
+
+    Args:
+        job: The job
+        limit: Number of candidates to return
+        include_identity: Also return each candidate's user and profile ids
+            and resume filename (admins only)
+
+    Returns:
+        Candidates best first, with their score and the job keywords their
+        resume is missing
+    """
+    index = get_candidate_index()
+    await index.ensure_loaded()
+
+    keywords = job_keywords(job)
+    # Ask for a few extra in case other workers changed resumes since the last catch-up
+    ranked = index.top_k(keywords, limit + max(limit // 4, 5))
+    if not ranked:
+        return []
+
+    db = get_database()
+    current = {}
+    async for resume in db[RESUMES_COLLECTION].find(
+        {"_id": {"$in": [ObjectId(resume_id) for resume_id, *_ in ranked]}, "is_current": True},
+        {"user_id": 1, "profile_id": 1, "original_filename": 1}
+    ):
+        current[str(resume["_id"])] = resume
+
+    candidates = []
+    for resume_id, score, skill_coverage, keyword_coverage, counts in ranked:
+        resume = current.get(resume_id)
+        if resume is None:
+            index.remove(resume_id)
+            continue
+        candidate = {
+            "resumeId": resume_id,
+            "score": round(score, 1),
+            "skillCoverage": round(skill_coverage, 3),
+            "keywordCoverage": round(keyword_coverage, 3),
+            "missingKeywords": [
+                {"name": keyword.name, "weight": keyword.weight, "isSkill": keyword.skill}
+                for keyword, count in zip(keywords, counts) if count <= 0
+            ]
+        }
+        if include_identity:
+            candidate.update({
+                "userId": str(resume["user_id"]) if resume.get("user_id") else None,
+                "profileId": str(resume["profile_id"]) if resume.get("profile_id") else None,
+                "filename": resume.get("original_filename"),
+            })
+        candidates.append(candidate)
+        if len(candidates) == limit:
+            break
+    return candidates
@@ -0,0 +1,102 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from ..core.config import settings
+from ..db.mongodb import get_database
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+JOBS_COLLECTION = "jobs"
+TOMBSTONES_COLLECTION = "job_tombstones"
+
+def changed_jobs_query(watermark: Optional[datetime]) -> Dict[str, Any]:
+    """
+    Query for the jobs an in-process index has not seen yet
+
+    Jobs are stamped with the server's updated_at whenever they are written.
+    The watermark is moved back by INDEX_WATERMARK_OVERLAP_SECONDS, so a
+    write stamped just before the newest one seen but committed after it is
+    still picked up; re-reading a job is harmless.
+
+    Args:
+        watermark: Latest change time the index has seen, or None for all jobs
+
+    Returns:
+        MongoDB filter on the jobs collection
+    """
+    if watermark is None:
+        return {}
+    return {"updated_at": {"$gte": watermark - timedelta(seconds=settings.INDEX_WATERMARK_OVERLAP_SECONDS)}}
+
+def change_time(doc: Dict[str, Any]) -> Optional[datetime]:
+    """When a job last changed; jobs stored before updated_at existed fall back to fetched_at"""
+    return doc.get("updated_at") or doc.get("fetched_at")
+
+def is_new_change(seen: Dict[str, datetime], job_id: str, doc: Dict[str, Any]) -> bool:
+    """
+    Whether a job read by a catch-up changed since the index last indexed it
+
+    The overlap of changed_jobs_query returns recently changed jobs on every
+    refresh; indexing them again would give them a new number each time, so
+    indexes keep the change time of every job they read and skip repeats.
+
+    Args:
+        seen: Change time by job ID of the jobs the index has read; updated here
+        job_id: ID of the job read
+        doc: The job document (with updated_at/fetched_at)
+
+    Returns:
+        True if the job should be (re)indexed
+    """
+    changed_at = change_time(doc)
+    if changed_at is not None and seen.get(job_id) == changed_at:
+        return False
+    seen[job_id] = changed_at
+    return True
+
+def later(watermark: Optional[datetime], value: Optional[datetime]) -> Optional[datetime]:
+    """Advance a watermark to value if it is newer"""
+    if value is not None and (watermark is None or value > watermark):
+        return value
+    return watermark
+
+async def record_removed_jobs(job_ids: List[str]) -> None:
+    """
+    Leave a tombstone for each removed job so other workers drop it from their indexes
+
+    Tombstones expire after JOB_TOMBSTONE_TTL_SECONDS; a worker whose index
+    is older than that keeps the removed jobs, which searches skip because
+    their documents are gone.
+    """
+    if not job_ids:
+        return
+    db = get_database()
+    await db[TOMBSTONES_COLLECTION].bulk_write(
+        [UpdateOne({"_id": str(job_id)}, {"$currentDate": {"deleted_at": True}}, upsert=True) for job_id in job_ids],
+        ordered=False
+    )
+
+async def removed_jobs_since(watermark: Optional[datetime]) -> Tuple[List[str], Optional[datetime]]:
+    """
+    Jobs removed since a watermark (with the same overlap as changed_jobs_query)
+
+    Args:
+        watermark: Latest change time the index has seen; None means the
+            index was just built from the collection and has nothing to drop
+
+    Returns:
+        IDs of the removed jobs and the latest removal time among them
+    """
+    if watermark is None:
+        return [], None
+    db = get_database()
+    since = watermark - timedelta(seconds=settings.INDEX_WATERMARK_OVERLAP_SECONDS)
+    job_ids, latest = [], None
+    async for doc in db[TOMBSTONES_COLLECTION].find({"deleted_at": {"$gte": since}}):
+        job_ids.append(doc["_id"])
+        latest = later(latest, doc.get("deleted_at"))
+    return job_ids, latest
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+
+from pymongo import UpdateOne
+
+from ..core.config import settings
+from ..core.metrics import metrics
+from ..db.mongodb import get_database
+from .skill_taxonomy import skill_ids
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+CACHE_COLLECTION = "job_match_cache"
+
+# Fields of a Gemini job match that are cached
+MATCH_FIELDS = ("match_score", "matching_skills", "missing_skills", "match_explanation")
+
+def skill_set_fingerprint(skill_names: List[str]) -> str:
+    """Hash of a skill set that ignores order, case, aliases and duplicates"""
+    ids = skill_ids(skill_names)
+    return hashlib.sha256(",".join(map(str, ids)).encode("utf-8")).hexdigest()
+
+def match_cache_key(fingerprint: str, job_id: str, job_content: Dict[str, Any], model: str, prompt_version: str) -> str:
+    """
+    Cache key for one job evaluated against one skill set
+
+    Args:
+        fingerprint: skill_set_fingerprint of the user's skills
+        job_id: ID of the job
+        job_content: The job as sent in the prompt, so an edited posting is re-evaluated
+        model: Name of the model producing the match
+        prompt_version: Version of the matching prompt
+
+    Returns:
+        Hex sha256 of the parts
+    """
+    digest = hashlib.sha256()
+    for part in (prompt_version, model, fingerprint, job_id, json.dumps(job_content, sort_keys=True)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+async def get_cached_matches(keys: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Look up cached matches in one query
+
+    Args:
+        keys: Cache keys from match_cache_key
+
+    Returns:
+        Cached match fields by key; missing keys were not cached
+    """
+    if not settings.JOB_MATCH_CACHE_ENABLED or not keys:
+        return {}
+
+    db = get_database()
+    try:
+        cursor = db[CACHE_COLLECTION].find({"_id": {"$in": keys}}, {field: 1 for field in MATCH_FIELDS})
+        cached = {doc.pop("_id"): doc async for doc in cursor}
+    except Exception as e:
+        logger.error(f"Error reading job match cache: {str(e)}")
+        return {}
+
+    metrics.increment("job_match_cache.hit", len(cached))
+    metrics.increment("job_match_cache.miss", len(set(keys)) - len(cached))
+    return cached
+
+async def store_matches(matches: Dict[str, Dict[str, Any]], model: str, prompt_version: str) -> None:
+    """
+    Store match results by cache key in one bulk write
+
+    Entries expire JOB_MATCH_CACHE_TTL_SECONDS after they were stored through
+    the TTL index declared in app/db/indexes.py.
+    """
+    if not settings.JOB_MATCH_CACHE_ENABLED or not matches:
+        return
+
+    db = get_database()
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {"_id": key},
+            {"$set": {
+                **{field: match.get(field) for field in MATCH_FIELDS},
+                "model": model,
+                "prompt_version": prompt_version,
+                "created_at": now
+            }},
+            upsert=True
+        )
+        for key, match in matches.items()
+    ]
+    try:
+        await db[CACHE_COLLECTION].bulk_write(operations, ordered=False)
+        metrics.increment("job_match_cache.store", len(operations))
+    except Exception as e:
+        logger.error(f"Error writing job match cache: {str(e)}")
@@ -0,0 +1,439 @@
+import os
+import re
+import math
+import time
+import asyncio
+import logging
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from ..core.config import settings
+from ..db.mongodb import get_database
+from .job_changes import JOBS_COLLECTION, change_time, changed_jobs_query, is_new_change, later, removed_jobs_since
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILENAME = "job_search_index.npz"
+
+# Indexed fields and how much one occurrence of a term in them counts
+FIELD_WEIGHTS = (("title", 3.0), ("company", 2.0), ("job_description", 1.0))
+
+# Term id placed between fields so a phrase never matches across them
+FIELD_GAP = 0
+
+# Most vocabulary terms a single prefix query (term*) expands to
+MAX_PREFIX_TERMS = 64
+
+# Keeps tokens such as c++, c# and node.js together
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[+#]+|(?:\.[a-z0-9]+)+)?")
+QUERY_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercased search tokens of a piece of text"""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+def parse_query(query: str) -> Tuple[List[str], List[str], List[List[str]]]:
+    """
+    Split a search query into its parts
+
+    Quoted text is a phrase that must appear as written; a word ending in *
+    matches every term starting with it; anything else is an ordinary term.
+
+    Returns:
+        (terms, prefixes, phrases)
+    """
+    terms, prefixes, phrases = [], [], []
+    for phrase, word in QUERY_PATTERN.findall(query or ""):
+        if phrase:
+            tokens = tokenize(phrase)
+            if tokens:
+                phrases.append(tokens)
+            continue
+        tokens = tokenize(word)
+        if word.endswith("*") and tokens:
+            prefixes.append(tokens.pop())
+        terms.extend(tokens)
+    return terms, prefixes, phrases
+
+class JobSearchIndex:
+    """
+    Full-text inverted index over job title, company and description.
+
+    Terms get dense ids and keep posting lists of job numbers with their
+    field-weighted frequency, so a query scores only the jobs that contain
+    one of its terms (BM25). Each job also keeps its sequence of term ids,
+    which is what phrase queries are checked against.
+
+    Like the skill index it is snapshotted to disk, caught up from the jobs
+    collection by updated_at and job tombstones, and updated incrementally by ingest.
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None, k1: float = 1.2, b: float = 0.75):
+        self.snapshot_path = snapshot_path or os.path.join(settings.INDEX_DATA_DIR, SNAPSHOT_FILENAME)
+        self.k1 = k1
+        self.b = b
+        self._reset()
+        self._watermark: Optional[datetime] = None
+        self._changed_at: Dict[str, Optional[datetime]] = {}
+        self._refreshed_at = 0.0
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    def _reset(self) -> None:
+        self._terms: Dict[str, int] = {}
+        self._postings: List[array] = [array("I")]
+        self._freqs: List[array] = [array("f")]
+        self._doc_freqs = np.zeros(1024, dtype=np.int32)
+        self._sorted_terms: Optional[List[str]] = None
+        self._job_ids: List[str] = []
+        self._docnos: Dict[str, int] = {}
+        self._doc_lengths = np.zeros(1024, dtype=np.float32)
+        self._tokens: List[Optional[array]] = []
+        self._total_length = 0.0
+        self._live = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._terms.get(term)
+        if term_id is None:
+            term_id = self._terms[term] = len(self._postings)
+            self._postings.append(array("I"))
+            self._freqs.append(array("f"))
+            if term_id >= len(self._doc_freqs):
+                self._doc_freqs = np.resize(self._doc_freqs, len(self._doc_freqs) * 2)
+                self._doc_freqs[term_id:] = 0
+            self._sorted_terms = None
+        return term_id
+
+    def add(self, job_id: str, title: Optional[str], company: Optional[str], description: Optional[str]) -> None:
+        """
+        Add a job to the index, replacing any previous entry for it
+
+        Args:
+            job_id: ID of the job
+            title: Job title
+            company: Company name
+            description: Job description
+        """
+        job_id = str(job_id)
+        self.remove(job_id)
+
+        sequence = array("I")
+        frequencies: Dict[int, float] = {}
+        length = 0.0
+        for text, (_, weight) in zip((title, company, description), FIELD_WEIGHTS):
+            tokens = tokenize(text)
+            if not tokens:
+                continue
+            if sequence:
+                sequence.append(FIELD_GAP)
+            term_ids = [self._terms.get(token) or self._term_id(token) for token in tokens]
+            sequence.extend(term_ids)
+            for term_id, count in Counter(term_ids).items():
+                frequencies[term_id] = frequencies.get(term_id, 0.0) + weight * count
+            length += weight * len(tokens)
+        if not frequencies:
+            return
+
+        docno = len(self._job_ids)
+        self._job_ids.append(job_id)
+        self._docnos[job_id] = docno
+        self._tokens.append(sequence)
+
+        if docno >= len(self._doc_lengths):
+            self._doc_lengths = np.resize(self._doc_lengths, len(self._doc_lengths) * 2)
+            self._doc_lengths[docno:] = 0
+        self._doc_lengths[docno] = length
+
+        for term_id, frequency in frequencies.items():
+            self._postings[term_id].append(docno)
+            self._freqs[term_id].append(frequency)
+        self._doc_freqs[np.fromiter(frequencies, dtype=np.int64, count=len(frequencies))] += 1
+        self._total_length += length
+        self._live += 1
+
+    def remove(self, job_id: str) -> bool:
+        """
+        Remove a job from the index
+
+        Its number stays in the posting lists but is masked out by a zero
+        length; the space is reclaimed on the next snapshot.
+
+        Returns:
+            True if the job was indexed
+        """
+        docno = self._docnos.pop(str(job_id), None)
+        if docno is None:
+            return False
+        term_ids = np.unique(np.frombuffer(self._tokens[docno], dtype=np.uint32))
+        self._doc_freqs[term_ids[term_ids != FIELD_GAP]] -= 1
+        self._total_length -= float(self._doc_lengths[docno])
+        self._doc_lengths[docno] = 0
+        self._tokens[docno] = None
+        self._live -= 1
+        return True
+
+    def _expand_prefix(self, prefix: str) -> List[int]:
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._terms)
+        term_ids = []
+        position = bisect_left(self._sorted_terms, prefix)
+        while position < len(self._sorted_terms) and len(term_ids) < MAX_PREFIX_TERMS:
+            term = self._sorted_terms[position]
+            if not term.startswith(prefix):
+                break
+            term_ids.append(self._terms[term])
+            position += 1
+        return term_ids
+
+    def _contains_phrase(self, docno: int, phrase: np.ndarray) -> bool:
+        sequence = np.frombuffer(self._tokens[docno], dtype=np.uint32)
+        starts = len(sequence) - len(phrase) + 1
+        if starts <= 0:
+            return False
+        matches = sequence[:starts] == phrase[0]
+        for offset in range(1, len(phrase)):
+            matches &= sequence[offset:starts + offset] == phrase[offset]
+        return bool(matches.any())
+
+    def idf(self, term: str) -> float:
+        """BM25 inverse document frequency of a term; terms no job contains get the value for one job"""
+        term_id = self._terms.get(term)
+        doc_freq = max(int(self._doc_freqs[term_id]), 1) if term_id is not None else 1
+        return math.log(1.0 + (self._live - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def search(self, query: str, k: int = 10, after: Optional[Tuple[float, str]] = None) -> List[Tuple[str, float]]:
+        """
+        Rank jobs against a search query with BM25
+
+        Every term, prefix expansion and phrase word adds to the score; jobs
+        must contain each quoted phrase to be returned at all. Results are
+        ordered by score, then job ID, so a page can continue after the last
+        (score, job_id) of the previous one.
+
+        Args:
+            query: Search query, e.g. 'python "machine learning" kube*'
+            k: Number of jobs to return
+            after: (score, job_id) of the last job of the previous page
+
+        Returns:
+            List of (job_id, score), best first
+        """
+        terms, prefixes, phrases = parse_query(query)
+        if k <= 0 or not self._live:
+            return []
+
+        phrase_ids = []
+        for phrase in phrases:
+            if any(token not in self._terms for token in phrase):
+                return []
+            phrase_ids.append(np.array([self._terms[token] for token in phrase], dtype=np.uint32))
+
+        term_ids = {self._terms[term] for term in terms if term in self._terms}
+        for ids in phrase_ids:
+            term_ids.update(int(term_id) for term_id in ids)
+        for prefix in prefixes:
+            term_ids.update(self._expand_prefix(prefix))
+        if not term_ids:
+            return []
+
+        size = len(self._job_ids)
+        doc_lengths = self._doc_lengths[:size]
+        average_length = self._total_length / self._live
+        scores = np.zeros(size, dtype=np.float32)
+        for term_id in term_ids:
+            doc_freq = int(self._doc_freqs[term_id])
+            if doc_freq <= 0:
+                continue
+            idf = math.log(1.0 + (self._live - doc_freq + 0.5) / (doc_freq + 0.5))
+            docnos = np.frombuffer(self._postings[term_id], dtype=np.uint32)
+            freqs = np.frombuffer(self._freqs[term_id], dtype=np.float32)
+            norms = self.k1 * (1.0 - self.b + self.b * doc_lengths[docnos] / average_length)
+            # A job appears at most once per posting list, so fancy-index += is safe
+            scores[docnos] += idf * freqs * (self.k1 + 1.0) / (freqs + norms)
+
+        candidates = np.flatnonzero((scores > 0) & (doc_lengths > 0))
+        for ids in phrase_ids:
+            for term_id in ids:
+                candidates = np.intersect1d(
+                    candidates, np.frombuffer(self._postings[term_id], dtype=np.uint32), assume_unique=True
+                )
+        if not len(candidates):
+            return []
+
+        candidate_scores = scores[candidates]
+        if after is not None:
+            after_score, after_id = np.float32(after[0]), str(after[1])
+            keep = candidate_scores < after_score
+            for i in np.flatnonzero(candidate_scores == after_score):
+                keep[i] = self._job_ids[candidates[i]] > after_id
+            candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+            if not len(candidates):
+                return []
+
+        if not phrase_ids and len(candidates) > k:
+            # Only candidates tied with or above the k-th best score can make the page
+            keep = np.flatnonzero(candidate_scores >= np.partition(candidate_scores, -k)[-k])
+            candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+
+        # Positions are only checked for the best-scoring jobs until k match;
+        # jobs tied with the k-th are all collected so ties resolve by job ID
+        results = []
+        for i in np.argsort(-candidate_scores, kind="stable"):
+            score = float(candidate_scores[i])
+            if len(results) >= k and score < results[-1][1]:
+                break
+            docno = int(candidates[i])
+            if all(len(ids) == 1 or self._contains_phrase(docno, ids) for ids in phrase_ids):
+                results.append((self._job_ids[docno], score))
+        results.sort(key=lambda result: (-result[1], result[0]))
+        return results[:k]
+
+    async def catch_up(self) -> int:
+        """
+        Index jobs changed since the last watermark and drop removed ones
+
+        Returns:
+            Number of jobs read from the database
+        """
+        db = get_database()
+        since = self._watermark
+        projection = {field: 1 for field, _ in FIELD_WEIGHTS}
+        projection.update({"fetched_at": 1, "updated_at": 1})
+        cursor = db[JOBS_COLLECTION].find(changed_jobs_query(since), projection)
+
+        count = 0
+        async for doc in cursor:
+            job_id = str(doc["_id"])
+            self._watermark = later(self._watermark, change_time(doc))
+            count += 1
+            if is_new_change(self._changed_at, job_id, doc):
+                self.add(job_id, doc.get("title"), doc.get("company"), doc.get("job_description"))
+
+        removed, removed_at = await removed_jobs_since(since)
+        for job_id in removed:
+            self.remove(job_id)
+            self._changed_at.pop(job_id, None)
+        self._watermark = later(self._watermark, removed_at)
+
+        self._refreshed_at = time.monotonic()
+        return count
+
+    async def ensure_loaded(self) -> None:
+        """Load the snapshot (or build from scratch) once, and keep up with other workers"""
+        if self._loaded and time.monotonic() - self._refreshed_at < settings.SEARCH_INDEX_REFRESH_SECONDS:
+            return
+
+        async with self._lock:
+            if not self._loaded:
+                started = time.perf_counter()
+                restored = self.load_snapshot()
+                added = await self.catch_up()
+                self._loaded = True
+                logger.info(
+                    f"Job search index ready with {len(self)} jobs and {len(self._terms)} terms "
+                    f"({'snapshot + ' if restored else ''}{added} read) in {time.perf_counter() - started:.2f}s"
+                )
+                if added:
+                    self.save_snapshot()
+            elif time.monotonic() - self._refreshed_at >= settings.SEARCH_INDEX_REFRESH_SECONDS:
+                await self.catch_up()
+
+    def save_snapshot(self) -> None:
+        """Write the index to disk, compacting away removed jobs and unused terms"""
+        live = [docno for docno in self._docnos.values()]
+        doc_remap = np.full(len(self._job_ids), -1, dtype=np.int64)
+        doc_remap[live] = np.arange(len(live))
+
+        terms, offsets, docnos, freqs = [], [0], [], []
+        term_remap = np.zeros(len(self._postings), dtype=np.uint32)
+        for term, term_id in self._terms.items():
+            mapped = doc_remap[np.frombuffer(self._postings[term_id], dtype=np.uint32)]
+            keep = mapped >= 0
+            if keep.any():
+                terms.append(term)
+                term_remap[term_id] = len(terms)
+                docnos.append(mapped[keep].astype(np.uint32))
+                freqs.append(np.frombuffer(self._freqs[term_id], dtype=np.float32)[keep])
+                offsets.append(offsets[-1] + int(keep.sum()))
+
+        sequences = [term_remap[np.frombuffer(self._tokens[docno], dtype=np.uint32)] for docno in live]
+        token_offsets = np.zeros(len(sequences) + 1, dtype=np.int64)
+        token_offsets[1:] = np.cumsum([len(sequence) for sequence in sequences])
+
+        os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                job_ids=np.array([self._job_ids[docno] for docno in live], dtype=str),
+                doc_lengths=self._doc_lengths[live],
+                terms=np.array(terms, dtype=str),
+                offsets=np.array(offsets, dtype=np.int64),
+                docnos=np.concatenate(docnos) if docnos else np.zeros(0, dtype=np.uint32),
+                freqs=np.concatenate(freqs) if freqs else np.zeros(0, dtype=np.float32),
+                token_offsets=token_offsets,
+                tokens=np.concatenate(sequences) if sequences else np.zeros(0, dtype=np.uint32),
+                watermark=np.array([self._watermark.isoformat() if self._watermark else ""], dtype=str)
+            )
+        os.replace(tmp_path, self.snapshot_path)
+
+    def load_snapshot(self) -> bool:
+        """Restore the index from disk; returns False when there is no usable snapshot"""
+        if not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with np.load(self.snapshot_path) as data:
+                job_ids = [str(job_id) for job_id in data["job_ids"]]
+                doc_lengths = data["doc_lengths"].astype(np.float32)
+                terms = data["terms"]
+                offsets = data["offsets"]
+                docnos = data["docnos"].astype(np.uint32)
+                freqs = data["freqs"].astype(np.float32)
+                token_offsets = data["token_offsets"]
+                tokens = data["tokens"].astype(np.uint32)
+                watermark = str(data["watermark"][0])
+        except Exception as e:
+            logger.error(f"Error loading job search index snapshot: {str(e)}")
+            return False
+
+        self._reset()
+        self._terms = {str(term): term_id for term_id, term in enumerate(terms, start=1)}
+        self._postings += [array("I", docnos[offsets[i]:offsets[i + 1]].tobytes()) for i in range(len(terms))]
+        self._freqs += [array("f", freqs[offsets[i]:offsets[i + 1]].tobytes()) for i in range(len(terms))]
+        self._doc_freqs = np.zeros(max(len(self._postings) * 2, 1024), dtype=np.int32)
+        self._doc_freqs[1:len(self._postings)] = np.diff(offsets)
+
+        self._job_ids = job_ids
+        self._docnos = {job_id: docno for docno, job_id in enumerate(job_ids)}
+        self._doc_lengths = np.zeros(max(len(job_ids) * 2, 1024), dtype=np.float32)
+        self._doc_lengths[:len(job_ids)] = doc_lengths
+        self._tokens = [
+            array("I", tokens[token_offsets[i]:token_offsets[i + 1]].tobytes()) for i in range(len(job_ids))
+        ]
+        self._total_length = float(doc_lengths.sum())
+        self._live = len(job_ids)
+        self._watermark = datetime.fromisoformat(watermark) if watermark else None
+        self._changed_at = {}
+        return True
+
+_job_search_index: Optional[JobSearchIndex] = None
+
+def get_job_search_index() -> JobSearchIndex:
+    """Get the process-wide job search index"""
+    global _job_search_index
+    if _job_search_index is None:
+        _job_search_index = JobSearchIndex()
+    return _job_search_index
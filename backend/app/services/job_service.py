@@ -1,55 +1,50 @@
 import os
+import time
+import asyncio
 import re
 import json
 import logging
-import requests
-from time import sleep
 from datetime import datetime
-from typing import List, Dict, Set, Any, Optional
+from typing import List, Dict, Set, Any, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 import hashlib
 
+from ..core.config import settings
+from ..core.metrics import metrics
 from ..db.mongodb import get_database
-from ..models.job import Job, JobInDB, JobCreate, JobRecommendation
+from ..models.job import Job, JobBase, JobInDB, JobCreate, JobRecommendation
 from ..models.skill import UserSkill, Skill
+from .jsearch_client import get_jsearch_client
+from . import llm_client, resume_service
+from .job_match_cache import MATCH_FIELDS, skill_set_fingerprint, match_cache_key, get_cached_matches, store_matches
+from .skill_matcher import common_skill_matcher, in_demand_skill_matcher, get_user_skill_matcher
+from .job_changes import record_removed_jobs
+from .job_skill_index import get_job_skill_index
+from .skill_taxonomy import canonical_skill, skill_id, skill_ids
+from .job_search_index import get_job_search_index
+from .job_vector_index import get_job_vector_index, job_embedding_text
+from .text_embedding import embed, from_document, to_document
+from ..utils.pagination import InvalidCursor, encode_cursor, decode_cursor, encode_recency_cursor, recency_filter
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# API configuration
-JSEARCH_API_URL = "https://jsearch.p.rapidapi.com/search"
-JSEARCH_API_KEY = os.getenv("JSEARCH_API_KEY")
-JSEARCH_HEADERS = {
-    "X-RapidAPI-Key": JSEARCH_API_KEY,
-    "X-RapidAPI-Host": "jsearch.p.rapidapi.com"
-}
-
-# Check if API key is available
-if not JSEARCH_API_KEY:
-    logger.warning("JSEARCH_API_KEY not found in environment. API calls will likely fail.")
-
 # Collection names
 JOBS_COLLECTION = "jobs"
 
-# Create indexes when module is imported
-async def create_indexes():
-    """Create necessary indexes for jobs collection"""
-    db = get_database()
-    try:
-        logger.info("Creating indexes for jobs collection...")
-        # Index on source and source_id for deduplication
-        await db[JOBS_COLLECTION].create_index([("source", 1), ("source_id", 1)], unique=True)
-        # Text index on title and job_description for searching
-        await db[JOBS_COLLECTION].create_index([("title", "text"), ("job_description", "text")])
-        logger.info("Indexes created successfully")
-    except Exception as e:
-        logger.error(f"Error creating indexes: {str(e)}")
+# Job listings page newest first; backed by the (fetched_at, _id) index
+RECENCY_SORT = [("fetched_at", -1), ("_id", -1)]
 
 async def fetch_jobs(query: str, max_pages: int = 1, remote_only: bool = False) -> List[JobInDB]:
     """
     Fetch jobs from the JSearch API
     
+    Pages are fetched concurrently through the shared, rate-limited JSearch
+    client, so a scrape never blocks the event loop.
+    
     Args:
         query: The search query for jobs
         max_pages: Maximum number of pages to fetch
@@ -58,43 +53,26 @@ async def fetch_jobs(query: str, max_pages: int = 1, remote_only: bool = False)
     Returns:
         List of job documents
     """
-    db = get_database()
     jobs = []
     
     logger.info(f"Fetching jobs with query: {query}, max_pages: {max_pages}, remote_only: {remote_only}")
     
-    for page in range(1, max_pages + 1):
-        params = {
-            "query": query,
-            "page": page,
-            "remote_jobs_only": "true" if remote_only else "false"
-        }
-        
-        try:
-            logger.info(f"Making API request for page {page}")
-            res = requests.get(JSEARCH_API_URL, headers=JSEARCH_HEADERS, params=params)
-            res.raise_for_status()
-            data = res.json()
-            
-            for job_data in data.get("data", []):
-                job = JobInDB(
-                    title=job_data.get("job_title", ""),
-                    company=job_data.get("employer_name", ""),
-                    location=job_data.get("job_city", "") or job_data.get("job_country", ""),
-                    url=job_data.get("job_apply_link", ""),
-                    job_description=job_data.get("job_description", "")[:1000],  # Limit description length
-                    fetched_at=datetime.utcnow(),
-                    extracted_skills=extract_skills_from_job(job_data.get("job_description", ""))
-                )
-                jobs.append(job)
-                
-            logger.info(f"Fetched {len(data.get('data', []))} jobs from page {page}")
+    pages = await get_jsearch_client().search(query=query, max_pages=max_pages, remote_only=remote_only)
+    
+    for page, page_data in enumerate(pages, start=1):
+        for job_data in page_data:
+            job = JobInDB(
+                title=job_data.get("job_title", ""),
+                company=job_data.get("employer_name", ""),
+                location=job_data.get("job_city", "") or job_data.get("job_country", ""),
+                url=job_data.get("job_apply_link", ""),
+                job_description=(job_data.get("job_description") or "")[:1000],  # Limit description length
+                fetched_at=datetime.utcnow(),
+                extracted_skills=extract_skills_from_job(job_data.get("job_description") or "")
+            )
+            jobs.append(job)
             
-        except Exception as e:
-            logger.error(f"Error fetching jobs for query '{query}' page {page}: {str(e)}")
-        
-        # Sleep to avoid hitting rate limits
-        sleep(1)
+        logger.info(f"Fetched {len(page_data)} jobs from page {page}")
     
     return jobs
 
@@ -102,113 +80,433 @@ def extract_skills_from_job(job_description: str) -> List[str]:
     """
     Extract potential skills from job description using a simple keyword matching approach
     
+    Aliases are resolved, so "VueJS" and "Vue" are both reported as "Vue.js".
+    
     Args:
         job_description: Text of the job description
         
     Returns:
-        List of extracted skills
-    """
-    # A subset of common skills to match in job descriptions
-    common_skills = [
-        # Programming Languages
-        "Python", "JavaScript", "TypeScript", "Java", "C#", "C\\+\\+", "Go", "Ruby", "PHP", "Swift", "Kotlin",
-        # Web Development
-        "React", "Angular", "Vue.js", "Node.js", "Express", "Django", "Flask", "FastAPI",
-        "HTML", "CSS", "SASS", "LESS", "Bootstrap", "Tailwind CSS",
-        # Cloud & DevOps
-        "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform", "CI/CD", "Jenkins", "GitHub Actions",
-        # Databases
-        "SQL", "MongoDB", "PostgreSQL", "MySQL", "SQLite", "Redis", "Elasticsearch",
-        # Data Science & AI
-        "Machine Learning", "Deep Learning", "NLP", "TensorFlow", "PyTorch", "Keras", "scikit-learn",
-        "Data Analysis", "Data Visualization", "Pandas", "NumPy", "Matplotlib", "Tableau", "Power BI",
-        # Soft Skills
-        "Communication", "Leadership", "Teamwork", "Problem Solving", "Critical Thinking",
-        "Time Management", "Adaptability", "Creativity", "Emotional Intelligence"
-    ]
+        List of extracted skills, by canonical name
+    """
+    return common_skill_matcher.find(job_description)
+
+def job_dedupe_key(job: JobBase) -> str:
+    """
+    Compute the key used to detect duplicate postings
     
-    extracted_skills = set()
+    Postings are identified by their apply URL; postings without one fall
+    back to title, company and location.
     
-    # Convert description to lowercase for case-insensitive matching
-    description_lower = job_description.lower()
+    Args:
+        job: Job to compute the key for
+        
+    Returns:
+        Hex digest identifying the posting
+    """
+    if job.url and job.url.strip():
+        basis = "url:" + job.url.strip()
+    else:
+        basis = "job:" + "|".join(
+            (value or "").strip().lower() for value in (job.title, job.company, job.location)
+        )
+    return hashlib.sha1(basis.encode("utf-8")).hexdigest()
+
+def job_content_hash(doc: Dict[str, Any]) -> str:
+    """Hash of the stored fields of a job, used to skip re-ingesting unchanged postings"""
+    return hashlib.sha1(json.dumps(doc, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+async def ingest_jobs(jobs: List[JobInDB], batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Bulk upsert jobs into the database keyed on their dedupe key
+    
+    Jobs are sent as unordered bulk_write batches, so ingesting N postings
+    costs about N / batch_size round trips. Existing postings keep their id
+    and original fetched_at; their content fields are refreshed. Postings
+    stored unchanged (same content hash) are not written at all; every
+    write stamps updated_at, which the in-process indexes catch up on.
     
-    for skill in common_skills:
-        # Create pattern for whole word matching
-        pattern = r'\b' + re.escape(skill.lower()) + r'\b'
-        if re.search(pattern, description_lower):
-            extracted_skills.add(skill)
+    Args:
+        jobs: List of job documents to ingest
+        batch_size: Upserts per bulk_write (defaults to JOB_INGEST_BATCH_SIZE)
+        
+    Returns:
+        Dict with inserted, updated and duplicates counts. Duplicates are
+        postings repeated within the input or already stored unchanged.
+    """
+    db = get_database()
+    batch_size = max(batch_size or settings.JOB_INGEST_BATCH_SIZE, 1)
+    counts = {"inserted": 0, "updated": 0, "duplicates": 0}
     
-    return list(extracted_skills)
+    # Collapse duplicates within the input before touching the database
+    unique_jobs: Dict[str, JobInDB] = {}
+    for job in jobs:
+        key = job_dedupe_key(job)
+        if key in unique_jobs:
+            counts["duplicates"] += 1
+        else:
+            unique_jobs[key] = job
+    
+    keys = list(unique_jobs)
+    for start in range(0, len(keys), batch_size):
+        batch_keys = keys[start:start + batch_size]
+        stored_hashes = {
+            doc["dedupe_key"]: doc.get("content_hash")
+            async for doc in db[JOBS_COLLECTION].find(
+                {"dedupe_key": {"$in": batch_keys}}, {"dedupe_key": 1, "content_hash": 1}
+            )
+        }
+        
+        operations, written_keys = [], []
+        for key in batch_keys:
+            job = unique_jobs[key]
+            doc = job.model_dump(by_alias=True)
+            insert_only = {"_id": doc.pop("_id"), "fetched_at": doc.pop("fetched_at")}
+            doc["dedupe_key"] = key
+            doc["skill_ids"] = skill_ids(job.extracted_skills)
+            doc["content_hash"] = job_content_hash(doc)
+            if stored_hashes.get(key) == doc["content_hash"]:
+                counts["duplicates"] += 1
+                continue
+            # Vectors are stored at ingest; unchanged postings are skipped above
+            doc["embedding"] = to_document(embed(job_embedding_text(job.title, job.job_description), job.extracted_skills))
+            operations.append(UpdateOne(
+                {"dedupe_key": key},
+                {"$set": doc, "$setOnInsert": insert_only, "$currentDate": {"updated_at": True}},
+                upsert=True
+            ))
+            written_keys.append(key)
+        if not operations:
+            continue
+        
+        try:
+            result = await db[JOBS_COLLECTION].bulk_write(operations, ordered=False)
+            inserted, matched = result.upserted_count, result.matched_count
+        except BulkWriteError as e:
+            details = e.details
+            inserted, matched = details.get("nUpserted", 0), details.get("nMatched", 0)
+            for error in details.get("writeErrors", [])[:5]:
+                logger.error(f"Error ingesting job batch item {error.get('index')}: {error.get('errmsg')}")
+        
+        counts["inserted"] += inserted
+        counts["updated"] += matched
+        
+        if inserted or matched:
+            await _index_ingested_jobs(written_keys)
+    
+    logger.info(
+        f"Ingested {len(jobs)} jobs: {counts['inserted']} inserted, "
+        f"{counts['updated']} updated, {counts['duplicates']} duplicates"
+    )
+    return counts
+
+async def _index_ingested_jobs(dedupe_keys: List[str]) -> None:
+    """Bring the in-process skill, search and vector indexes up to date with a freshly written batch"""
+    skill_index = get_job_skill_index()
+    search_index = get_job_search_index()
+    vector_index = get_job_vector_index()
+    if not skill_index.loaded and not search_index.loaded and not vector_index.loaded:
+        # The indexes read these jobs from the database when they are first loaded
+        return
+    
+    db = get_database()
+    cursor = db[JOBS_COLLECTION].find(
+        {"dedupe_key": {"$in": dedupe_keys}},
+        {"skill_ids": 1, "title": 1, "company": 1, "job_description": 1, "embedding": 1}
+    )
+    async for doc in cursor:
+        job_id = str(doc["_id"])
+        if skill_index.loaded:
+            skill_index.add(job_id, doc.get("skill_ids") or [])
+        if search_index.loaded:
+            search_index.add(job_id, doc.get("title"), doc.get("company"), doc.get("job_description"))
+        stored = from_document(doc.get("embedding"))
+        if vector_index.loaded and stored is not None:
+            vector_index.add(job_id, *stored)
+
+async def remove_jobs(job_ids: List[str]) -> int:
+    """
+    Delete expired or withdrawn jobs and drop them from the in-process indexes
+    
+    Other processes drop them on their next catch-up, from the tombstones
+    left in job_tombstones.
+    
+    Args:
+        job_ids: IDs of the jobs to delete
+        
+    Returns:
+        Number of jobs deleted
+    """
+    if not job_ids:
+        return 0
+    
+    db = get_database()
+    result = await db[JOBS_COLLECTION].delete_many({"_id": {"$in": _job_id_filter_values(job_ids)}})
+    await record_removed_jobs(job_ids)
+    
+    skill_index = get_job_skill_index()
+    search_index = get_job_search_index()
+    vector_index = get_job_vector_index()
+    for job_id in job_ids:
+        skill_index.remove(job_id)
+        search_index.remove(job_id)
+        vector_index.remove(job_id)
+    
+    logger.info(f"Removed {result.deleted_count} jobs")
+    return result.deleted_count
 
 async def save_jobs(jobs: List[JobInDB]) -> int:
     """
-    Save jobs to the database, avoiding duplicates based on URL
+    Save jobs to the database, avoiding duplicates
     
     Args:
         jobs: List of job documents to save
         
     Returns:
-        Number of jobs successfully saved
+        Number of jobs newly inserted
     """
-    db = get_database()
-    inserted_count = 0
+    counts = await ingest_jobs(jobs)
+    return counts["inserted"]
+
+async def backfill_dedupe_keys(batch_size: Optional[int] = None) -> int:
+    """
+    Assign dedupe keys to jobs stored before bulk ingestion existed
     
-    for job in jobs:
-        # Check if job already exists by URL
-        existing_job = await db[JOBS_COLLECTION].find_one({"url": job.url})
+    When several legacy documents share a key only the first one receives it,
+    so the unique index can still be built.
+    
+    Args:
+        batch_size: Updates per bulk_write (defaults to JOB_INGEST_BATCH_SIZE)
         
-        if not existing_job:
-            try:
-                result = await db[JOBS_COLLECTION].insert_one(job.model_dump(by_alias=True))
-                if result.inserted_id:
-                    inserted_count += 1
-            except Exception as e:
-                logger.error(f"Error saving job {job.title}: {str(e)}")
+    Returns:
+        Number of documents updated
+    """
+    db = get_database()
+    batch_size = max(batch_size or settings.JOB_INGEST_BATCH_SIZE, 1)
+    updated = 0
+    
+    cursor = db[JOBS_COLLECTION].find(
+        {"dedupe_key": {"$exists": False}},
+        {"title": 1, "company": 1, "location": 1, "url": 1}
+    )
     
-    return inserted_count
+    pending: Dict[str, Any] = {}
+    
+    async def flush() -> int:
+        existing = await db[JOBS_COLLECTION].distinct("dedupe_key", {"dedupe_key": {"$in": list(pending)}})
+        operations = [
+            UpdateOne({"_id": doc_id}, {"$set": {"dedupe_key": key}})
+            for key, doc_id in pending.items() if key not in existing
+        ]
+        pending.clear()
+        if not operations:
+            return 0
+        result = await db[JOBS_COLLECTION].bulk_write(operations, ordered=False)
+        return result.modified_count
+    
+    async for doc in cursor:
+        key = job_dedupe_key(JobCreate(
+            title=doc.get("title") or "",
+            company=doc.get("company") or "",
+            location=doc.get("location") or "",
+            url=doc.get("url") or "",
+            job_description=""
+        ))
+        pending.setdefault(key, doc["_id"])
+        if len(pending) >= batch_size:
+            updated += await flush()
+    
+    if pending:
+        updated += await flush()
+    
+    logger.info(f"Backfilled dedupe keys on {updated} jobs")
+    return updated
 
-async def get_all_jobs(limit: int = 100, skip: int = 0) -> List[Job]:
+async def backfill_skill_ids(batch_size: Optional[int] = None) -> int:
     """
-    Get all jobs from the database with pagination
+    Resolve the skills of jobs stored before the skill taxonomy existed
+    
+    Extracted skill names are rewritten to their canonical names (which also
+    repairs regex-escaped names like "C\\+\\+") and their ids are stored.
     
     Args:
-        limit: Maximum number of jobs to return
-        skip: Number of jobs to skip
+        batch_size: Updates per bulk_write (defaults to JOB_INGEST_BATCH_SIZE)
         
     Returns:
-        List of jobs
+        Number of documents updated
     """
     db = get_database()
-    cursor = db[JOBS_COLLECTION].find().sort("fetched_at", -1).skip(skip).limit(limit)
+    batch_size = max(batch_size or settings.JOB_INGEST_BATCH_SIZE, 1)
+    updated = 0
     
-    jobs = []
+    cursor = db[JOBS_COLLECTION].find({"skill_ids": {"$exists": False}}, {"extracted_skills": 1})
+    
+    operations = []
     async for doc in cursor:
-        jobs.append(Job(**doc))
+        names = [skill for skill in doc.get("extracted_skills") or [] if skill and skill.strip()]
+        operations.append(UpdateOne({"_id": doc["_id"]}, {
+            "$set": {
+                "extracted_skills": list(dict.fromkeys(canonical_skill(name) for name in names)),
+                "skill_ids": skill_ids(names)
+            },
+            # Lets every worker's skill index pick up the new ids
+            "$currentDate": {"updated_at": True}
+        }))
+        if len(operations) >= batch_size:
+            result = await db[JOBS_COLLECTION].bulk_write(operations, ordered=False)
+            updated += result.modified_count
+            operations = []
+    
+    if operations:
+        result = await db[JOBS_COLLECTION].bulk_write(operations, ordered=False)
+        updated += result.modified_count
+    
+    logger.info(f"Backfilled skill ids on {updated} jobs")
+    return updated
+
+async def get_all_jobs(limit: int = 100) -> List[Job]:
+    """
+    Get the most recently fetched jobs
     
+    Args:
+        limit: Maximum number of jobs to return
+        
+    Returns:
+        List of jobs, newest first
+    """
+    jobs, _ = await get_jobs_page(limit)
     return jobs
 
-async def search_jobs(query: str, limit: int = 100) -> List[Job]:
+async def get_jobs_page(
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    job_ids: Optional[List[str]] = None
+) -> Tuple[List[Job], Optional[str]]:
     """
-    Search jobs by query in title or description
+    Get one page of jobs, newest first
+    
+    Pages are keyed on (fetched_at, _id) rather than skipped over, so every
+    page costs the same however deep it is.
     
     Args:
-        query: Search query
         limit: Maximum number of jobs to return
+        cursor: Cursor returned with the previous page
+        job_ids: Only page through these jobs
         
     Returns:
-        List of matching jobs
+        (jobs, next_cursor); next_cursor is None on the last page
+        
+    Raises:
+        InvalidCursor: The cursor was not issued for this listing
     """
     db = get_database()
-    # Create text index if it doesn't exist
-    await db[JOBS_COLLECTION].create_index([("title", "text"), ("job_description", "text")])
+    filters = [recency_filter(cursor)]
+    if job_ids is not None:
+        filters.append({"_id": {"$in": _job_id_filter_values(job_ids)}})
+    filters = [f for f in filters if f]
+    query = {"$and": filters} if len(filters) > 1 else (filters[0] if filters else {})
+    
+    docs = await db[JOBS_COLLECTION].find(query).sort(RECENCY_SORT).limit(limit).to_list(length=limit)
+    next_cursor = None
+    if docs and len(docs) == limit:
+        next_cursor = encode_recency_cursor(docs[-1]["fetched_at"], docs[-1]["_id"])
+    
+    return [_job_from_doc(doc) for doc in docs], next_cursor
+
+async def search_jobs(query: str, limit: int = 100, backend: Optional[str] = None) -> List[Job]:
+    """
+    Search jobs by query in title, company or description, best match first
     
-    cursor = db[JOBS_COLLECTION].find({"$text": {"$search": query}}).limit(limit)
+    Args:
+        query: Search query; the index backend also supports "quoted phrases" and prefix* terms
+        limit: Maximum number of jobs to return
+        backend: index (in-process BM25) or mongo ($text); defaults to JOB_SEARCH_BACKEND
+        
+    Returns:
+        List of matching jobs
+    """
+    jobs, _ = await search_jobs_page(query, limit, backend=backend)
+    return jobs
+
+def _decode_search_cursor(cursor: Optional[str], backend: str) -> Optional[Tuple[float, Any]]:
+    if not cursor:
+        return None
+    score, doc_id = decode_cursor(cursor, f"search.{backend}", 2)
+    if not isinstance(score, (int, float)) or not isinstance(doc_id, (str, ObjectId)):
+        raise InvalidCursor("Malformed cursor")
+    return float(score), doc_id
+
+async def search_jobs_page(
+    query: str,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    backend: Optional[str] = None
+) -> Tuple[List[Job], Optional[str]]:
+    """
+    Get one page of search results, best match first
     
-    jobs = []
-    async for doc in cursor:
-        jobs.append(Job(**doc))
+    Results are ordered by (score, _id) and pages continue after the last
+    pair of the previous page instead of skipping over it.
     
-    return jobs
+    Args:
+        query: Search query
+        limit: Maximum number of jobs to return
+        cursor: Cursor returned with the previous page
+        backend: index (in-process BM25) or mongo ($text); defaults to JOB_SEARCH_BACKEND
+        
+    Returns:
+        (jobs, next_cursor); next_cursor is None on the last page
+        
+    Raises:
+        InvalidCursor: The cursor was not issued for this search backend
+    """
+    backend = backend or settings.JOB_SEARCH_BACKEND
+    after = _decode_search_cursor(cursor, backend)
+    started = time.monotonic()
+    if backend == "index":
+        index = get_job_search_index()
+        await index.ensure_loaded()
+        hits = index.search(query, limit, after=after)
+        found = await get_jobs_by_ids([job_id for job_id, _ in hits])
+        jobs = [found[job_id] for job_id, _ in hits if job_id in found]
+        last = (hits[-1][1], hits[-1][0]) if len(hits) == limit else None
+    else:
+        # textScore can only be filtered on inside an aggregation
+        pipeline = [
+            {"$match": {"$text": {"$search": query}}},
+            {"$addFields": {"_score": {"$meta": "textScore"}}},
+        ]
+        if after:
+            pipeline.append({"$match": {"$or": [
+                {"_score": {"$lt": after[0]}},
+                {"_score": after[0], "_id": {"$gt": after[1]}},
+            ]}})
+        pipeline += [{"$sort": {"_score": -1, "_id": 1}}, {"$limit": limit}]
+        
+        db = get_database()
+        docs = await db[JOBS_COLLECTION].aggregate(pipeline).to_list(length=limit)
+        last = (docs[-1]["_score"], docs[-1]["_id"]) if docs and len(docs) == limit else None
+        jobs = []
+        for doc in docs:
+            doc.pop("_score", None)
+            jobs.append(_job_from_doc(doc))
+    
+    metrics.observe(f"job_search.{backend}", time.monotonic() - started)
+    next_cursor = encode_cursor(f"search.{backend}", *last) if last else None
+    return jobs, next_cursor
+
+def _job_id_filter_values(job_ids: List[str]) -> List[Any]:
+    """Job ids as stored: string ids, plus their ObjectId form where valid"""
+    values = []
+    for job_id in job_ids:
+        values.append(job_id)
+        if ObjectId.is_valid(job_id):
+            values.append(ObjectId(job_id))
+    return values
+
+def _job_from_doc(doc: Dict[str, Any]) -> Job:
+    if isinstance(doc.get("_id"), ObjectId):
+        doc["_id"] = str(doc["_id"])
+    return Job(**doc)
 
 async def get_job_by_id(job_id: str) -> Optional[Job]:
     """
@@ -222,18 +520,72 @@ async def get_job_by_id(job_id: str) -> Optional[Job]:
     """
     db = get_database()
     try:
-        doc = await db[JOBS_COLLECTION].find_one({"_id": ObjectId(job_id)})
+        doc = await db[JOBS_COLLECTION].find_one({"_id": {"$in": _job_id_filter_values([job_id])}})
         if doc:
-            return Job(**doc)
+            return _job_from_doc(doc)
         return None
     except Exception as e:
         logger.error(f"Error getting job {job_id}: {str(e)}")
         return None
 
+async def get_jobs_by_ids(job_ids: List[str]) -> Dict[str, Job]:
+    """
+    Get several jobs in one round trip
+    
+    Args:
+        job_ids: IDs of the jobs to get
+        
+    Returns:
+        Dict of job ID to job; IDs that were not found are omitted
+    """
+    db = get_database()
+    jobs = {}
+    if not job_ids:
+        return jobs
+    
+    cursor = db[JOBS_COLLECTION].find({"_id": {"$in": _job_id_filter_values(job_ids)}})
+    async for doc in cursor:
+        try:
+            job = _job_from_doc(doc)
+            jobs[job.id] = job
+        except Exception as e:
+            logger.error(f"Error loading job {doc.get('_id')}: {str(e)}")
+    
+    return jobs
+
+def build_recommendation(
+    job: Job,
+    match_score: float,
+    matching_skills: List[str],
+    missing_skills: List[str],
+    match_explanation: Optional[str] = None
+) -> JobRecommendation:
+    """Create a JobRecommendation from a job and its match details"""
+    return JobRecommendation(
+        id=job.id,
+        title=job.title,
+        company=job.company,
+        location=job.location,
+        url=job.url,
+        job_description=job.job_description,
+        fetched_at=job.fetched_at,
+        extracted_skills=job.extracted_skills,
+        relevance_score=job.relevance_score,
+        match_score=match_score,
+        matching_skills=matching_skills,
+        missing_skills=missing_skills,
+        source=job.source,
+        source_id=job.source_id,
+        match_explanation=match_explanation
+    )
+
 async def get_recommended_jobs(user_skill: UserSkill, limit: int = 10) -> List[JobRecommendation]:
     """
     Get job recommendations based on user skills
     
+    Candidates come from the skill posting-list index over the whole jobs
+    collection; only the top `limit` documents are fetched from the database.
+    
     Args:
         user_skill: User's skills
         limit: Maximum number of recommendations to return
@@ -241,46 +593,66 @@ async def get_recommended_jobs(user_skill: UserSkill, limit: int = 10) -> List[J
     Returns:
         List of job recommendations sorted by match score
     """
-    db = get_database()
-    recommendations = []
+    index = get_job_skill_index()
+    await index.ensure_loaded()
     
-    # Get list of user's skill names
-    user_skill_names = [skill.name for skill in user_skill.skills]
+    # Skill ids are stored with the analysis; older analyses only have names
+    user_skill_ids = set(user_skill.skill_ids or skill_ids(skill.name for skill in user_skill.skills))
     
-    # Find all jobs
-    cursor = db[JOBS_COLLECTION].find().limit(100)  # Limit to recent 100 jobs for efficiency
+    top_jobs = index.top_k(user_skill_ids, limit)
+    jobs = await get_jobs_by_ids([job_id for job_id, _, _ in top_jobs])
     
-    async for doc in cursor:
-        job = Job(**doc)
-        
-        # Calculate matching skills
-        job_skills = set(job.extracted_skills)
-        user_skills = set(user_skill_names)
-        
-        matching_skills = list(job_skills.intersection(user_skills))
-        missing_skills = list(job_skills - user_skills)
+    recommendations = []
+    for job_id, match_score, _ in top_jobs:
+        job = jobs.get(job_id)
+        if not job:
+            continue
         
-        # Calculate match score (percentage of job skills matched by user)
-        if job_skills:
-            match_score = len(matching_skills) / len(job_skills)
-        else:
-            match_score = 0
+        matching_skills = [skill for skill in job.extracted_skills if skill_id(skill) in user_skill_ids]
+        missing_skills = [skill for skill in job.extracted_skills if skill_id(skill) not in user_skill_ids]
+        recommendations.append(build_recommendation(job, match_score, matching_skills, missing_skills))
+    
+    return recommendations
+
+async def get_semantic_recommendations(resume_id: str, limit: int = 10) -> List[JobRecommendation]:
+    """
+    Get the jobs closest to a resume in the local embedding space
+    
+    Unlike skill overlap this also finds postings that ask for related
+    skills (Flask for a Django resume) or spell them differently. No LLM is
+    called; candidates come from the IVF index over job vectors.
+    
+    Args:
+        resume_id: ID of the resume
+        limit: Maximum number of recommendations to return
         
-        # Create recommendation if there's at least one matching skill
-        if matching_skills:
-            recommendations.append(
-                JobRecommendation(
-                    job=job,
-                    match_score=match_score,
-                    matching_skills=matching_skills,
-                    missing_skills=missing_skills
-                )
-            )
+    Returns:
+        List of job recommendations, most similar first; match_score is the
+        cosine similarity
+    """
+    index = get_job_vector_index()
+    await index.ensure_loaded()
+    
+    resume_embedding = await resume_service.get_resume_embedding(resume_id)
+    if resume_embedding is None:
+        return []
+    vector, skill_names = resume_embedding
+    
+    nearest = index.search(vector, limit)
+    jobs = await get_jobs_by_ids([job_id for job_id, _ in nearest])
+    user_skill_ids = set(skill_ids(skill_names))
     
-    # Sort recommendations by match score (highest first)
-    recommendations.sort(key=lambda x: x.match_score, reverse=True)
+    recommendations = []
+    for job_id, similarity in nearest:
+        job = jobs.get(job_id)
+        if not job:
+            continue
+        
+        matching_skills = [skill for skill in job.extracted_skills if skill_id(skill) in user_skill_ids]
+        missing_skills = [skill for skill in job.extracted_skills if skill_id(skill) not in user_skill_ids]
+        recommendations.append(build_recommendation(job, round(max(similarity, 0.0), 3), matching_skills, missing_skills))
     
-    return recommendations[:limit]
+    return recommendations
 
 async def run_job_scraper(queries: List[str] = None, max_pages: int = 1) -> Dict[str, Any]:
     """
@@ -305,27 +677,75 @@ async def run_job_scraper(queries: List[str] = None, max_pages: int = 1) -> Dict
         ]
     
     total_fetched = 0
-    total_saved = 0
+    fetched_jobs = []
     
     for query in queries:
         jobs = await fetch_jobs(query=query, max_pages=max_pages)
         total_fetched += len(jobs)
-        
-        if jobs:
-            saved = await save_jobs(jobs)
-            total_saved += saved
-            logger.info(f"Saved {saved} new jobs for query '{query}'")
+        fetched_jobs.extend(jobs)
+    
+    # Ingest everything in one bulk pass; postings returned by several queries are deduplicated
+    counts = await ingest_jobs(fetched_jobs)
     
     return {
         "total_fetched": total_fetched,
-        "total_saved": total_saved,
+        "total_saved": counts["inserted"],
+        "total_updated": counts["updated"],
+        "total_duplicates": counts["duplicates"],
         "queries_processed": len(queries)
     }
 
+# Bump whenever the job matching prompt changes so cached matches are not reused
+JOB_MATCH_PROMPT_VERSION = "1"
+
+# Rough size of a prompt in tokens (Gemini averages about four characters per token)
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def _job_prompt_entry(position: int, job: Job) -> Dict[str, Any]:
+    """Job as described to Gemini; the position in the batch is its temporary ID"""
+    return {
+        "id": position,
+        "title": job.title,
+        "company": job.company,
+        "extracted_skills": job.extracted_skills,
+        "description_summary": job.job_description[:1000] if job.job_description else ""  # Limit length for API
+    }
+
+def batch_jobs_by_tokens(jobs: List[Job], token_budget: int, max_batch_size: int) -> List[List[Job]]:
+    """
+    Split jobs into prompt batches that each fit the token budget
+    
+    Every batch holds at least one job, so a job larger than the budget gets
+    a batch of its own.
+    """
+    batches = []
+    batch: List[Job] = []
+    batch_tokens = 0
+    for job in jobs:
+        tokens = estimate_tokens(json.dumps(_job_prompt_entry(len(batch), job)))
+        if batch and (batch_tokens + tokens > token_budget or len(batch) >= max_batch_size):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(job)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
 async def match_jobs_with_gemini(user_skills: List[Skill], jobs: List[Job], limit: int = 5) -> List[JobRecommendation]:
     """
     Use Gemini to analyze the match between user skills and job postings
     
+    Matching runs in two stages. Every candidate is first scored locally with
+    the skill matcher. The best JOB_MATCH_LLM_TOP_N then go to Gemini in batches
+    sized by JOB_MATCH_BATCH_TOKENS, all dispatched at once (the shared LLM
+    client bounds how many run together), so latency is about one round trip.
+    Jobs in a batch that fails keep their local score. Matches are cached per
+    skill set and job, and only cache misses are sent to Gemini.
+    
     Args:
         user_skills: List of user skills
         jobs: List of job postings to evaluate
@@ -334,66 +754,82 @@ async def match_jobs_with_gemini(user_skills: List[Skill], jobs: List[Job], limi
     Returns:
         List of JobRecommendation objects sorted by match score
     """
-    # Load Gemini API key
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    if not gemini_api_key:
-        logger.warning("GEMINI_API_KEY not found in environment. Using basic job matching.")
+    if not llm_client.is_available():
+        logger.warning("GEMINI_API_KEY not configured. Using basic job matching.")
         return await basic_job_matching(user_skills, jobs, limit)
 
     try:
-        # Import and configure Gemini
-        import google.generativeai as genai
-        print(f"Configured Gemini with API key: {gemini_api_key[:4]}...{gemini_api_key[-4:]}")
-        genai.configure(api_key=gemini_api_key)
-        
-        # Try to use the most capable model available
-        try:
-            model = genai.GenerativeModel('gemini-1.5-pro')
-        except Exception as e:
-            logger.warning(f"Error with gemini-1.5-pro model: {str(e)}. Trying gemini-pro...")
-            try:
-                model = genai.GenerativeModel('gemini-pro')
-            except Exception as e:
-                logger.error(f"Error with gemini-pro model: {str(e)}. Falling back to basic matching.")
-                return await basic_job_matching(user_skills, jobs, limit)
-        
-        recommendations = []
-        
-        # Process each job (limit batch size to avoid overloading the API)
-        batch_size = min(10, len(jobs))
-        for i in range(0, min(len(jobs), 20), batch_size):
-            batch_jobs = jobs[i:i+batch_size]
-            batch_results = await process_job_batch_with_gemini(model, user_skills, batch_jobs)
-            recommendations.extend(batch_results)
-        
-        # Sort by match score and return top recommendations
-        recommendations.sort(key=lambda x: x.match_score, reverse=True)
-        return recommendations[:limit]
+        # Stage 1: cheap local pre-ranking of the whole candidate set
+        shortlist = rank_jobs_locally(user_skills, jobs)[:max(settings.JOB_MATCH_LLM_TOP_N, limit)]
+        
+        # Previously evaluated (skill set, job) pairs come from the cache in one lookup
+        fingerprint = skill_set_fingerprint([skill.name for skill in user_skills])
+        keys = [
+            match_cache_key(fingerprint, job.id, _job_prompt_entry(0, job), settings.LLM_MODEL, JOB_MATCH_PROMPT_VERSION)
+            for job, _ in shortlist
+        ]
+        cached = await get_cached_matches(keys)
+        
+        merged = []
+        for (job, recommendation), key in zip(shortlist, keys):
+            if key in cached:
+                match = cached[key]
+                recommendation = build_recommendation(
+                    job, match["match_score"], match["matching_skills"], match["missing_skills"], match["match_explanation"]
+                )
+            merged.append((key in cached, recommendation))
+        pending = [position for position, key in enumerate(keys) if key not in cached]
+        
+        # Stage 2: Gemini on the uncached part of the shortlist, batches in flight concurrently
+        batches = batch_jobs_by_tokens(
+            [shortlist[position][0] for position in pending], settings.JOB_MATCH_BATCH_TOKENS, settings.JOB_MATCH_MAX_BATCH_SIZE
+        )
+        logger.info(
+            f"Matching {len(shortlist)} of {len(jobs)} jobs: {len(cached)} cached, "
+            f"{len(pending)} sent to Gemini in {len(batches)} batches"
+        )
+        
+        async def match_batch(offset: int, batch: List[Job]):
+            return offset, await process_job_batch_with_gemini(user_skills, batch)
+        
+        offsets = [sum(len(batch) for batch in batches[:i]) for i in range(len(batches))]
+        
+        # Merge results as each batch completes; unanswered jobs keep their local match
+        fresh = {}
+        for finished in asyncio.as_completed([
+            match_batch(offset, batch) for offset, batch in zip(offsets, batches)
+        ]):
+            offset, batch_results = await finished
+            for position, recommendation in batch_results.items():
+                shortlist_position = pending[offset + position]
+                merged[shortlist_position] = (True, recommendation)
+                fresh[keys[shortlist_position]] = recommendation.model_dump(include=set(MATCH_FIELDS))
+        await store_matches(fresh, settings.LLM_MODEL, JOB_MATCH_PROMPT_VERSION)
+        
+        # Sort by match score and return top recommendations; local scores are on a
+        # different scale, so jobs Gemini evaluated rank ahead of the rest
+        merged.sort(key=lambda x: (x[0], x[1].match_score), reverse=True)
+        return [recommendation for _, recommendation in merged[:limit]]
     
     except Exception as e:
         logger.error(f"Error using Gemini for job matching: {str(e)}")
         return await basic_job_matching(user_skills, jobs, limit)
 
-async def process_job_batch_with_gemini(model, user_skills: List[Skill], jobs: List[Job]) -> List[JobRecommendation]:
-    """Process a batch of jobs with Gemini to evaluate matches"""
+async def process_job_batch_with_gemini(user_skills: List[Skill], jobs: List[Job]) -> Dict[int, JobRecommendation]:
+    """
+    Process a batch of jobs with Gemini to evaluate matches
+    
+    Returns:
+        Recommendations keyed by the job's position in the batch; jobs Gemini
+        did not answer for are missing
+    """
     
     # Extract skill names from skill objects
     skill_names = [skill.name for skill in user_skills]
     skill_text = ", ".join(skill_names)
     
     # Prepare job data
-    job_data = []
-    for i, job in enumerate(jobs):
-        job_info = {
-            "id": i,  # Use index as temporary ID for the prompt
-            "title": job.title,
-            "company": job.company,
-            "extracted_skills": job.extracted_skills,
-            "description_summary": job.job_description[:1000] if job.job_description else ""  # Limit length for API
-        }
-        job_data.append(job_info)
-    
-    job_data_json = json.dumps(job_data)
+    job_data_json = json.dumps([_job_prompt_entry(i, job) for i, job in enumerate(jobs)])
     
     # Create the prompt for Gemini
     prompt = f"""
@@ -431,12 +867,8 @@ async def process_job_batch_with_gemini(model, user_skills: List[Skill], jobs: L
     try:
         # Get response from Gemini
         logger.info("Sending job matching request to Gemini API")
-        response = model.generate_content(prompt)
-        
-        if hasattr(response, 'text'):
-            response_text = response.text
-        else:
-            response_text = str(response)
+        response = await llm_client.generate(prompt, feature="job_matching")
+        response_text = response.text
         
         # Extract JSON from response
         logger.debug(f"Raw Gemini response: {response_text[:200]}...")
@@ -469,34 +901,23 @@ async def process_job_batch_with_gemini(model, user_skills: List[Skill], jobs: L
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse Gemini response as JSON: {str(e)}")
             logger.debug(f"Problematic JSON string: {json_str}")
-            return []
+            return {}
         
         # Create JobRecommendation objects
-        recommendations = []
+        recommendations = {}
         for result in analysis_results:
             job_idx = result.get("job_id", 0)
-            if job_idx < len(jobs):
+            if isinstance(job_idx, int) and 0 <= job_idx < len(jobs):
                 job = jobs[job_idx]
                 
                 try:
-                    recommendation = JobRecommendation(
-                        id=job.id,
-                        title=job.title,
-                        company=job.company,
-                        location=job.location,
-                        url=job.url,
-                        job_description=job.job_description,
-                        fetched_at=job.fetched_at,
-                        extracted_skills=job.extracted_skills,
-                        relevance_score=job.relevance_score,
-                        match_score=float(result.get("match_score", 0)),
-                        matching_skills=result.get("matching_skills", []),
-                        missing_skills=result.get("missing_skills", []),
-                        source=job.source,
-                        source_id=job.source_id,
-                        match_explanation=result.get("match_explanation", "")
+                    recommendations[job_idx] = build_recommendation(
+                        job,
+                        float(result.get("match_score", 0)),
+                        result.get("matching_skills", []),
+                        result.get("missing_skills", []),
+                        result.get("match_explanation", "")
                     )
-                    recommendations.append(recommendation)
                 except Exception as e:
                     logger.error(f"Error creating job recommendation: {str(e)}")
         
@@ -504,60 +925,37 @@ async def process_job_batch_with_gemini(model, user_skills: List[Skill], jobs: L
     
     except Exception as e:
         logger.error(f"Error in Gemini job batch processing: {str(e)}")
-        return []  # Return empty list on error
+        return {}  # Return no matches on error
 
 async def basic_job_matching(user_skills: List[Skill], jobs: List[Job], limit: int = 5) -> List[JobRecommendation]:
     """Basic job matching as fallback when Gemini is not available"""
+    return [recommendation for _, recommendation in rank_jobs_locally(user_skills, jobs)[:limit]]
+
+def rank_jobs_locally(user_skills: List[Skill], jobs: List[Job]) -> List[Tuple[Job, JobRecommendation]]:
+    """
+    Score jobs with the skill matchers (no LLM), best match first
+    
+    Returns:
+        (job, recommendation) pairs sorted by match score
+    """
     recommendations = []
     
-    # Extract skill names
+    # Extract skill names and compile them (and their aliases) into one matcher
     skill_names = [skill.name for skill in user_skills]
+    user_skill_matcher = get_user_skill_matcher(tuple(skill_names))
+    user_skill_ids = set(skill_ids(skill_names))
     
     for job in jobs:
-        job_text = ""
-        if job.title:
-            job_text += job.title.lower() + " "
-        if job.company:
-            job_text += job.company.lower() + " "
-        if job.job_description:
-            job_text += job.job_description.lower()
-        
-        # Calculate matching skills (case-insensitive match)
-        matching_skills = []
-        for skill in skill_names:
-            # For better matching, consider variations of the skill name
-            skill_variations = [
-                skill.lower(),                      # exact match
-                skill.lower().replace(" ", ""),     # without spaces
-                skill.lower().replace(" ", "-"),    # with hyphens
-                skill.lower().replace(".", ""),     # without dots
-            ]
-            
-            for variation in skill_variations:
-                if variation in job_text:
-                    matching_skills.append(skill)
-                    break
-        
-        # Deduplicate matching skills
-        matching_skills = list(set(matching_skills))
-        
-        # Extract some keywords that might be missing skills
-        common_skills = [
-            "Python", "JavaScript", "Java", "React", "Angular", "Vue", "Node.js", 
-            "SQL", "MongoDB", "Express", "Django", "Flask", "AWS", "Azure", "GCP", 
-            "Docker", "Kubernetes", "CI/CD", "Git", "Agile", "TypeScript", "Redux",
-            "REST API", "GraphQL", "NoSQL", "CSS", "HTML", "Spring", "Hibernate",
-            "Microservices", "Unit Testing", "TDD", "Ruby", "Go", "Swift"
-        ]
+        job_text = " ".join(part for part in (job.title, job.company, job.job_description) if part)
         
-        missing_skills = []
-        for skill in common_skills:
-            skill_lower = skill.lower()
-            if skill_lower in job_text and skill not in matching_skills:
-                missing_skills.append(skill)
+        # Calculate matching skills in a single pass over the job text
+        matching_skills = user_skill_matcher.find(job_text)
         
-        # Limit to top 3 missing skills
-        missing_skills = missing_skills[:3]
+        # Extract some keywords that might be missing skills, limited to the top 3
+        missing_skills = [
+            skill for skill in in_demand_skill_matcher.find(job_text)
+            if skill_id(skill) not in user_skill_ids
+        ][:3]
         
         # Calculate match score
         if matching_skills:
@@ -578,26 +976,11 @@ async def basic_job_matching(user_skills: List[Skill], jobs: List[Job], limit: i
         
         try:
             # Create a JobRecommendation object
-            recommendation = JobRecommendation(
-                id=job.id,
-                title=job.title,
-                company=job.company,
-                location=job.location,
-                url=job.url,
-                job_description=job.job_description,
-                fetched_at=job.fetched_at,
-                extracted_skills=job.extracted_skills,
-                relevance_score=job.relevance_score,
-                match_score=round(match_score, 2),
-                matching_skills=matching_skills,
-                missing_skills=missing_skills,
-                source=job.source,
-                source_id=job.source_id
-            )
-            recommendations.append(recommendation)
+            recommendation = build_recommendation(job, round(match_score, 2), matching_skills, missing_skills)
+            recommendations.append((job, recommendation))
         except Exception as e:
             logger.error(f"Error creating job recommendation: {str(e)}")
     
     # Sort by match score
-    recommendations.sort(key=lambda x: x.match_score, reverse=True)
-    return recommendations[:limit] 
\ No newline at end of file
+    recommendations.sort(key=lambda x: x[1].match_score, reverse=True)
+    return recommendations 
\ No newline at end of file
@@ -0,0 +1,280 @@
+import os
+import time
+import asyncio
+import logging
+from array import array
+from datetime import datetime
+from typing import List, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from ..core.config import settings
+from ..db.mongodb import get_database
+from .job_changes import JOBS_COLLECTION, change_time, changed_jobs_query, is_new_change, later, removed_jobs_since
+from .skill_taxonomy import skill_ids
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILENAME = "job_skill_index.npz"
+
+class JobSkillIndex:
+    """
+    Inverted index from skill to the jobs that mention it.
+
+    Every job gets a dense internal number; each skill id (see skill_taxonomy)
+    keeps a posting list of those numbers in a compact uint32 array. Recommending jobs merges the
+    posting lists of the user's skills into a per-job hit counter and selects the
+    top-k candidates, so only the winning documents are read from MongoDB.
+
+    The index is snapshotted to disk and caught up from the jobs collection
+    by updated_at and from job tombstones, and ingest updates it incrementally.
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None):
+        self.snapshot_path = snapshot_path or os.path.join(settings.INDEX_DATA_DIR, SNAPSHOT_FILENAME)
+        self._job_ids: List[str] = []
+        self._docnos: Dict[str, int] = {}
+        self._skill_counts = np.zeros(1024, dtype=np.uint16)
+        self._postings: Dict[int, array] = {}
+        self._live = 0
+        self._watermark: Optional[datetime] = None
+        self._changed_at: Dict[str, Optional[datetime]] = {}
+        self._refreshed_at = 0.0
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return self._live
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def add(self, job_id: str, ids: Iterable[int]) -> None:
+        """
+        Add a job to the index, replacing any previous entry for it
+
+        Args:
+            job_id: ID of the job
+            ids: Skill ids of the job (its stored skill_ids)
+        """
+        job_id = str(job_id)
+        self.remove(job_id)
+
+        keys = set(ids)
+        if not keys:
+            return
+
+        docno = len(self._job_ids)
+        self._job_ids.append(job_id)
+        self._docnos[job_id] = docno
+
+        if docno >= len(self._skill_counts):
+            self._skill_counts = np.resize(self._skill_counts, len(self._skill_counts) * 2)
+            self._skill_counts[docno:] = 0
+        self._skill_counts[docno] = min(len(keys), np.iinfo(np.uint16).max)
+
+        for key in keys:
+            posting = self._postings.get(key)
+            if posting is None:
+                posting = self._postings[key] = array("I")
+            posting.append(docno)
+        self._live += 1
+
+    def remove(self, job_id: str) -> bool:
+        """
+        Remove a job from the index
+
+        Its number stays in the posting lists but is masked out by a zero
+        skill count; the space is reclaimed on the next full rebuild.
+
+        Returns:
+            True if the job was indexed
+        """
+        docno = self._docnos.pop(str(job_id), None)
+        if docno is None:
+            return False
+        self._skill_counts[docno] = 0
+        self._live -= 1
+        return True
+
+    def top_k(self, ids: Iterable[int], k: int = 10) -> List[Tuple[str, float, int]]:
+        """
+        Find the jobs that best match a set of skills
+
+        The score of a job is the fraction of its skills the user has; ties
+        are broken by the number of matched skills, then by recency.
+
+        Args:
+            ids: Skill ids of the user's skills
+            k: Number of jobs to return
+
+        Returns:
+            List of (job_id, match_score, matched_count), best first
+        """
+        keys = set(ids)
+        lists = [
+            np.frombuffer(self._postings[key], dtype=np.uint32)
+            for key in keys if key in self._postings and len(self._postings[key])
+        ]
+        if not lists or k <= 0:
+            return []
+
+        # Each posting list holds a job at most once, so adding the lists one by
+        # one into a small counter array is cheaper than a bincount
+        size = len(self._job_ids)
+        matched = np.zeros(size, dtype=np.uint8 if len(lists) < 256 else np.uint16)
+        for posting in lists:
+            matched[posting] += 1
+
+        candidates = np.flatnonzero(matched)
+        counts = self._skill_counts[candidates]
+        live = counts > 0
+        if not live.all():
+            candidates, counts = candidates[live], counts[live]
+        if not len(candidates):
+            return []
+
+        hits = matched[candidates]
+        scores = hits.astype(np.float32) / counts
+
+        # Partial selection: only candidates scoring at least the k-th best score
+        # are sorted. Full matches are common, so try the best score on its own first.
+        keep = np.flatnonzero(scores >= scores.max())
+        if len(keep) < k < len(candidates):
+            threshold = np.partition(scores, -k)[-k]
+            keep = np.flatnonzero(scores >= threshold)
+        elif len(keep) < k:
+            keep = np.arange(len(candidates))
+        order = np.lexsort((candidates[keep], hits[keep], scores[keep]))[::-1][:k]
+        best = keep[order]
+
+        return [
+            (self._job_ids[candidates[i]], int(hits[i]) / int(counts[i]), int(hits[i]))
+            for i in best
+        ]
+
+    async def catch_up(self) -> int:
+        """
+        Index jobs changed since the last watermark and drop removed ones
+
+        Returns:
+            Number of jobs read from the database
+        """
+        db = get_database()
+        since = self._watermark
+        cursor = db[JOBS_COLLECTION].find(
+            changed_jobs_query(since), {"skill_ids": 1, "extracted_skills": 1, "fetched_at": 1, "updated_at": 1}
+        )
+
+        count = 0
+        async for doc in cursor:
+            job_id = str(doc["_id"])
+            self._watermark = later(self._watermark, change_time(doc))
+            count += 1
+            if not is_new_change(self._changed_at, job_id, doc):
+                continue
+            # Jobs stored before skill ids existed are resolved from their skill names
+            ids = doc.get("skill_ids")
+            self.add(job_id, ids if ids is not None else skill_ids(doc.get("extracted_skills") or []))
+
+        removed, removed_at = await removed_jobs_since(since)
+        for job_id in removed:
+            self.remove(job_id)
+            self._changed_at.pop(job_id, None)
+        self._watermark = later(self._watermark, removed_at)
+
+        self._refreshed_at = time.monotonic()
+        return count
+
+    async def ensure_loaded(self) -> None:
+        """Load the snapshot (or build from scratch) once, and keep up with other workers"""
+        if self._loaded and time.monotonic() - self._refreshed_at < settings.SKILL_INDEX_REFRESH_SECONDS:
+            return
+
+        async with self._lock:
+            if not self._loaded:
+                started = time.perf_counter()
+                restored = self.load_snapshot()
+                added = await self.catch_up()
+                self._loaded = True
+                logger.info(
+                    f"Job skill index ready with {len(self)} jobs "
+                    f"({'snapshot + ' if restored else ''}{added} read) in {time.perf_counter() - started:.2f}s"
+                )
+                if added:
+                    self.save_snapshot()
+            elif time.monotonic() - self._refreshed_at >= settings.SKILL_INDEX_REFRESH_SECONDS:
+                await self.catch_up()
+
+    def save_snapshot(self) -> None:
+        """Write the index to disk, compacting away removed jobs"""
+        live = [(job_id, docno) for job_id, docno in self._docnos.items()]
+        remap = np.full(len(self._job_ids), -1, dtype=np.int64)
+        for new_docno, (_, docno) in enumerate(live):
+            remap[docno] = new_docno
+
+        skills, offsets, docnos = [], [0], []
+        for skill, posting in self._postings.items():
+            mapped = remap[np.frombuffer(posting, dtype=np.uint32)]
+            mapped = mapped[mapped >= 0]
+            if len(mapped):
+                skills.append(skill)
+                docnos.append(mapped.astype(np.uint32))
+                offsets.append(offsets[-1] + len(mapped))
+
+        os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                job_ids=np.array([job_id for job_id, _ in live], dtype=str),
+                skill_counts=self._skill_counts[[docno for _, docno in live]],
+                skill_ids=np.array(skills, dtype=np.int64),
+                offsets=np.array(offsets, dtype=np.int64),
+                docnos=np.concatenate(docnos) if docnos else np.zeros(0, dtype=np.uint32),
+                watermark=np.array([self._watermark.isoformat() if self._watermark else ""], dtype=str)
+            )
+        os.replace(tmp_path, self.snapshot_path)
+
+    def load_snapshot(self) -> bool:
+        """Restore the index from disk; returns False when there is no usable snapshot"""
+        if not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with np.load(self.snapshot_path) as data:
+                job_ids = [str(job_id) for job_id in data["job_ids"]]
+                skill_counts = data["skill_counts"].astype(np.uint16)
+                # Snapshots keyed by skill name predate skill ids and are rebuilt
+                if "skill_ids" not in data:
+                    return False
+                skills = data["skill_ids"]
+                offsets = data["offsets"]
+                docnos = data["docnos"]
+                watermark = str(data["watermark"][0])
+        except Exception as e:
+            logger.error(f"Error loading job skill index snapshot: {str(e)}")
+            return False
+
+        self._job_ids = job_ids
+        self._docnos = {job_id: docno for docno, job_id in enumerate(job_ids)}
+        self._skill_counts = np.zeros(max(len(job_ids) * 2, 1024), dtype=np.uint16)
+        self._skill_counts[:len(job_ids)] = skill_counts
+        self._postings = {
+            int(skill): array("I", docnos[offsets[i]:offsets[i + 1]].astype(np.uint32).tobytes())
+            for i, skill in enumerate(skills)
+        }
+        self._live = len(job_ids)
+        self._watermark = datetime.fromisoformat(watermark) if watermark else None
+        self._changed_at = {}
+        return True
+
+_job_skill_index: Optional[JobSkillIndex] = None
+
+def get_job_skill_index() -> JobSkillIndex:
+    """Get the process-wide job skill index"""
+    global _job_skill_index
+    if _job_skill_index is None:
+        _job_skill_index = JobSkillIndex()
+    return _job_skill_index
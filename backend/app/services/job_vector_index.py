@@ -0,0 +1,501 @@
+import os
+import json
+import time
+import shutil
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pymongo import UpdateOne
+
+from ..core.config import settings
+from ..db.mongodb import get_database
+from .job_changes import JOBS_COLLECTION, change_time, changed_jobs_query, is_new_change, later, removed_jobs_since
+from .text_embedding import embed, embedding_version, from_document, quantize, to_document
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIRNAME = "job_vector_index"
+CURRENT_FILENAME = "CURRENT"
+
+# Below this many jobs every query is a plain scan and no clusters are trained
+MIN_TRAIN_JOBS = 256
+
+# k-means iterations and the most points it trains on
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+
+# Jobs embedded and written back per bulk_write while catching up
+BACKFILL_BATCH_SIZE = 500
+
+def job_embedding_text(title: Optional[str], description: Optional[str]) -> str:
+    """Text a job's vector is computed from"""
+    return f"{title or ''}\n{description or ''}"
+
+def _kmeans(points: np.ndarray, lists: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means: unit-length centroids maximizing dot product with their points"""
+    rng = np.random.default_rng(seed)
+    centroids = points[rng.choice(len(points), lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = np.argmax(points @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, points)
+        norms = np.linalg.norm(sums, axis=1)
+        empty = norms == 0
+        # Re-seed empty lists from random points
+        sums[empty] = points[rng.choice(len(points), int(empty.sum()))]
+        norms[empty] = np.linalg.norm(sums[empty], axis=1)
+        centroids = sums / np.maximum(norms, 1e-12)[:, None]
+    return centroids.astype(np.float32)
+
+def _train_lists(
+    docnos: np.ndarray,
+    base_codes: np.ndarray,
+    base_scales: np.ndarray,
+    tail_codes: np.ndarray,
+    tail_scales: np.ndarray
+) -> tuple:
+    """
+    Cluster the live vectors (docnos into base + tail) into lists
+
+    Touches only its arguments, so it can run in a worker thread.
+
+    Returns:
+        (codes, scales, centroids, list_docnos, list_offsets) of the new trained part
+    """
+    codes = np.concatenate([base_codes, tail_codes])[docnos]
+    scales = np.concatenate([base_scales, tail_scales])[docnos].astype(np.float32)
+    if len(docnos) < MIN_TRAIN_JOBS:
+        centroids = np.zeros((0, codes.shape[1]), dtype=np.float32)
+        return codes, scales, centroids, np.arange(len(docnos), dtype=np.uint32), np.array([0, len(docnos)], dtype=np.int64)
+
+    lists = min(int(2 * np.sqrt(len(docnos))), 4096)
+    points = codes.astype(np.float32) * scales[:, None]
+    rng = np.random.default_rng(0)
+    sample = points[rng.choice(len(points), min(len(points), lists * KMEANS_SAMPLE_PER_LIST), replace=False)]
+    centroids = _kmeans(sample, lists)
+
+    assignment = np.argmax(points @ centroids.T, axis=1)
+    list_docnos = np.argsort(assignment, kind="stable").astype(np.uint32)
+    list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=lists))]).astype(np.int64)
+    return codes, scales, centroids, list_docnos, list_offsets
+
+class JobVectorIndex:
+    """
+    Inverted-file (IVF) approximate nearest-neighbour index over job vectors.
+
+    Vectors from text_embedding are kept as int8 codes with a per-job scale.
+    Training clusters them with spherical k-means into about 2*sqrt(N) lists;
+    a query scores the centroids, then only the jobs in the nprobe closest
+    lists, so it reads a few percent of the vectors.
+
+    The trained part is written as .npy files and memory-mapped on load, so
+    a worker starts without reading the vectors into memory. Jobs added
+    after training go to an in-memory tail assigned to the nearest list; once
+    the tail and removed jobs pass VECTOR_INDEX_RETRAIN_FRACTION, a refresh
+    retrains and saves. From the app, training and snapshot writes run in
+    worker threads (save_snapshot_async).
+    """
+
+    def __init__(self, snapshot_dir: Optional[str] = None, nprobe: Optional[int] = None):
+        self.snapshot_dir = snapshot_dir or os.path.join(settings.INDEX_DATA_DIR, SNAPSHOT_DIRNAME)
+        self.nprobe = nprobe or settings.VECTOR_INDEX_NPROBE
+        self._reset()
+        self._watermark: Optional[datetime] = None
+        self._changed_at: Dict[str, Optional[datetime]] = {}
+        self._refreshed_at = 0.0
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        self._save_lock = asyncio.Lock()
+        self._save_task: Optional[asyncio.Task] = None
+
+    def _reset(self) -> None:
+        dim = settings.EMBEDDING_DIM
+        self._job_ids: List[str] = []
+        self._docnos: Dict[str, int] = {}
+        self._alive = np.zeros(1024, dtype=bool)
+        # Trained part, memory-mapped after a load
+        self._centroids = np.zeros((0, dim), dtype=np.float32)
+        self._base_codes = np.zeros((0, dim), dtype=np.int8)
+        self._base_scales = np.zeros(0, dtype=np.float32)
+        self._list_offsets = np.zeros(1, dtype=np.int64)
+        self._list_docnos = np.zeros(0, dtype=np.uint32)
+        # Tail of jobs added since training
+        self._tail_codes = np.zeros((256, dim), dtype=np.int8)
+        self._tail_scales = np.zeros(256, dtype=np.float32)
+        self._tail_lists = np.zeros(256, dtype=np.int32)
+        self._tail_size = 0
+        self._live = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def _base_size(self) -> int:
+        return len(self._base_codes)
+
+    def add(self, job_id: str, codes: np.ndarray, scale: float) -> None:
+        """
+        Add a job's quantized vector, replacing any previous entry for it
+
+        Args:
+            job_id: ID of the job
+            codes: int8 codes from text_embedding.quantize
+            scale: Scale of the codes
+        """
+        job_id = str(job_id)
+        self.remove(job_id)
+        if scale <= 0:
+            return
+
+        docno = len(self._job_ids)
+        self._job_ids.append(job_id)
+        self._docnos[job_id] = docno
+        if docno >= len(self._alive):
+            self._alive = np.resize(self._alive, len(self._alive) * 2)
+            self._alive[docno:] = False
+        self._alive[docno] = True
+
+        row = self._tail_size
+        if row >= len(self._tail_codes):
+            size = len(self._tail_codes) * 2
+            self._tail_codes = np.resize(self._tail_codes, (size, self._tail_codes.shape[1]))
+            self._tail_scales = np.resize(self._tail_scales, size)
+            self._tail_lists = np.resize(self._tail_lists, size)
+        self._tail_codes[row] = codes
+        self._tail_scales[row] = scale
+        self._tail_lists[row] = (
+            int(np.argmax(self._centroids @ codes.astype(np.float32))) if len(self._centroids) else 0
+        )
+        self._tail_size += 1
+        self._live += 1
+
+    def remove(self, job_id: str) -> bool:
+        """
+        Remove a job from the index
+
+        Its vector stays in place but is masked out until the next training.
+
+        Returns:
+            True if the job was indexed
+        """
+        docno = self._docnos.pop(str(job_id), None)
+        if docno is None:
+            return False
+        self._alive[docno] = False
+        self._live -= 1
+        return True
+
+    def search(self, vector: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Find the jobs whose vectors are most similar to a query vector
+
+        Args:
+            vector: Unit-length float32 query vector from text_embedding.embed
+            k: Number of jobs to return
+
+        Returns:
+            List of (job_id, cosine similarity), most similar first
+        """
+        if k <= 0 or not self._live or not vector.any():
+            return []
+        query = vector.astype(np.float32)
+
+        if len(self._centroids):
+            probes = np.argsort(-(self._centroids @ query))[:self.nprobe]
+            base = np.concatenate(
+                [self._list_docnos[self._list_offsets[p]:self._list_offsets[p + 1]] for p in probes]
+            ).astype(np.int64)
+            tail = np.flatnonzero(np.isin(self._tail_lists[:self._tail_size], probes))
+        else:
+            base = np.arange(self._base_size, dtype=np.int64)
+            tail = np.arange(self._tail_size, dtype=np.int64)
+
+        # Sorted reads walk the memory-mapped codes front to back
+        base = np.sort(base)
+        docnos = np.concatenate([base, self._base_size + tail])
+        scores = np.concatenate([
+            (self._base_codes[base].astype(np.float32) @ query) * self._base_scales[base],
+            (self._tail_codes[tail].astype(np.float32) @ query) * self._tail_scales[tail],
+        ])
+        live = self._alive[docnos]
+        docnos, scores = docnos[live], scores[live]
+        if not len(docnos):
+            return []
+
+        if len(docnos) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            docnos, scores = docnos[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [(self._job_ids[docnos[i]], float(scores[i])) for i in order]
+
+    def _training_input(self) -> Tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        What a training run needs, captured on the event loop
+
+        The trained arrays are never written in place, so they are shared;
+        the tail and the live mask are copied because adds keep writing them.
+        """
+        cut = len(self._job_ids)
+        docnos = np.flatnonzero(self._alive[:cut])
+        return (
+            cut, docnos,
+            self._base_codes, self._base_scales,
+            self._tail_codes[:self._tail_size].copy(), self._tail_scales[:self._tail_size].copy()
+        )
+
+    def _install_trained(self, cut: int, docnos: np.ndarray, trained: tuple) -> None:
+        """
+        Switch to a finished training run
+
+        Jobs added or removed while it ran (from the event loop) are applied
+        on top: removed ones are masked out and added ones go to the new tail.
+        """
+        codes, scales, centroids, list_docnos, list_offsets = trained
+        base_size = self._base_size
+        added = [
+            (self._job_ids[docno], self._tail_codes[docno - base_size].copy(), float(self._tail_scales[docno - base_size]))
+            for docno in range(cut, len(self._job_ids)) if self._alive[docno]
+        ]
+        alive = self._alive[docnos]
+        job_ids = [self._job_ids[docno] for docno in docnos]
+
+        self._reset()
+        self._job_ids = job_ids
+        self._docnos = {job_id: docno for docno, job_id in enumerate(job_ids) if alive[docno]}
+        self._alive = np.zeros(max(len(job_ids), 1024), dtype=bool)
+        self._alive[:len(job_ids)] = alive
+        self._base_codes = codes
+        self._base_scales = scales
+        self._centroids = centroids
+        self._list_docnos = list_docnos
+        self._list_offsets = list_offsets
+        self._live = len(self._docnos)
+        for job_id, job_codes, scale in added:
+            self.add(job_id, job_codes, scale)
+
+    def train(self) -> None:
+        """Cluster every live vector into lists; the tail is folded into the trained part"""
+        cut, docnos, *arrays = self._training_input()
+        self._install_trained(cut, docnos, _train_lists(docnos, *arrays))
+
+    async def train_async(self) -> None:
+        """train() with the clustering in a worker thread, so searches and ingest keep running"""
+        cut, docnos, *arrays = self._training_input()
+        trained = await asyncio.to_thread(_train_lists, docnos, *arrays)
+        self._install_trained(cut, docnos, trained)
+
+    async def catch_up(self) -> int:
+        """
+        Index jobs changed since the last watermark and drop removed ones
+
+        Jobs stored before vectors existed (or with another embedding
+        version) are embedded here and written back.
+
+        Returns:
+            Number of jobs read from the database
+        """
+        db = get_database()
+        since = self._watermark
+        cursor = db[JOBS_COLLECTION].find(
+            changed_jobs_query(since),
+            {"title": 1, "job_description": 1, "extracted_skills": 1, "embedding": 1, "fetched_at": 1, "updated_at": 1}
+        )
+
+        count = 0
+        backfill = []
+        async for doc in cursor:
+            job_id = str(doc["_id"])
+            self._watermark = later(self._watermark, change_time(doc))
+            count += 1
+            if not is_new_change(self._changed_at, job_id, doc):
+                continue
+            stored = from_document(doc.get("embedding"))
+            if stored is None:
+                vector = embed(job_embedding_text(doc.get("title"), doc.get("job_description")), doc.get("extracted_skills") or [])
+                stored = quantize(vector)
+                backfill.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"embedding": to_document(vector)}}))
+                if len(backfill) >= BACKFILL_BATCH_SIZE:
+                    await db[JOBS_COLLECTION].bulk_write(backfill, ordered=False)
+                    backfill = []
+            self.add(job_id, *stored)
+        if backfill:
+            await db[JOBS_COLLECTION].bulk_write(backfill, ordered=False)
+
+        removed, removed_at = await removed_jobs_since(since)
+        for job_id in removed:
+            self.remove(job_id)
+            self._changed_at.pop(job_id, None)
+        self._watermark = later(self._watermark, removed_at)
+
+        self._refreshed_at = time.monotonic()
+        return count
+
+    async def ensure_loaded(self) -> None:
+        """Map the snapshot (or build from scratch) once, and keep up with other workers"""
+        if self._loaded and time.monotonic() - self._refreshed_at < settings.VECTOR_INDEX_REFRESH_SECONDS:
+            return
+
+        async with self._lock:
+            if not self._loaded:
+                started = time.perf_counter()
+                restored = self.load_snapshot()
+                added = await self.catch_up()
+                self._loaded = True
+                logger.info(
+                    f"Job vector index ready with {len(self)} jobs in {len(self._centroids)} lists "
+                    f"({'snapshot + ' if restored else ''}{added} read) in {time.perf_counter() - started:.2f}s"
+                )
+                if added:
+                    # Training and writing run in the background; until then queries scan the tail
+                    self._save_task = asyncio.create_task(self.save_snapshot_async())
+            elif time.monotonic() - self._refreshed_at >= settings.VECTOR_INDEX_REFRESH_SECONDS:
+                await self.catch_up()
+                # A long-running worker retrains as it goes rather than scanning an ever larger tail
+                if self._needs_training() and (self._save_task is None or self._save_task.done()):
+                    self._save_task = asyncio.create_task(self.save_snapshot_async())
+
+    def _needs_training(self) -> bool:
+        """Whether removed jobs and the untrained tail make up more than VECTOR_INDEX_RETRAIN_FRACTION"""
+        stale = (len(self._job_ids) - self._live) + self._tail_size
+        return stale > settings.VECTOR_INDEX_RETRAIN_FRACTION * max(self._live, 1) or (
+            not len(self._centroids) and self._live >= MIN_TRAIN_JOBS
+        )
+
+    def _snapshot_state(self) -> Dict[str, Any]:
+        """Copy of what a snapshot holds, taken on the event loop so it can be written from a thread"""
+        tail = np.arange(self._tail_size)
+        return {
+            "centroids": self._centroids,
+            "base_codes": self._base_codes,
+            "base_scales": self._base_scales,
+            "tail_codes": self._tail_codes[tail],
+            "tail_scales": self._tail_scales[tail],
+            "list_offsets": self._list_offsets,
+            "list_docnos": self._list_docnos,
+            "tail_lists": self._tail_lists[tail],
+            "alive": self._alive[:len(self._job_ids)].copy(),
+            "job_ids": list(self._job_ids),
+            "watermark": self._watermark,
+        }
+
+    def _write_snapshot(self, state: Dict[str, Any]) -> None:
+        """
+        Write a snapshot to a new directory and point CURRENT at it
+
+        Workers still mapping an older directory keep reading it safely; it
+        is only unlinked.
+        """
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        name = f"{SNAPSHOT_DIRNAME}-{time.time_ns()}"
+        path = os.path.join(self.snapshot_dir, name)
+        os.makedirs(path)
+
+        # Jobs in the tail are written as a list of their own past the trained ones
+        np.save(os.path.join(path, "centroids.npy"), state["centroids"])
+        np.save(os.path.join(path, "codes.npy"), np.concatenate([state["base_codes"], state["tail_codes"]]))
+        np.save(os.path.join(path, "scales.npy"), np.concatenate([state["base_scales"], state["tail_scales"]]))
+        np.save(os.path.join(path, "list_offsets.npy"), state["list_offsets"])
+        np.save(os.path.join(path, "list_docnos.npy"), state["list_docnos"])
+        np.save(os.path.join(path, "tail_lists.npy"), state["tail_lists"])
+        np.save(os.path.join(path, "alive.npy"), state["alive"])
+        np.save(os.path.join(path, "job_ids.npy"), np.array(state["job_ids"], dtype=str))
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({
+                "version": embedding_version(),
+                "base_size": len(state["base_codes"]),
+                "watermark": state["watermark"].isoformat() if state["watermark"] else ""
+            }, f)
+
+        tmp_path = os.path.join(self.snapshot_dir, CURRENT_FILENAME + ".tmp")
+        with open(tmp_path, "w") as f:
+            f.write(name)
+        os.replace(tmp_path, os.path.join(self.snapshot_dir, CURRENT_FILENAME))
+
+        for entry in os.listdir(self.snapshot_dir):
+            if entry.startswith(SNAPSHOT_DIRNAME + "-") and entry != name:
+                shutil.rmtree(os.path.join(self.snapshot_dir, entry), ignore_errors=True)
+
+    def save_snapshot(self) -> None:
+        """Write the index to disk, retraining first when it has gone stale; blocks (scripts and tests)"""
+        if self._needs_training():
+            self.train()
+        self._write_snapshot(self._snapshot_state())
+
+    async def save_snapshot_async(self) -> None:
+        """save_snapshot() with the training and the file writes in worker threads"""
+        async with self._save_lock:
+            if self._needs_training():
+                await self.train_async()
+            await asyncio.to_thread(self._write_snapshot, self._snapshot_state())
+
+    def load_snapshot(self) -> bool:
+        """Memory-map the current snapshot; returns False when there is no usable one"""
+        try:
+            with open(os.path.join(self.snapshot_dir, CURRENT_FILENAME)) as f:
+                path = os.path.join(self.snapshot_dir, f.read().strip())
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.error(f"Error reading job vector index snapshot: {str(e)}")
+            return False
+        if meta.get("version") != embedding_version():
+            logger.info("Job vector index snapshot is for another embedding version; rebuilding")
+            return False
+
+        try:
+            codes = np.load(os.path.join(path, "codes.npy"), mmap_mode="r")
+            scales = np.load(os.path.join(path, "scales.npy"), mmap_mode="r")
+            list_docnos = np.load(os.path.join(path, "list_docnos.npy"), mmap_mode="r")
+            centroids = np.load(os.path.join(path, "centroids.npy"))
+            list_offsets = np.load(os.path.join(path, "list_offsets.npy"))
+            tail_lists = np.load(os.path.join(path, "tail_lists.npy"))
+            alive = np.load(os.path.join(path, "alive.npy"))
+            job_ids = [str(job_id) for job_id in np.load(os.path.join(path, "job_ids.npy"))]
+        except Exception as e:
+            logger.error(f"Error loading job vector index snapshot: {str(e)}")
+            return False
+
+        base_size = int(meta["base_size"])
+        self._reset()
+        self._job_ids = job_ids
+        self._docnos = {job_id: docno for docno, job_id in enumerate(job_ids) if alive[docno]}
+        self._alive = np.zeros(max(len(job_ids) * 2, 1024), dtype=bool)
+        self._alive[:len(job_ids)] = alive
+        self._centroids = centroids
+        self._base_codes = codes[:base_size]
+        self._base_scales = scales[:base_size]
+        self._list_offsets = list_offsets
+        self._list_docnos = list_docnos
+        # The saved tail is copied into memory so it can keep growing
+        tail_size = len(job_ids) - base_size
+        capacity = max(256, tail_size * 2)
+        self._tail_codes = np.zeros((capacity, codes.shape[1]), dtype=np.int8)
+        self._tail_codes[:tail_size] = codes[base_size:]
+        self._tail_scales = np.zeros(capacity, dtype=np.float32)
+        self._tail_scales[:tail_size] = scales[base_size:]
+        self._tail_lists = np.zeros(capacity, dtype=np.int32)
+        self._tail_lists[:tail_size] = tail_lists
+        self._tail_size = tail_size
+        self._live = len(self._docnos)
+        self._watermark = datetime.fromisoformat(meta["watermark"]) if meta.get("watermark") else None
+        self._changed_at = {}
+        return True
+
+_job_vector_index: Optional[JobVectorIndex] = None
+
+def get_job_vector_index() -> JobVectorIndex:
+    """Get the process-wide job vector index"""
+    global _job_vector_index
+    if _job_vector_index is None:
+        _job_vector_index = JobVectorIndex()
+    return _job_vector_index
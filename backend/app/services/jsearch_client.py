@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import random
+import time
+from typing import List, Dict, Any, Optional
+
+import httpx
+
+from ..core.config import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: rate limiting and transient upstream failures
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`, so short
+    bursts go out immediately while the long-run request rate stays bounded.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = max(rate, 0.001)
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and consume it"""
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+class JSearchClient:
+    """
+    Non-blocking JSearch API client.
+
+    A single keep-alive connection pool is shared by every caller; pages of a
+    query are fetched concurrently up to `max_concurrency`, paced by a token
+    bucket, with per-request timeouts and retries with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        api_url: str = None,
+        api_key: str = None,
+        api_host: str = None,
+        max_concurrency: int = None,
+        rate_limit: float = None,
+        rate_burst: int = None,
+        timeout: float = None,
+        max_retries: int = None,
+        backoff: float = None,
+        max_retry_delay: float = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.api_url = api_url or settings.JSEARCH_API_URL
+        self.api_key = api_key if api_key is not None else settings.JSEARCH_API_KEY
+        self.api_host = api_host or settings.JSEARCH_API_HOST
+        self.max_concurrency = max(max_concurrency or settings.JSEARCH_MAX_CONCURRENCY, 1)
+        self.timeout = timeout or settings.JSEARCH_TIMEOUT_SECONDS
+        self.max_retries = settings.JSEARCH_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = settings.JSEARCH_RETRY_BACKOFF_SECONDS if backoff is None else backoff
+        self.max_retry_delay = settings.JSEARCH_MAX_RETRY_DELAY_SECONDS if max_retry_delay is None else max_retry_delay
+        self.rate_limiter = TokenBucket(
+            rate_limit or settings.JSEARCH_RATE_LIMIT,
+            rate_burst or settings.JSEARCH_RATE_BURST
+        )
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Lazily create the shared connection pool"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers={
+                    "X-RapidAPI-Key": self.api_key or "",
+                    "X-RapidAPI-Host": self.api_host
+                },
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                ),
+                transport=self._transport
+            )
+        return self._client
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """
+        Exponential backoff with jitter, honouring Retry-After when the API sends it
+
+        Either way the delay is capped at max_retry_delay, so a bogus header
+        cannot stall a scrape; negative or unparsable headers are ignored.
+        """
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    delay = float(retry_after)
+                    if delay >= 0:
+                        return min(delay, self.max_retry_delay)
+                except ValueError:
+                    pass
+        return min(self.backoff * (2 ** attempt) + random.uniform(0, self.backoff), self.max_retry_delay)
+
+    async def fetch_page(self, query: str, page: int = 1, remote_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        Fetch a single page of search results
+
+        Args:
+            query: The search query for jobs
+            page: Page number (1-based)
+            remote_only: Whether to fetch only remote jobs
+
+        Returns:
+            List of raw JSearch job records
+
+        Raises:
+            httpx.HTTPError: If the request still fails after all retries
+        """
+        params = {
+            "query": query,
+            "page": page,
+            "remote_jobs_only": "true" if remote_only else "false"
+        }
+        client = self._get_client()
+
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            try:
+                response = await client.get(self.api_url, params=params)
+                if response.status_code in RETRYABLE_STATUS_CODES and attempt < self.max_retries:
+                    delay = self._retry_delay(attempt, response)
+                    logger.warning(f"JSearch returned {response.status_code} for page {page}, retrying in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                response.raise_for_status()
+                return response.json().get("data", [])
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt)
+                logger.warning(f"JSearch request for page {page} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+        return []
+
+    async def search(self, query: str, max_pages: int = 1, remote_only: bool = False) -> List[List[Dict[str, Any]]]:
+        """
+        Fetch several pages of a query concurrently
+
+        Args:
+            query: The search query for jobs
+            max_pages: Maximum number of pages to fetch
+            remote_only: Whether to fetch only remote jobs
+
+        Returns:
+            One list of raw job records per page, in page order. Pages that
+            failed after all retries are returned as empty lists.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(page: int) -> List[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await self.fetch_page(query, page, remote_only)
+                except Exception as e:
+                    logger.error(f"Error fetching jobs for query '{query}' page {page}: {str(e)}")
+                    return []
+
+        return await asyncio.gather(*(fetch(page) for page in range(1, max_pages + 1)))
+
+    async def aclose(self) -> None:
+        """Close the shared connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+_jsearch_client: Optional[JSearchClient] = None
+
+def get_jsearch_client() -> JSearchClient:
+    """Get the process-wide JSearch client"""
+    global _jsearch_client
+    if _jsearch_client is None:
+        if not settings.JSEARCH_API_KEY:
+            logger.warning("JSEARCH_API_KEY not configured. API calls will likely fail.")
+        _jsearch_client = JSearchClient()
+    return _jsearch_client
+
+async def close_jsearch_client() -> None:
+    """Release the shared connection pool (called on application shutdown)"""
+    global _jsearch_client
+    if _jsearch_client is not None:
+        await _jsearch_client.aclose()
+        _jsearch_client = None
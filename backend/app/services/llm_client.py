@@ -0,0 +1,178 @@
+"""
+Shared LLM client used by every Gemini call site.
+
+The Gemini SDK call is blocking, so it runs on a bounded thread pool instead
+of the event loop. Calls are limited by a global semaphore and a per-feature
+one (LLM_FEATURE_CONCURRENCY), and each call has a deadline that covers the
+wait for a slot as well as the request. The SDK is configured once and model
+handles are reused.
+
+LLM_BACKEND=fake swaps Gemini for a deterministic local backend with a fixed
+latency, for testing latency and throughput offline.
+"""
+import time
+import asyncio
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, Optional
+
+from ..core.config import settings
+from ..core.metrics import metrics
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class LLMError(Exception):
+    """The LLM call failed"""
+
+class LLMUnavailable(LLMError):
+    """No LLM backend is configured"""
+
+class LLMTimeout(LLMError):
+    """The call did not finish before its deadline"""
+
+@dataclass
+class LLMResponse:
+    text: str
+    model: str
+    seconds: float
+
+_executor: Optional[ThreadPoolExecutor] = None
+_global_slots: Optional[asyncio.Semaphore] = None
+_feature_slots: Dict[str, asyncio.Semaphore] = {}
+_models: Dict[str, object] = {}
+_configured_key: Optional[str] = None
+_in_flight = 0
+
+# Feature -> function building the fake backend's response from the prompt
+_fake_responders: Dict[str, Callable[[str], str]] = {}
+
+def is_available() -> bool:
+    """Whether LLM calls can be made (fake backend, or Gemini with an API key)"""
+    return settings.LLM_BACKEND == "fake" or bool(settings.GEMINI_API_KEY)
+
+def register_fake_responder(feature: str, responder: Callable[[str], str]) -> None:
+    """Set how the fake backend answers prompts for a feature"""
+    _fake_responders[feature] = responder
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+    return _executor
+
+def _get_global_slots() -> asyncio.Semaphore:
+    global _global_slots
+    if _global_slots is None:
+        _global_slots = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+    return _global_slots
+
+def _get_feature_slots(feature: str) -> asyncio.Semaphore:
+    if feature not in _feature_slots:
+        limit = settings.LLM_FEATURE_CONCURRENCY.get(feature, settings.LLM_MAX_CONCURRENCY)
+        _feature_slots[feature] = asyncio.Semaphore(limit)
+    return _feature_slots[feature]
+
+def _get_model(model_name: str):
+    """Configured Gemini model handle, created once per model name"""
+    global _configured_key
+    import google.generativeai as genai
+
+    if _configured_key != settings.GEMINI_API_KEY:
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        _configured_key = settings.GEMINI_API_KEY
+        _models.clear()
+        logger.info("Configured Gemini client")
+    if model_name not in _models:
+        _models[model_name] = genai.GenerativeModel(model_name)
+    return _models[model_name]
+
+def _gemini_generate(model_name: str, prompt: str, timeout: float) -> str:
+    """Blocking Gemini call; runs on the executor"""
+    response = _get_model(model_name).generate_content(prompt, request_options={"timeout": timeout})
+    return response.text if hasattr(response, "text") else str(response)
+
+def _fake_response(feature: str, prompt: str) -> str:
+    responder = _fake_responders.get(feature)
+    if responder:
+        return responder(prompt)
+    return f'{{"fake": "{hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]}"}}'
+
+def _set_in_flight(delta: int) -> None:
+    global _in_flight
+    _in_flight += delta
+    metrics.set_gauge("llm.in_flight", _in_flight)
+
+async def generate(
+    prompt: str,
+    feature: str,
+    model: Optional[str] = None,
+    timeout: Optional[float] = None
+) -> LLMResponse:
+    """
+    Generate a completion for a prompt
+
+    Args:
+        prompt: The prompt text
+        feature: Calling feature (e.g. "skill_analysis"); selects the concurrency limit
+        model: Model name (defaults to LLM_MODEL)
+        timeout: Deadline in seconds, including the wait for a free slot (defaults to LLM_TIMEOUT_SECONDS)
+
+    Returns:
+        LLMResponse with the response text
+
+    Raises:
+        LLMUnavailable: No backend is configured
+        LLMTimeout: The deadline passed
+        LLMError: The backend returned an error
+    """
+    if not is_available():
+        raise LLMUnavailable("GEMINI_API_KEY is not configured")
+
+    model = model or settings.LLM_MODEL
+    timeout = timeout or settings.LLM_TIMEOUT_SECONDS
+    deadline = time.monotonic() + timeout
+
+    try:
+        return await asyncio.wait_for(_generate(prompt, feature, model, deadline), timeout=timeout)
+    except asyncio.TimeoutError:
+        metrics.increment(f"llm.{feature}.timeout")
+        raise LLMTimeout(f"LLM call for {feature} exceeded {timeout:.0f}s")
+
+async def _generate(prompt: str, feature: str, model: str, deadline: float) -> LLMResponse:
+    queued = time.monotonic()
+    async with _get_feature_slots(feature), _get_global_slots():
+        metrics.observe(f"llm.{feature}.queue_wait", time.monotonic() - queued)
+        _set_in_flight(1)
+        started = time.monotonic()
+        try:
+            if settings.LLM_BACKEND == "fake":
+                await asyncio.sleep(settings.LLM_FAKE_LATENCY_SECONDS)
+                text = _fake_response(feature, prompt)
+            else:
+                # Give the SDK the remaining budget so abandoned calls do not hold executor threads
+                remaining = max(deadline - started, 1.0)
+                text = await asyncio.get_running_loop().run_in_executor(
+                    _get_executor(), partial(_gemini_generate, model, prompt, remaining)
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            metrics.increment(f"llm.{feature}.error")
+            raise LLMError(f"{type(e).__name__}: {e}") from e
+        finally:
+            _set_in_flight(-1)
+
+    seconds = time.monotonic() - started
+    metrics.observe(f"llm.{feature}", seconds)
+    return LLMResponse(text=text, model=model, seconds=seconds)
+
+def shutdown_llm_client() -> None:
+    """Stop the executor threads; called on application shutdown"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
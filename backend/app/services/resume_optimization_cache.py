@@ -0,0 +1,103 @@
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from ..core.config import settings
+from ..core.metrics import metrics
+from ..db.mongodb import get_database
+from .skill_taxonomy import normalize_skill
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+CACHE_COLLECTION = "resume_optimization_cache"
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def optimization_cache_key(
+    resume_content: Dict[str, Any],
+    job_description: str,
+    required_skills: List[str],
+    applicant: str,
+    model: str,
+    prompt_version: str
+) -> str:
+    """
+    Cache key for one resume optimized for one job
+
+    Args:
+        resume_content: Parsed resume content the prompt is built from
+        job_description: Job description; whitespace differences are ignored
+        required_skills: Skills the job requires; order and case are ignored
+        applicant: Name and email written into the generated resume
+        model: Name of the model producing the resume
+        prompt_version: Version of the optimization prompt
+
+    Returns:
+        Hex sha256 of the parts
+    """
+    parts = (
+        prompt_version,
+        model,
+        applicant,
+        _sha256(json.dumps(resume_content, sort_keys=True, default=str)),
+        _sha256(" ".join((job_description or "").split())),
+        "\0".join(sorted({normalize_skill(skill) for skill in required_skills or [] if skill})),
+    )
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+async def get_cached_optimization(key: str) -> Optional[str]:
+    """
+    Look up a previous optimization
+
+    Args:
+        key: Cache key from optimization_cache_key
+
+    Returns:
+        ID of the stored LaTeX artifact, or None on a miss
+    """
+    if not settings.RESUME_OPTIMIZATION_CACHE_ENABLED:
+        return None
+
+    db = get_database()
+    try:
+        doc = await db[CACHE_COLLECTION].find_one({"_id": key}, {"artifact_id": 1})
+    except Exception as e:
+        logger.error(f"Error reading resume optimization cache: {str(e)}")
+        return None
+
+    metrics.increment("resume_optimization_cache.hit" if doc else "resume_optimization_cache.miss")
+    return doc["artifact_id"] if doc else None
+
+async def store_optimization(key: str, artifact_id: str, model: str, prompt_version: str) -> None:
+    """
+    Remember the artifact produced for a cache key
+
+    Entries expire RESUME_OPTIMIZATION_CACHE_TTL_SECONDS after they were
+    stored through the TTL index declared in app/db/indexes.py.
+    """
+    if not settings.RESUME_OPTIMIZATION_CACHE_ENABLED:
+        return
+
+    db = get_database()
+    try:
+        await db[CACHE_COLLECTION].update_one(
+            {"_id": key},
+            {"$set": {
+                "artifact_id": artifact_id,
+                "model": model,
+                "prompt_version": prompt_version,
+                "created_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+        metrics.increment("resume_optimization_cache.store")
+    except Exception as e:
+        logger.error(f"Error writing resume optimization cache: {str(e)}")
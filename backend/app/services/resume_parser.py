@@ -0,0 +1,147 @@
+"""
+Resume parse stage.
+
+Runs once per upload: extracts the text, normalizes it and splits it into
+sections. The result is stored as the resume's parsed_content so skill
+analysis, ATS and optimization read it instead of re-parsing the file.
+"""
+import re
+import hashlib
+import logging
+import unicodedata
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Union
+
+from .skill_matcher import common_skill_matcher
+from .text_extraction import extract_text, ExtractionCancelled
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Bump when the stored structure changes; older parses are redone on first read
+PARSER_VERSION = 1
+
+# Canonical section name -> headings that introduce it
+SECTION_HEADINGS = {
+    "summary": ["summary", "professional summary", "profile", "objective", "about me", "career objective"],
+    "experience": ["experience", "work experience", "professional experience", "employment history",
+                   "work history", "employment", "relevant experience"],
+    "education": ["education", "academic background", "education and training", "qualifications"],
+    "skills": ["skills", "technical skills", "core competencies", "key skills", "technologies", "tools"],
+    "projects": ["projects", "personal projects", "academic projects", "selected projects"],
+    "certifications": ["certifications", "certificates", "licenses and certifications", "licenses"],
+    "awards": ["awards", "honors", "honors and awards", "achievements"],
+    "publications": ["publications"],
+    "languages": ["languages"],
+    "volunteering": ["volunteer experience", "volunteering", "volunteer work"],
+    "interests": ["interests", "hobbies"],
+}
+
+_HEADING_TO_SECTION = {
+    heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings
+}
+# A heading is a short line such as "WORK EXPERIENCE" or "Skills:"
+_HEADING_PATTERN = re.compile(r"^[\W_]*([A-Za-z][A-Za-z &/]{1,40}?)[\s:\-_]*$")
+_EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+def content_hash(file_content: bytes) -> str:
+    """sha256 of the uploaded file"""
+    return hashlib.sha256(file_content).hexdigest()
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize extracted text: unicode compatibility forms, one space between
+    words, no trailing whitespace and at most one blank line in a row
+    """
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    lines = [re.sub(r"[ \t\u00a0]+", " ", line).strip() for line in text.split("\n")]
+
+    normalized: List[str] = []
+    for line in lines:
+        if line or (normalized and normalized[-1]):
+            normalized.append(line)
+    return "\n".join(normalized).strip()
+
+def _section_for_line(line: str) -> Optional[str]:
+    match = _HEADING_PATTERN.match(line)
+    if not match:
+        return None
+    return _HEADING_TO_SECTION.get(match.group(1).strip().lower().replace("&", "and"))
+
+def segment_sections(text: str) -> Dict[str, str]:
+    """
+    Split normalized resume text into sections by their headings
+
+    Text before the first recognised heading goes into "header" (usually the
+    name and contact details). Repeated headings are merged.
+    """
+    sections: Dict[str, List[str]] = {}
+    current = "header"
+    for line in text.split("\n"):
+        section = _section_for_line(line) if len(line) <= 45 else None
+        if section:
+            current = section
+            sections.setdefault(current, [])
+            continue
+        sections.setdefault(current, []).append(line)
+
+    return {name: "\n".join(lines).strip() for name, lines in sections.items() if "\n".join(lines).strip()}
+
+def build_parsed_content(text: str, file_hash: str) -> Dict[str, Any]:
+    """Structure stored as parsed_content for normalized resume text"""
+    sections = segment_sections(text)
+    header_lines = [line for line in sections.get("header", "").split("\n") if line]
+    email = _EMAIL_PATTERN.search(text)
+
+    parsed = {
+        "parser_version": PARSER_VERSION,
+        "parsed_at": datetime.utcnow(),
+        "content_hash": file_hash,
+        "text": text,
+        "sections": sections,
+        "skills": [{"name": skill} for skill in common_skill_matcher.find(text)],
+    }
+    if header_lines and not _EMAIL_PATTERN.search(header_lines[0]):
+        parsed["name"] = header_lines[0]
+    if email:
+        parsed["email"] = email.group(0)
+    return parsed
+
+async def parse_resume(
+    file_content: Union[bytes, str],
+    file_type: str,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    file_hash: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Parse an uploaded resume
+
+    Args:
+        file_content: Binary content of the file, or the path of a file on disk
+        file_type: MIME type of the file
+        is_disconnected: Optional check used to abandon extraction when the client goes away
+        file_hash: sha256 of the file when already known (required for paths)
+
+    Returns:
+        parsed_content for the resume document. When no text can be extracted
+        it holds only the hash, parser version and a parse_error.
+    """
+    if file_hash is None:
+        file_hash = content_hash(file_content)
+    try:
+        text = normalize_text(await extract_text(file_content, file_type, is_disconnected=is_disconnected))
+    except ExtractionCancelled:
+        raise
+    except Exception as e:
+        logger.error(f"Error extracting resume text: {str(e)}")
+        text = ""
+
+    if not text:
+        return {
+            "parser_version": PARSER_VERSION,
+            "parsed_at": datetime.utcnow(),
+            "content_hash": file_hash,
+            "parse_error": "Could not extract any text from the resume"
+        }
+
+    return build_parsed_content(text, file_hash)
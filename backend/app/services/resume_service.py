@@ -1,10 +1,23 @@
 from datetime import datetime
-from typing import Optional, List, Dict, Any, BinaryIO
+from typing import Optional, List, Dict, Any, BinaryIO, Callable, Awaitable, Tuple
 from bson import ObjectId
+import io
+import logging
+import os
+import tempfile
 
+import numpy as np
+
+from ..core.config import settings
 from ..db.mongodb import get_database
 from ..utils import gridfs
-from ..models.resume import ResumeCreate, ResumeInDB, Resume, ResumeVersionCreate, ResumeVersionInDB, ResumeVersion, ResumeWithVersions
+from ..models.resume import ResumeCreate, ResumeInDB, Resume, ResumeSummary, ResumeVersionCreate, ResumeVersionInDB, ResumeVersion, ResumeWithVersions
+from .resume_parser import parse_resume, PARSER_VERSION
+from .candidate_index import get_candidate_index
+from .text_embedding import embed, from_document, to_document
+
+# Set up logging
+logger = logging.getLogger(__name__)
 
 async def upload_resume(
     file_content: bytes,
@@ -16,24 +29,43 @@ async def upload_resume(
     """
     Upload a new resume for a profile or user
     """
+    buffer = io.BytesIO(file_content)
+    
+    async def read(size: int) -> bytes:
+        return buffer.read(size)
+    
+    return await upload_resume_stream(
+        read,
+        original_filename,
+        file_type,
+        profile_id=profile_id,
+        user_id=user_id
+    )
+
+async def upload_resume_stream(
+    read: Callable[[int], Awaitable[bytes]],
+    original_filename: str,
+    file_type: str,
+    profile_id: str = None,
+    user_id: str = None
+) -> Resume:
+    """
+    Upload a new resume for a profile or user from a stream (e.g. UploadFile.read)
+    
+    The file is written to GridFS chunk by chunk while being hashed and
+    copied to a temporary file, which is then parsed once; its text,
+    content hash and sections are stored as parsed_content for every later
+    consumer.
+    
+    Raises:
+        FileTooLargeError: The file is larger than MAX_UPLOAD_SIZE
+    """
     if not profile_id and not user_id:
         raise ValueError("Either profile_id or user_id must be provided")
     
     db = get_database()
     resumes_collection = db["resumes"]
     
-    # Set all existing resumes to not current
-    if profile_id:
-        await resumes_collection.update_many(
-            {"profile_id": ObjectId(profile_id)},
-            {"$set": {"is_current": False}}
-        )
-    elif user_id:
-        await resumes_collection.update_many(
-            {"user_id": ObjectId(user_id)},
-            {"$set": {"is_current": False}}
-        )
-    
     # Upload file to GridFS
     metadata = {
         "file_type": file_type,
@@ -45,16 +77,46 @@ async def upload_resume(
     if user_id:
         metadata["user_id"] = user_id
     
-    file_id = await gridfs.upload_file(file_content, original_filename, metadata)
+    # The parser reads the temporary copy in its worker process, so the
+    # upload is never held in memory as a whole. The copy is closed before
+    # parsing since Windows does not let another process open it while it is open.
+    tee = tempfile.NamedTemporaryFile(
+        prefix="resume-", suffix=os.path.splitext(original_filename or "")[1], delete=False
+    )
+    try:
+        with tee:
+            upload = await gridfs.upload_stream(
+                read,
+                original_filename,
+                metadata,
+                max_size=settings.MAX_UPLOAD_SIZE,
+                tee=tee
+            )
+        parsed_content = await parse_resume(tee.name, file_type, file_hash=upload["sha256"])
+    finally:
+        os.unlink(tee.name)
+    
+    # Set all existing resumes to not current
+    if profile_id:
+        await resumes_collection.update_many(
+            {"profile_id": ObjectId(profile_id)},
+            {"$set": {"is_current": False}}
+        )
+    elif user_id:
+        await resumes_collection.update_many(
+            {"user_id": ObjectId(user_id)},
+            {"$set": {"is_current": False}}
+        )
     
     # Create resume document
     resume_data = {
         "original_filename": original_filename,
         "file_type": file_type,
-        "file_id": file_id,
+        "file_id": upload["file_id"],
+        "file_size": upload["length"],
         "created_at": datetime.utcnow(),
         "is_current": True,
-        "parsed_content": {}  # Will be filled by parser service
+        "parsed_content": parsed_content
     }
     
     if profile_id:
@@ -130,6 +192,18 @@ async def get_resume_by_id(resume_id: str) -> Optional[Resume]:
         return Resume(**resume_data)
     return None
 
+async def is_resume_owner(resume: Resume, user_id: str) -> bool:
+    """
+    Whether a resume belongs to a user, uploaded directly or to their profile
+    """
+    if resume.user_id:
+        return str(resume.user_id) == str(user_id)
+    if resume.profile_id:
+        db = get_database()
+        profile = await db["profiles"].find_one({"_id": ObjectId(resume.profile_id)}, {"user_id": 1})
+        return bool(profile) and str(profile.get("user_id")) == str(user_id)
+    return False
+
 async def download_resume(resume_id: str) -> Optional[Dict[str, Any]]:
     """
     Download a resume file by resume ID
@@ -155,55 +229,172 @@ async def download_resume(resume_id: str) -> Optional[Dict[str, Any]]:
         "file_type": resume_data["file_type"]
     }
 
-async def get_resumes_by_profile(profile_id: str) -> List[Resume]:
+async def open_resume_download(resume_id: str) -> Optional[Dict[str, Any]]:
     """
-    Get all resumes for a profile
+    Open a resume file for streaming
+    
+    Returns:
+        Dict with the open GridFS file ("grid_out"), filename, file_type,
+        length, etag and last_modified; None if the resume or file is missing
     """
     db = get_database()
     resumes_collection = db["resumes"]
     
-    cursor = resumes_collection.find({"profile_id": ObjectId(profile_id)}).sort("created_at", -1)
-    resumes = await cursor.to_list(length=None)
+    resume_data = await resumes_collection.find_one(
+        {"_id": ObjectId(resume_id)},
+        {"file_id": 1, "original_filename": 1, "file_type": 1, "parsed_content.content_hash": 1}
+    )
+    if not resume_data:
+        return None
     
-    # Convert ObjectId fields to strings before passing to Resume model
-    formatted_resumes = []
-    for resume in resumes:
-        # Manual conversion of MongoDB ObjectIds to strings
-        if "_id" in resume and isinstance(resume["_id"], ObjectId):
-            resume["_id"] = str(resume["_id"])
-        if "user_id" in resume and isinstance(resume["user_id"], ObjectId):
-            resume["user_id"] = str(resume["user_id"])
-        if "profile_id" in resume and isinstance(resume["profile_id"], ObjectId):
-            resume["profile_id"] = str(resume["profile_id"])
-        
-        formatted_resumes.append(Resume(**resume))
+    grid_out = await gridfs.open_download(resume_data["file_id"])
+    if not grid_out:
+        return None
     
-    return formatted_resumes
+    # Prefer the content hash from the parse stage; older files may carry a GridFS md5
+    content_hash = (resume_data.get("parsed_content") or {}).get("content_hash")
+    if not content_hash:
+        file_info = await gridfs.get_file_metadata(resume_data["file_id"]) or {}
+        content_hash = file_info.get("md5") or f"{resume_data['file_id']}-{grid_out.length}"
+    
+    return {
+        "grid_out": grid_out,
+        "filename": resume_data["original_filename"],
+        "file_type": resume_data["file_type"],
+        "length": grid_out.length,
+        "etag": f'"{content_hash}"',
+        "last_modified": grid_out.upload_date
+    }
 
-async def get_resumes_by_user(user_id: str) -> List[Resume]:
+async def get_parsed_content(
+    resume_id: str,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+) -> Optional[Dict[str, Any]]:
     """
-    Get all resumes for a user
+    Get the stored parse of a resume (text, content hash, sections)
+    
+    Resumes uploaded before the parse stage existed, or parsed by an older
+    parser version, are parsed from GridFS once and stored.
+    
+    Args:
+        resume_id: ID of the resume
+        is_disconnected: Optional check used to abandon a lazy parse when the client goes away
+        
+    Returns:
+        The parsed content, or None if the resume or its file does not exist
     """
     db = get_database()
     resumes_collection = db["resumes"]
     
-    cursor = resumes_collection.find({"user_id": ObjectId(user_id)}).sort("created_at", -1)
-    resumes = await cursor.to_list(length=None)
+    resume_data = await resumes_collection.find_one({"_id": ObjectId(resume_id)}, {"parsed_content": 1, "file_id": 1, "file_type": 1})
+    if not resume_data:
+        return None
+    
+    parsed_content = resume_data.get("parsed_content") or {}
+    if parsed_content.get("parser_version") == PARSER_VERSION:
+        return parsed_content
     
-    # Convert ObjectId fields to strings before passing to Resume model
-    formatted_resumes = []
-    for resume in resumes:
-        # Manual conversion of MongoDB ObjectIds to strings
-        if "_id" in resume and isinstance(resume["_id"], ObjectId):
-            resume["_id"] = str(resume["_id"])
-        if "user_id" in resume and isinstance(resume["user_id"], ObjectId):
-            resume["user_id"] = str(resume["user_id"])
-        if "profile_id" in resume and isinstance(resume["profile_id"], ObjectId):
-            resume["profile_id"] = str(resume["profile_id"])
+    file_content = await gridfs.download_file(resume_data["file_id"])
+    if not file_content:
+        return None
+    
+    logger.info(f"Parsing resume {resume_id} (stored parser version: {parsed_content.get('parser_version')})")
+    parsed_content = await parse_resume(file_content, resume_data["file_type"], is_disconnected=is_disconnected)
+    await resumes_collection.update_one(
+        {"_id": resume_data["_id"]},
+        {"$set": {"parsed_content": parsed_content}}
+    )
+    return parsed_content
+
+async def store_resume_embedding(resume_id: str, resume_text: str, skill_names: List[str]) -> np.ndarray:
+    """
+    Compute and store the local embedding of a resume
+    
+    Args:
+        resume_id: ID of the resume
+        resume_text: Text of the resume
+        skill_names: Skills found by skill analysis
         
-        formatted_resumes.append(Resume(**resume))
+    Returns:
+        The float32 vector
+    """
+    vector = embed(resume_text, skill_names)
+    db = get_database()
+    await db["resumes"].update_one({"_id": ObjectId(resume_id)}, {"$set": {"embedding": to_document(vector)}})
+    return vector
+
+async def get_resume_embedding(resume_id: str) -> Optional[Tuple[np.ndarray, List[str]]]:
+    """
+    Get a resume's embedding and analyzed skill names
     
-    return formatted_resumes
+    Resumes analyzed before embeddings existed, or under another embedding
+    version, are embedded now and stored.
+    
+    Returns:
+        (float32 vector, skill names), or None if the resume does not exist
+    """
+    db = get_database()
+    resume_data = await db["resumes"].find_one({"_id": ObjectId(resume_id)}, {"embedding": 1})
+    if not resume_data:
+        return None
+    
+    skill_data = await db["user_skills"].find_one({"resume_id": ObjectId(resume_id)}, {"skills.name": 1})
+    skill_names = [skill.get("name", "") for skill in (skill_data or {}).get("skills", [])]
+    
+    stored = from_document(resume_data.get("embedding"))
+    if stored is not None:
+        codes, scale = stored
+        return codes.astype(np.float32) * scale, skill_names
+    
+    parsed_content = await get_parsed_content(resume_id) or {}
+    return await store_resume_embedding(resume_id, parsed_content.get("text", ""), skill_names), skill_names
+
+# Fields read for resume summaries; parsed_content is only loaded when asked for
+SUMMARY_PROJECTION = {
+    field: 1 for field in ("profile_id", "user_id", "original_filename", "file_type",
+                           "file_id", "file_size", "created_at", "is_current")
+}
+
+async def _list_resumes(query: Dict[str, Any], include_content: bool) -> List[ResumeSummary]:
+    db = get_database()
+    projection = None if include_content else SUMMARY_PROJECTION
+    cursor = db["resumes"].find(query, projection).sort("created_at", -1)
+    resumes = []
+    async for resume in cursor:
+        # Manual conversion of MongoDB ObjectIds to strings
+        for field in ("_id", "user_id", "profile_id"):
+            if isinstance(resume.get(field), ObjectId):
+                resume[field] = str(resume[field])
+        resumes.append(ResumeSummary(**resume))
+    
+    return resumes
+
+async def get_resumes_by_profile(profile_id: str, include_content: bool = False) -> List[ResumeSummary]:
+    """
+    Get all resumes for a profile, newest first
+    
+    Args:
+        profile_id: ID of the profile
+        include_content: Also load parsed_content
+    """
+    return await _list_resumes({"profile_id": ObjectId(profile_id)}, include_content)
+
+async def get_resumes_by_user(user_id: str, include_content: bool = False) -> List[ResumeSummary]:
+    """
+    Get all resumes for a user, newest first
+    
+    Args:
+        user_id: ID of the user
+        include_content: Also load parsed_content
+    """
+    return await _list_resumes({"user_id": ObjectId(user_id)}, include_content)
+
+async def count_resumes_by_user(user_id: str) -> int:
+    """
+    Count a user's resumes without loading them
+    """
+    db = get_database()
+    return await db["resumes"].count_documents({"user_id": ObjectId(user_id)})
 
 async def delete_resume(resume_id: str) -> bool:
     """
@@ -230,6 +421,7 @@ async def delete_resume(resume_id: str) -> bool:
     
     # Delete the resume document
     delete_result = await resumes_collection.delete_one({"_id": ObjectId(resume_id)})
+    get_candidate_index().remove(resume_id)
     
     return delete_result.deleted_count > 0
 
@@ -0,0 +1,109 @@
+import hashlib
+import logging
+import re
+import unicodedata
+from datetime import datetime
+from typing import Optional
+
+from ..core.config import settings
+from ..core.metrics import metrics
+from ..db.mongodb import get_database
+from ..models.skill import SkillAnalysisResult
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+CACHE_COLLECTION = "skill_analysis_cache"
+
+def normalize_resume_text(text: str) -> str:
+    """Normalize text so formatting-only differences share a cache entry"""
+    text = unicodedata.normalize("NFKC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def analysis_cache_key(resume_text: str, model: str, prompt_version: str) -> str:
+    """
+    Cache key for a skill analysis
+
+    Args:
+        resume_text: Text extracted from the resume
+        model: Name of the model producing the analysis
+        prompt_version: Version of the analysis prompt
+
+    Returns:
+        Hex sha256 of the normalized text, model and prompt version
+    """
+    digest = hashlib.sha256()
+    for part in (prompt_version, model, normalize_resume_text(resume_text)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+async def get_cached_analysis(key: str) -> Optional[SkillAnalysisResult]:
+    """
+    Look up a cached skill analysis and mark it as recently used
+
+    Args:
+        key: Cache key from analysis_cache_key
+
+    Returns:
+        The cached analysis, or None on a miss
+    """
+    if not settings.SKILL_ANALYSIS_CACHE_ENABLED:
+        return None
+
+    db = get_database()
+    try:
+        doc = await db[CACHE_COLLECTION].find_one_and_update(
+            {"_id": key},
+            {"$set": {"last_used_at": datetime.utcnow()}, "$inc": {"hits": 1}},
+            projection={"result": 1}
+        )
+    except Exception as e:
+        logger.error(f"Error reading skill analysis cache: {str(e)}")
+        return None
+
+    if not doc:
+        metrics.increment("skill_analysis_cache.miss")
+        return None
+
+    metrics.increment("skill_analysis_cache.hit")
+    return SkillAnalysisResult(**doc["result"])
+
+async def store_analysis(key: str, result: SkillAnalysisResult, model: str, prompt_version: str) -> None:
+    """
+    Store a skill analysis, evicting the least recently used entries over the size limit
+
+    Entries also expire SKILL_ANALYSIS_CACHE_TTL_SECONDS after their last use
+    through the TTL index declared in app/db/indexes.py.
+    """
+    if not settings.SKILL_ANALYSIS_CACHE_ENABLED:
+        return
+
+    db = get_database()
+    collection = db[CACHE_COLLECTION]
+    now = datetime.utcnow()
+    try:
+        await collection.update_one(
+            {"_id": key},
+            {
+                "$set": {
+                    "result": result.model_dump(mode="json"),
+                    "model": model,
+                    "prompt_version": prompt_version,
+                    "last_used_at": now
+                },
+                "$setOnInsert": {"created_at": now, "hits": 0}
+            },
+            upsert=True
+        )
+        metrics.increment("skill_analysis_cache.store")
+
+        # estimated_document_count reads collection metadata, so this check is cheap
+        overflow = await collection.estimated_document_count() - settings.SKILL_ANALYSIS_CACHE_MAX_ENTRIES
+        if overflow > 0:
+            cursor = collection.find({}, {"_id": 1}).sort("last_used_at", 1).limit(overflow)
+            stale_keys = [doc["_id"] async for doc in cursor]
+            deleted = await collection.delete_many({"_id": {"$in": stale_keys}})
+            metrics.increment("skill_analysis_cache.evicted", deleted.deleted_count)
+    except Exception as e:
+        logger.error(f"Error writing skill analysis cache: {str(e)}")
@@ -0,0 +1,164 @@
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Dict, Iterable, Mapping, Union, Tuple
+
+from .skill_taxonomy import fold_skill_name, skill_aliases
+
+# Skill dictionary used by the keyword extractors for resumes and job descriptions
+COMMON_SKILLS = [
+    # Programming Languages
+    "Python", "JavaScript", "TypeScript", "Java", "C#", "C++", "Go", "Ruby", "PHP", "Swift", "Kotlin",
+    # Web Development
+    "React", "Angular", "Vue.js", "Node.js", "Express", "Django", "Flask", "FastAPI",
+    "HTML", "CSS", "SASS", "LESS", "Bootstrap", "Tailwind CSS",
+    # Cloud & DevOps
+    "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform", "CI/CD", "Jenkins", "GitHub Actions",
+    # Databases
+    "SQL", "MongoDB", "PostgreSQL", "MySQL", "SQLite", "Redis", "Elasticsearch",
+    # Data Science & AI
+    "Machine Learning", "Deep Learning", "NLP", "TensorFlow", "PyTorch", "Keras", "scikit-learn",
+    "Data Analysis", "Data Visualization", "Pandas", "NumPy", "Matplotlib", "Tableau", "Power BI",
+    # Soft Skills
+    "Communication", "Leadership", "Teamwork", "Problem Solving", "Critical Thinking",
+    "Time Management", "Adaptability", "Creativity", "Emotional Intelligence"
+]
+
+SOFT_SKILLS = {
+    "Communication", "Leadership", "Teamwork", "Problem Solving", "Critical Thinking",
+    "Time Management", "Adaptability", "Creativity", "Emotional Intelligence"
+}
+
+# Skills commonly requested in postings, used to report what a candidate is missing
+IN_DEMAND_SKILLS = [
+    "Python", "JavaScript", "Java", "React", "Angular", "Vue.js", "Node.js",
+    "SQL", "MongoDB", "Express", "Django", "Flask", "AWS", "Azure", "GCP",
+    "Docker", "Kubernetes", "CI/CD", "Git", "Agile", "TypeScript", "Redux",
+    "REST API", "GraphQL", "NoSQL", "CSS", "HTML", "Spring", "Spring Boot", "Hibernate",
+    "Microservices", "Unit Testing", "TDD", "Ruby", "Go", "Swift"
+]
+
+@dataclass
+class SkillHit:
+    """Occurrences of one skill in a scanned text"""
+    skill: str
+    count: int = 0
+    positions: List[int] = field(default_factory=list)
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Build a regex alternation factored by common prefixes.
+
+    A trie-shaped pattern lets the regex engine test each text position against
+    all skills at once instead of trying every alternative in turn, and the
+    greedy optional groups make the longest alias win at a given position.
+    Spaces in the words match an optional space, hyphen, underscore or dot.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        terminal = "" in node
+        branches = [
+            (r"[\s\-_.]?" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if terminal else body
+
+    return build(trie)
+
+class SkillMatcher:
+    """
+    Compiled multi-pattern skill dictionary.
+
+    All aliases are folded into a single case-insensitive regex, compiled once,
+    so a text is scanned in one pass regardless of dictionary size. Matches
+    must not be glued to other word characters, which keeps "Java" from
+    matching inside "JavaScript" while still handling "C++", "C#" and "CI/CD".
+    Separators are optional, so "Vue.js" also finds "VueJS" and "vue js".
+    """
+
+    def __init__(self, skills: Union[Iterable[str], Mapping[str, Iterable[str]]]):
+        if isinstance(skills, Mapping):
+            aliases = {skill: [skill, *variants] for skill, variants in skills.items()}
+        else:
+            aliases = {skill: [skill] for skill in skills}
+
+        # Aliases are keyed by their folded form, which is also how matched text is looked up
+        self._alias_to_skill: Dict[str, str] = {}
+        patterns = set()
+        for skill, variants in aliases.items():
+            for alias in variants:
+                key = fold_skill_name(alias)
+                if key:
+                    self._alias_to_skill.setdefault(key, skill)
+                    patterns.add(" ".join(re.split(r"[\s\-_.]+", alias.strip().lower())))
+
+        self.skills = list(aliases)
+        if self._alias_to_skill:
+            pattern = r"(?<!\w)(?:" + _trie_pattern(patterns) + r")(?!\w)"
+        else:
+            pattern = r"(?!)"
+        self._pattern = re.compile(pattern, re.IGNORECASE)
+
+    def scan(self, text: str) -> Dict[str, SkillHit]:
+        """
+        Scan a text once and collect every skill occurrence
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Dict of skill name to SkillHit, in order of first occurrence
+        """
+        hits: Dict[str, SkillHit] = {}
+        if not text:
+            return hits
+
+        alias_to_skill = self._alias_to_skill
+        for match in self._pattern.finditer(text):
+            skill = alias_to_skill[fold_skill_name(match.group())]
+            hit = hits.get(skill)
+            if hit is None:
+                hit = hits[skill] = SkillHit(skill)
+            hit.count += 1
+            hit.positions.append(match.start())
+
+        return hits
+
+    def find(self, text: str) -> List[str]:
+        """Return the distinct skills present in a text, in order of first occurrence"""
+        if not text:
+            return []
+        alias_to_skill = self._alias_to_skill
+        found = {}
+        for alias in self._pattern.findall(text):
+            found.setdefault(alias_to_skill[fold_skill_name(alias)], None)
+        return list(found)
+
+    def __contains__(self, skill: str) -> bool:
+        return fold_skill_name(skill) in self._alias_to_skill
+
+@lru_cache(maxsize=256)
+def get_user_skill_matcher(skill_names: Tuple[str, ...]) -> SkillMatcher:
+    """
+    Get a compiled matcher for a user's own skills.
+
+    Skills in the taxonomy also match their aliases. Cached on the skill
+    tuple, so repeated recommendation requests for the same user reuse the
+    compiled pattern.
+    """
+    return SkillMatcher({name: skill_aliases(name) for name in skill_names if name})
+
+# Shared matchers, compiled once at import time
+common_skill_matcher = SkillMatcher({skill: skill_aliases(skill) for skill in COMMON_SKILLS})
+in_demand_skill_matcher = SkillMatcher({skill: skill_aliases(skill) for skill in IN_DEMAND_SKILLS})
@@ -1,134 +1,93 @@
 import os
-import io
 import json
 import re
-from typing import List, Dict, Any, Optional, Set
-import docx
-import PyPDF2
+from typing import List, Dict, Any, Optional, Set, Tuple, Callable, Awaitable
 import logging
 from bson import ObjectId
 from datetime import datetime
 
+from ..core.config import settings
 from ..db.mongodb import get_database
-from ..models.skill import Skill, UserSkill, SkillCategory, SkillAnalysisResult
+from ..models.skill import Skill, UserSkill, SkillCategory, SkillAnalysisResult, AnalysisTask
+from ..core.metrics import metrics
+from .skill_matcher import COMMON_SKILLS, SOFT_SKILLS, common_skill_matcher
+from .skill_taxonomy import skill_ids
+from .skill_analysis_cache import analysis_cache_key, get_cached_analysis, store_analysis
+from .text_extraction import extract_text, ExtractionCancelled
+from . import resume_service, task_queue, llm_client, candidate_index
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Gemini API client integration
-try:
-    import google.generativeai as genai
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    if GEMINI_API_KEY:
-        genai.configure(api_key=GEMINI_API_KEY)
-        print(f"Configured Gemini with API key: {GEMINI_API_KEY[:4]}...{GEMINI_API_KEY[-4:]}")
-        GEMINI_AVAILABLE = True
-    else:
-        logger.warning("Gemini API key not found in environment variables. Falling back to basic skill extraction.")
-        GEMINI_AVAILABLE = False
-except ImportError:
-    logger.warning("Google Generative AI package not installed. Falling back to basic skill extraction.")
-    GEMINI_AVAILABLE = False
-
-# Basic set of technical skills for fallback extraction
-COMMON_SKILLS = [
-    # Programming Languages
-    "Python", "JavaScript", "TypeScript", "Java", "C#", "C++", "Go", "Ruby", "PHP", "Swift", "Kotlin",
-    # Web Development
-    "React", "Angular", "Vue.js", "Node.js", "Express", "Django", "Flask", "FastAPI",
-    "HTML", "CSS", "SASS", "LESS", "Bootstrap", "Tailwind CSS",
-    # Cloud & DevOps
-    "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform", "CI/CD", "Jenkins", "GitHub Actions",
-    # Databases
-    "SQL", "MongoDB", "PostgreSQL", "MySQL", "SQLite", "Redis", "Elasticsearch",
-    # Data Science & AI
-    "Machine Learning", "Deep Learning", "NLP", "TensorFlow", "PyTorch", "Keras", "scikit-learn",
-    "Data Analysis", "Data Visualization", "Pandas", "NumPy", "Matplotlib", "Tableau", "Power BI",
-    # Soft Skills
-    "Communication", "Leadership", "Teamwork", "Problem Solving", "Critical Thinking",
-    "Time Management", "Adaptability", "Creativity", "Emotional Intelligence"
-]
+# Bump the prompt version whenever the analysis prompt changes so cached results are not reused
+SKILL_ANALYSIS_PROMPT_VERSION = "1"
 
-async def extract_text_from_file(file_content: bytes, file_type: str) -> str:
-    """Extract text from various file types."""
-    file_obj = io.BytesIO(file_content)
-    
-    if file_type == "application/pdf":
-        # Extract text from PDF
-        try:
-            pdf_reader = PyPDF2.PdfReader(file_obj)
-            text = ""
-            for page_num in range(len(pdf_reader.pages)):
-                text += pdf_reader.pages[page_num].extract_text() or ""
-            return text
-        except Exception as e:
-            logger.error(f"Error extracting text from PDF: {str(e)}")
-            return ""
-        
-    elif file_type in ["application/msword", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]:
-        # Extract text from Word document
-        try:
-            doc = docx.Document(file_obj)
-            return " ".join([para.text for para in doc.paragraphs])
-        except Exception as e:
-            logger.error(f"Error extracting text from Word document: {str(e)}")
-            return ""
-        
-    elif file_type == "text/plain":
-        # Plain text file
-        try:
-            return file_obj.read().decode("utf-8")
-        except Exception as e:
-            logger.error(f"Error reading text file: {str(e)}")
-            return ""
-        
-    else:
-        logger.warning(f"Unsupported file type: {file_type}")
-        return ""
+async def extract_text_from_file(
+    file_content: bytes,
+    file_type: str,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+) -> str:
+    """Extract text from various file types (parsed on the extraction process pool)."""
+    return await extract_text(file_content, file_type, is_disconnected=is_disconnected)
 
 async def analyze_skills_with_gemini(
-    resume_text: str
+    resume_text: str,
+    use_cache: bool = True,
+    fallback: bool = True
 ) -> SkillAnalysisResult:
     """
     Use Gemini to analyze resume text and extract skills with categorization.
     
+    Gemini results are cached by a hash of the normalized resume text, the
+    model and the prompt version, so unchanged resumes are not re-sent.
+    
     Args:
         resume_text: The text extracted from the resume
+        use_cache: Set to False to bypass the cache and force a fresh analysis
+        fallback: Set to False to raise Gemini call failures (timeouts, rate
+            limits, server errors) instead of falling back to basic extraction,
+            so a queued task can be retried
         
     Returns:
         SkillAnalysisResult containing the extracted skills by category
+        
+    Raises:
+        llm_client.LLMError: The Gemini call failed and fallback is False
     """
-    # Always reload the Gemini API key from environment
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    cache_key = analysis_cache_key(resume_text, settings.LLM_MODEL, SKILL_ANALYSIS_PROMPT_VERSION)
+    if use_cache:
+        cached = await get_cached_analysis(cache_key)
+        if cached:
+            logger.info("Using cached skill analysis")
+            return cached
+    else:
+        metrics.increment("skill_analysis_cache.bypass")
     
-    if not gemini_api_key:
-        logger.warning("GEMINI_API_KEY not found in environment. Using basic skill extraction.")
+    analysis = await _run_gemini_analysis(resume_text, fallback=fallback)
+    if not analysis:
+        # Fallback results are not cached so the next request retries Gemini
         return await basic_skill_extraction(resume_text)
     
-    # Debug log the API key (partial)
-    logger.info(f"Using Gemini API key: {gemini_api_key[:4]}...{gemini_api_key[-4:]}")
+    result, model_name = analysis
+    await store_analysis(cache_key, result, model_name, SKILL_ANALYSIS_PROMPT_VERSION)
+    return result
+
+async def _run_gemini_analysis(resume_text: str, fallback: bool = True) -> Optional[Tuple[SkillAnalysisResult, str]]:
+    """
+    Send the resume text to Gemini.
     
-    try:
-        # Import here to ensure it's loaded when needed
-        import google.generativeai as genai
-        
-        # Always reconfigure with the current API key
-        genai.configure(api_key=gemini_api_key)
-        logger.info("Gemini API configured successfully")
-            
-        # Configure Gemini model - use gemini-1.5-pro if available, fall back to gemini-pro
-        try:
-            logger.info("Attempting to use gemini-1.5-pro model")
-            model = genai.GenerativeModel('gemini-1.5-pro')
-        except Exception as e:
-            logger.warning(f"Error with gemini-1.5-pro model: {str(e)}. Trying gemini-pro...")
-            try:
-                logger.info("Attempting to use gemini-pro model")
-                model = genai.GenerativeModel('gemini-pro')
-            except Exception as e:
-                logger.error(f"Error with gemini-pro model: {str(e)}. Falling back to basic extraction.")
-                return await basic_skill_extraction(resume_text)
+    Returns:
+        (analysis, model name), or None when Gemini is unavailable or its
+        response cannot be used
         
+    Raises:
+        llm_client.LLMError: The call failed and fallback is False
+    """
+    if not llm_client.is_available():
+        logger.warning("GEMINI_API_KEY not configured. Using basic skill extraction.")
+        return None
+    
+    try:
         # Create prompt for skill extraction
         logger.info("Creating prompt for Gemini")
         prompt = f"""
@@ -167,19 +126,18 @@ async def analyze_skills_with_gemini(
         # Get response from Gemini
         try:
             logger.info("Sending request to Gemini API")
-            response = model.generate_content(prompt)
-            logger.info("Successfully got response from Gemini")
-        except Exception as e:
+            response = await llm_client.generate(prompt, feature="skill_analysis")
+            model_name = response.model
+            logger.info(f"Got response from Gemini in {response.seconds:.1f}s")
+        except llm_client.LLMError as e:
             logger.error(f"Error generating content with Gemini: {str(e)}")
-            return await basic_skill_extraction(resume_text)
+            if not fallback:
+                raise
+            return None
         
         # Parse the response to extract JSON
         try:
-            # Try to directly parse if the response contains valid JSON
-            if hasattr(response, 'text'):
-                response_text = response.text
-            else:
-                response_text = str(response)
+            response_text = response.text
                 
             # Extract JSON from response if needed
             json_str = extract_json_from_text(response_text)
@@ -232,18 +190,20 @@ async def analyze_skills_with_gemini(
                         )
                     )
             
-            return result
+            return result, model_name
             
         except (json.JSONDecodeError, KeyError) as e:
             logger.error(f"Error parsing Gemini response: {str(e)}")
             logger.error(f"Response text: {response_text}")
             # Fall back to basic extraction
-            return await basic_skill_extraction(resume_text)
+            return None
     
+    except llm_client.LLMError:
+        raise
     except Exception as e:
         logger.error(f"Error using Gemini for skill analysis: {str(e)}")
         # Fall back to basic extraction
-        return await basic_skill_extraction(resume_text)
+        return None
 
 def extract_json_from_text(text: str) -> str:
     """
@@ -264,43 +224,36 @@ async def basic_skill_extraction(resume_text: str) -> SkillAnalysisResult:
     """
     result = SkillAnalysisResult()
     
-    # Simple pattern matching for skills from our predefined list
-    for skill in COMMON_SKILLS:
-        # Use word boundaries to match whole words
-        pattern = r'\b' + re.escape(skill) + r'\b'
-        matches = re.findall(pattern, resume_text, re.IGNORECASE)
-        
-        if matches:
-            # Calculate a simple confidence based on number of matches
-            confidence = min(0.5 + (len(matches) * 0.1), 0.95)
-            
-            # Categorize based on some heuristics
-            if skill in ["Communication", "Leadership", "Teamwork", "Problem Solving", 
-                        "Critical Thinking", "Time Management", "Adaptability", 
-                        "Creativity", "Emotional Intelligence"]:
-                result.soft_skills.append(
-                    Skill(
-                        name=skill,
-                        category=SkillCategory.SOFT,
-                        confidence=confidence
-                    )
+    # Single pass over the resume for every skill in our predefined list
+    for skill, hit in common_skill_matcher.scan(resume_text).items():
+        # Calculate a simple confidence based on number of matches
+        confidence = min(0.5 + (hit.count * 0.1), 0.95)
+        
+        # Categorize based on some heuristics
+        if skill in SOFT_SKILLS:
+            result.soft_skills.append(
+                Skill(
+                    name=skill,
+                    category=SkillCategory.SOFT,
+                    confidence=confidence
                 )
-            elif "certified" in skill.lower() or "certification" in skill.lower():
-                result.certifications.append(
-                    Skill(
-                        name=skill,
-                        category=SkillCategory.CERTIFICATION,
-                        confidence=confidence
-                    )
+            )
+        elif "certified" in skill.lower() or "certification" in skill.lower():
+            result.certifications.append(
+                Skill(
+                    name=skill,
+                    category=SkillCategory.CERTIFICATION,
+                    confidence=confidence
                 )
-            else:
-                result.technical_skills.append(
-                    Skill(
-                        name=skill,
-                        category=SkillCategory.TECHNICAL,
-                        confidence=confidence
-                    )
+            )
+        else:
+            result.technical_skills.append(
+                Skill(
+                    name=skill,
+                    category=SkillCategory.TECHNICAL,
+                    confidence=confidence
                 )
+            )
     
     return result
 
@@ -312,31 +265,49 @@ def ensure_string_id(value):
 
 async def analyze_resume_skills(
     resume_id: str,
-    file_content: bytes,
-    file_type: str,
+    file_content: Optional[bytes] = None,
+    file_type: Optional[str] = None,
     user_id: Optional[str] = None,
-    profile_id: Optional[str] = None
+    profile_id: Optional[str] = None,
+    use_cache: bool = True,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    resume_text: Optional[str] = None,
+    fallback: bool = True
 ) -> UserSkill:
     """
     Main function to analyze a resume and extract skills.
     Stores the results in the database.
     
+    The text stored on the resume at upload time is used unless resume_text
+    or the file content is passed in.
+    
     Args:
         resume_id: The ID of the uploaded resume
-        file_content: Binary content of the resume file
+        file_content: Binary content of the resume file, to extract the text from it
         file_type: MIME type of the file
         user_id: User ID if resume is linked directly to user
         profile_id: Profile ID if resume is linked to a profile
+        use_cache: Set to False to bypass the skill analysis cache
+        is_disconnected: Optional check used to abandon text extraction when the client goes away
+        resume_text: Already extracted resume text
+        fallback: Set to False to raise Gemini call failures instead of
+            falling back to basic extraction
         
     Returns:
         UserSkill object containing the extracted skills
     """
-    # Extract text from file
-    try:
-        resume_text = await extract_text_from_file(file_content, file_type)
-    except Exception as e:
-        logger.error(f"Error extracting text from resume {resume_id}: {str(e)}")
-        raise ValueError(f"Failed to extract text from resume: {str(e)}")
+    if resume_text is None:
+        try:
+            if file_content is not None:
+                resume_text = await extract_text_from_file(file_content, file_type, is_disconnected=is_disconnected)
+            else:
+                parsed_content = await resume_service.get_parsed_content(resume_id, is_disconnected=is_disconnected)
+                resume_text = (parsed_content or {}).get("text", "")
+        except ExtractionCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"Error extracting text from resume {resume_id}: {str(e)}")
+            raise ValueError(f"Failed to extract text from resume: {str(e)}")
     
     if not resume_text.strip():
         logger.error(f"Failed to extract text from resume {resume_id} - extracted text is empty")
@@ -344,7 +315,7 @@ async def analyze_resume_skills(
     
     # Analyze skills using Gemini
     try:
-        skill_analysis = await analyze_skills_with_gemini(resume_text)
+        skill_analysis = await analyze_skills_with_gemini(resume_text, use_cache=use_cache, fallback=fallback)
         
         if not skill_analysis or not any([
             skill_analysis.technical_skills,
@@ -353,6 +324,8 @@ async def analyze_resume_skills(
             skill_analysis.certifications
         ]):
             logger.warning(f"No skills found in resume {resume_id}")
+    except llm_client.LLMError:
+        raise
     except Exception as e:
         logger.error(f"Error in skill analysis for resume {resume_id}: {str(e)}")
         raise ValueError(f"Skill analysis failed: {str(e)}")
@@ -367,7 +340,8 @@ async def analyze_resume_skills(
         resume_id=resume_id_str,
         user_id=user_id_str,
         profile_id=profile_id_str,
-        skills=skill_analysis.all_skills()
+        skills=skill_analysis.all_skills(),
+        skill_ids=skill_ids(skill.name for skill in skill_analysis.all_skills())
     )
     
     # Store in database
@@ -394,15 +368,79 @@ async def analyze_resume_skills(
         
         # Update the ID and return
         user_skill.id = str(result.inserted_id)
-        
-        # Log success
-        skill_count = len(user_skill.skills)
-        logger.info(f"Successfully analyzed resume {resume_id} and found {skill_count} skills")
-        
-        return user_skill
     except Exception as e:
         logger.error(f"Database error during skill storage for resume {resume_id}: {str(e)}")
         raise ValueError(f"Failed to store skills in database: {str(e)}")
+    
+    # Keep recruiter candidate ranking up to date; a failure here is caught up later
+    try:
+        await candidate_index.index_analyzed_resume(user_skill, resume_text)
+    except Exception as e:
+        logger.error(f"Error updating candidate index for resume {resume_id}: {str(e)}")
+    
+    # Store the resume's local embedding for semantic job matching; computed on first use if this fails
+    try:
+        await resume_service.store_resume_embedding(resume_id, resume_text, [skill.name for skill in user_skill.skills])
+    except Exception as e:
+        logger.error(f"Error storing embedding for resume {resume_id}: {str(e)}")
+    
+    # Log success
+    skill_count = len(user_skill.skills)
+    logger.info(f"Successfully analyzed resume {resume_id} and found {skill_count} skills")
+    
+    return user_skill
+
+ANALYSIS_TASK_TYPE = "analyze_resume_skills"
+
+async def queue_resume_analysis(
+    resume_id: str,
+    user_id: Optional[str] = None,
+    profile_id: Optional[str] = None
+) -> str:
+    """
+    Queue skill analysis of a resume for the worker (python -m app.worker)
+    
+    Returns:
+        ID of the queued task
+    """
+    return await task_queue.enqueue(
+        ANALYSIS_TASK_TYPE,
+        {"resume_id": resume_id, "user_id": user_id, "profile_id": profile_id},
+        key=resume_id
+    )
+
+async def run_analysis_task(payload: Dict[str, Any], final_attempt: bool = True) -> Dict[str, Any]:
+    """
+    Worker handler for queued resume analysis
+    
+    Resumes without extractable text are dead-lettered straight away since
+    retrying cannot help; other failures are retried by the queue. A failed
+    Gemini call is retried too, and only the final attempt falls back to
+    basic skill extraction.
+    """
+    parsed_content = await resume_service.get_parsed_content(payload["resume_id"])
+    if parsed_content is None:
+        raise task_queue.PermanentTaskError("Resume not found")
+    if not parsed_content.get("text", "").strip():
+        raise task_queue.PermanentTaskError(parsed_content.get("parse_error") or "Resume has no text")
+    
+    user_skill = await analyze_resume_skills(
+        resume_id=payload["resume_id"],
+        user_id=payload.get("user_id"),
+        profile_id=payload.get("profile_id"),
+        resume_text=parsed_content["text"],
+        fallback=final_attempt
+    )
+    return {"user_skill_id": user_skill.id, "skill_count": len(user_skill.skills)}
+
+async def get_resume_analysis_task(resume_id: str) -> Optional[AnalysisTask]:
+    """
+    Get the status of the latest queued analysis of a resume
+    """
+    task = await task_queue.get_latest_task(ANALYSIS_TASK_TYPE, resume_id)
+    if not task:
+        return None
+    return AnalysisTask(resume_id=resume_id, **task)
 
 async def get_skills_by_resume(resume_id: str) -> Optional[UserSkill]:
     """
@@ -0,0 +1,157 @@
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Canonical skills and the other spellings that mean the same skill. A skill's
+# id is its position in this list plus one, and ids are stored on jobs and
+# user skills: only ever append, never reorder or remove entries.
+SKILL_TAXONOMY: List[Tuple[str, Tuple[str, ...]]] = [
+    # Programming Languages
+    ("Python", ()),
+    ("JavaScript", ("JS",)),
+    ("TypeScript", ()),
+    ("Java", ()),
+    ("C#", ("C Sharp", "CSharp")),
+    ("C++", ("CPP",)),
+    ("Go", ("Golang",)),
+    ("Ruby", ()),
+    ("PHP", ()),
+    ("Swift", ()),
+    ("Kotlin", ()),
+    # Web Development
+    ("React", ("ReactJS", "React.js")),
+    ("Angular", ("AngularJS", "Angular.js")),
+    ("Vue.js", ("Vue", "VueJS")),
+    ("Node.js", ("NodeJS",)),
+    ("Express", ("Express.js", "ExpressJS")),
+    ("Django", ()),
+    ("Flask", ()),
+    ("FastAPI", ()),
+    ("HTML", ("HTML5",)),
+    ("CSS", ("CSS3",)),
+    ("SASS", ("SCSS",)),
+    ("LESS", ()),
+    ("Bootstrap", ()),
+    ("Tailwind CSS", ("Tailwind", "TailwindCSS")),
+    # Cloud & DevOps
+    ("AWS", ("Amazon Web Services",)),
+    ("Azure", ("Microsoft Azure",)),
+    ("GCP", ("Google Cloud", "Google Cloud Platform")),
+    ("Docker", ()),
+    ("Kubernetes", ("K8s",)),
+    ("Terraform", ()),
+    ("CI/CD", ("CICD",)),
+    ("Jenkins", ()),
+    ("GitHub Actions", ()),
+    # Databases
+    ("SQL", ()),
+    ("MongoDB", ("Mongo",)),
+    ("PostgreSQL", ("Postgres",)),
+    ("MySQL", ()),
+    ("SQLite", ()),
+    ("Redis", ()),
+    ("Elasticsearch", ("Elastic Search",)),
+    # Data Science & AI
+    ("Machine Learning", ()),
+    ("Deep Learning", ()),
+    ("NLP", ("Natural Language Processing",)),
+    ("TensorFlow", ()),
+    ("PyTorch", ()),
+    ("Keras", ()),
+    ("scikit-learn", ("sklearn",)),
+    ("Data Analysis", ()),
+    ("Data Visualization", ("Data Visualisation",)),
+    ("Pandas", ()),
+    ("NumPy", ()),
+    ("Matplotlib", ()),
+    ("Tableau", ()),
+    ("Power BI", ()),
+    # Soft Skills
+    ("Communication", ()),
+    ("Leadership", ()),
+    ("Teamwork", ()),
+    ("Problem Solving", ()),
+    ("Critical Thinking", ()),
+    ("Time Management", ()),
+    ("Adaptability", ()),
+    ("Creativity", ()),
+    ("Emotional Intelligence", ()),
+    # Frequently requested in postings
+    ("Git", ()),
+    ("Agile", ()),
+    ("Redux", ()),
+    ("REST API", ("REST APIs", "RESTful API", "RESTful APIs")),
+    ("GraphQL", ()),
+    ("NoSQL", ()),
+    ("Spring", ("Spring Framework",)),
+    ("Hibernate", ()),
+    ("Microservices", ("Microservice",)),
+    ("Unit Testing", ("Unit Tests",)),
+    ("TDD", ("Test Driven Development",)),
+    # Related to Spring but a skill of its own
+    ("Spring Boot", ()),
+]
+
+# Skills outside the taxonomy (the LLM names whatever it finds) get an id from
+# a hash of their key, offset past the taxonomy range, so every process and
+# restart agrees on it without a shared registry
+EXTERNAL_ID_BASE = 1 << 32
+
+# Separators that do not tell skills apart: "Vue JS", "vue-js" and "VueJS"
+_SEPARATORS = re.compile(r"[\s\-_.]+")
+
+def fold_skill_name(name: str) -> str:
+    """Lower-case a skill name and drop separators and the backslashes of regex-escaped names ("C\\+\\+")"""
+    return _SEPARATORS.sub("", name.replace("\\", "").lower())
+
+_ids_by_key: Dict[str, int] = {}
+_canonical_names: List[str] = []
+for _skill_id, (_name, _aliases) in enumerate(SKILL_TAXONOMY, start=1):
+    _canonical_names.append(_name)
+    for _alias in (_name, *_aliases):
+        _ids_by_key.setdefault(fold_skill_name(_alias), _skill_id)
+
+@lru_cache(maxsize=8192)
+def _resolve(name: str) -> Tuple[str, int]:
+    key = fold_skill_name(name)
+    skill_id = _ids_by_key.get(key)
+    if skill_id is not None:
+        return _canonical_names[skill_id - 1].lower(), skill_id
+    return key, EXTERNAL_ID_BASE + zlib.crc32(key.encode("utf-8"))
+
+def normalize_skill(skill: str) -> str:
+    """
+    Key a skill is compared by
+
+    Aliases resolve to their canonical skill ("Vue", "VueJS" -> "vue.js");
+    other names are lower-cased with spaces, hyphens and dots removed.
+    """
+    return _resolve(skill)[0]
+
+def skill_id(skill: str) -> int:
+    """Stable integer id of a skill; aliases share the id of their canonical skill"""
+    return _resolve(skill)[1]
+
+def skill_ids(skills: Iterable[str]) -> List[int]:
+    """Sorted, distinct ids of a list of skill names"""
+    return sorted({_resolve(skill)[1] for skill in skills if skill and skill.strip()})
+
+def canonical_skill(skill: str) -> str:
+    """Display name of a skill: the canonical name for taxonomy skills, else the name as given"""
+    skill_id = _resolve(skill)[1]
+    return _canonical_names[skill_id - 1] if skill_id < EXTERNAL_ID_BASE else skill.strip()
+
+def skill_aliases(skill: str) -> List[str]:
+    """Spellings to look for in text for a skill, canonical name first"""
+    skill_id = _resolve(skill)[1]
+    if skill_id >= EXTERNAL_ID_BASE:
+        return [skill.strip()]
+    name, aliases = SKILL_TAXONOMY[skill_id - 1]
+    return [name, *aliases]
+
+def skill_name(skill_id: int) -> Optional[str]:
+    """Canonical name of a taxonomy id, or None for ids of skills outside the taxonomy"""
+    if 1 <= skill_id <= len(_canonical_names):
+        return _canonical_names[skill_id - 1]
+    return None
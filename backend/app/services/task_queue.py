@@ -0,0 +1,213 @@
+"""
+Durable work queue stored in MongoDB.
+
+Tasks are claimed atomically with find_one_and_update and held under a
+lease that the worker renews while it runs. A task whose lease expires (the
+worker died) becomes claimable again. Failures are retried with exponential
+backoff until max_attempts, after which the task is dead-lettered.
+
+Workers run separately from the API: python -m app.worker
+"""
+import random
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from ..core.config import settings
+from ..db.mongodb import get_database
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+TASKS_COLLECTION = "task_queue"
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_DEAD = "dead"
+
+class PermanentTaskError(Exception):
+    """A failure that retrying cannot fix; the task is dead-lettered immediately"""
+
+def _backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with jitter for the retry after the given attempt"""
+    delay = min(settings.TASK_RETRY_BASE_SECONDS * (2 ** (attempts - 1)), settings.TASK_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+async def enqueue(
+    task_type: str,
+    payload: Dict[str, Any],
+    key: Optional[str] = None,
+    max_attempts: Optional[int] = None
+) -> str:
+    """
+    Add a task to the queue
+
+    Args:
+        task_type: Handler name, e.g. "analyze_resume_skills"
+        payload: Arguments for the handler
+        key: What the task is about (e.g. a resume ID), used to look up its status
+        max_attempts: Attempts before the task is dead-lettered
+
+    Returns:
+        ID of the task
+    """
+    db = get_database()
+    now = datetime.utcnow()
+    task = {
+        "type": task_type,
+        "key": key,
+        "payload": payload,
+        "status": STATUS_QUEUED,
+        "attempts": 0,
+        "max_attempts": max_attempts or settings.TASK_MAX_ATTEMPTS,
+        "run_at": now,
+        "lease_expires_at": None,
+        "worker_id": None,
+        "last_error": None,
+        "result": None,
+        "created_at": now,
+        "updated_at": now
+    }
+    result = await db[TASKS_COLLECTION].insert_one(task)
+    logger.info(f"Queued {task_type} task {result.inserted_id} for {key}")
+    return str(result.inserted_id)
+
+async def claim(worker_id: str, task_types: List[str], lease_seconds: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Atomically claim the next due task
+
+    Queued tasks whose run_at has passed are taken oldest first; running tasks
+    whose lease expired are reclaimed. An expired task that has used all of its
+    attempts (its worker keeps dying on it) is dead-lettered instead.
+
+    Returns:
+        The claimed task document, or None when nothing is due
+    """
+    db = get_database()
+    now = datetime.utcnow()
+    lease = timedelta(seconds=lease_seconds or settings.TASK_LEASE_SECONDS)
+    expired = {"status": STATUS_RUNNING, "type": {"$in": task_types}, "lease_expires_at": {"$lt": now}}
+
+    exhausted = await db[TASKS_COLLECTION].update_many(
+        {**expired, "$expr": {"$gte": ["$attempts", "$max_attempts"]}},
+        {"$set": {
+            "status": STATUS_DEAD,
+            "last_error": "Lease expired on the final attempt",
+            "lease_expires_at": None,
+            "finished_at": now,
+            "updated_at": now
+        }}
+    )
+    if exhausted.modified_count:
+        logger.error(f"Dead-lettered {exhausted.modified_count} tasks whose lease expired on the final attempt")
+
+    for query in (
+        {"status": STATUS_QUEUED, "type": {"$in": task_types}, "run_at": {"$lte": now}},
+        expired,
+    ):
+        task = await db[TASKS_COLLECTION].find_one_and_update(
+            query,
+            {
+                "$set": {
+                    "status": STATUS_RUNNING,
+                    "worker_id": worker_id,
+                    "lease_expires_at": now + lease,
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if task:
+            return task
+    return None
+
+async def renew_lease(task_id: ObjectId, worker_id: str, lease_seconds: Optional[float] = None) -> bool:
+    """
+    Extend the lease on a running task
+
+    Returns:
+        False if the task is no longer held by this worker
+    """
+    db = get_database()
+    now = datetime.utcnow()
+    result = await db[TASKS_COLLECTION].update_one(
+        {"_id": task_id, "status": STATUS_RUNNING, "worker_id": worker_id},
+        {"$set": {
+            "lease_expires_at": now + timedelta(seconds=lease_seconds or settings.TASK_LEASE_SECONDS),
+            "updated_at": now
+        }}
+    )
+    return result.matched_count > 0
+
+async def complete(task_id: ObjectId, worker_id: str, result: Optional[Dict[str, Any]] = None) -> bool:
+    """Mark a task as succeeded; ignored if the task was reclaimed by another worker"""
+    db = get_database()
+    now = datetime.utcnow()
+    update = await db[TASKS_COLLECTION].update_one(
+        {"_id": task_id, "status": STATUS_RUNNING, "worker_id": worker_id},
+        {"$set": {
+            "status": STATUS_SUCCEEDED,
+            "result": result,
+            "last_error": None,
+            "lease_expires_at": None,
+            "finished_at": now,
+            "updated_at": now
+        }}
+    )
+    return update.matched_count > 0
+
+async def fail(task: Dict[str, Any], worker_id: str, error: str, permanent: bool = False) -> str:
+    """
+    Record a failed attempt, scheduling a retry or dead-lettering the task
+
+    Returns:
+        The task's new status
+    """
+    db = get_database()
+    now = datetime.utcnow()
+
+    if permanent or task["attempts"] >= task["max_attempts"]:
+        update = {
+            "status": STATUS_DEAD,
+            "lease_expires_at": None,
+            "finished_at": now
+        }
+        logger.error(f"Task {task['_id']} ({task['type']}) dead after {task['attempts']} attempts: {error}")
+    else:
+        delay = _backoff_seconds(task["attempts"])
+        update = {
+            "status": STATUS_QUEUED,
+            "run_at": now + timedelta(seconds=delay),
+            "lease_expires_at": None,
+            "worker_id": None
+        }
+        logger.warning(f"Task {task['_id']} ({task['type']}) attempt {task['attempts']} failed, retrying in {delay:.0f}s: {error}")
+
+    update.update({"last_error": error, "updated_at": now})
+    await db[TASKS_COLLECTION].update_one(
+        {"_id": task["_id"], "status": STATUS_RUNNING, "worker_id": worker_id},
+        {"$set": update}
+    )
+    return update["status"]
+
+def _task_from_doc(doc: Dict[str, Any]) -> Dict[str, Any]:
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+async def get_task(task_id: str) -> Optional[Dict[str, Any]]:
+    """Get a task by ID"""
+    db = get_database()
+    doc = await db[TASKS_COLLECTION].find_one({"_id": ObjectId(task_id)})
+    return _task_from_doc(doc) if doc else None
+
+async def get_latest_task(task_type: str, key: str) -> Optional[Dict[str, Any]]:
+    """Get the most recent task of a type for a key (e.g. the last analysis of a resume)"""
+    db = get_database()
+    doc = await db[TASKS_COLLECTION].find_one({"key": key, "type": task_type}, sort=[("created_at", -1)])
+    return _task_from_doc(doc) if doc else None
@@ -0,0 +1,125 @@
+import math
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from bson import Binary
+
+from ..core.config import settings
+from .ats_engine import STOPWORDS
+from .job_search_index import tokenize
+from .skill_matcher import common_skill_matcher
+from .skill_taxonomy import normalize_skill
+
+# Bump when features or weights change so stored vectors are recomputed
+EMBEDDING_VERSION = 3
+
+# Weight of each feature family: words, adjacent word pairs, character
+# trigrams of words (so reactjs is near react and postgres near postgresql),
+# skills, and the skill families below
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.7
+TRIGRAM_WEIGHT = 0.25
+SKILL_WEIGHT = 2.0
+FAMILY_WEIGHT = 1.5
+
+# Related skills share a family feature, so a Flask resume lands near a
+# Django posting even though neither names the other
+SKILL_FAMILIES: Dict[str, Tuple[str, ...]] = {
+    "python": ("python", "django", "flask", "fastapi", "pandas", "numpy", "scikit-learn"),
+    "javascript": ("javascript", "typescript", "node.js", "express", "react", "angular", "vue.js"),
+    "frontend": ("react", "angular", "vue.js", "html", "css", "sass", "less", "bootstrap", "tailwind css"),
+    "backend": ("node.js", "express", "django", "flask", "fastapi", "java", "go", "ruby", "php", "c#"),
+    "mobile": ("swift", "kotlin"),
+    "jvm": ("java", "kotlin", "spring", "spring boot", "hibernate"),
+    "systems": ("c++", "go", "c#", "java"),
+    "cloud": ("aws", "azure", "gcp", "terraform"),
+    "containers": ("docker", "kubernetes", "ci/cd", "jenkins", "github actions"),
+    "sql": ("sql", "postgresql", "mysql", "sqlite"),
+    "nosql": ("mongodb", "redis", "elasticsearch"),
+    "ml": ("machine learning", "deep learning", "nlp", "tensorflow", "pytorch", "keras", "scikit-learn"),
+    "data": ("data analysis", "data visualization", "pandas", "numpy", "matplotlib", "tableau", "power bi", "sql"),
+}
+
+_FAMILIES_BY_SKILL: Dict[str, Tuple[str, ...]] = {}
+for _family, _skills in SKILL_FAMILIES.items():
+    for _skill in _skills:
+        _FAMILIES_BY_SKILL[_skill] = _FAMILIES_BY_SKILL.get(_skill, ()) + (_family,)
+
+def embedding_version() -> str:
+    """Version stored with every vector; vectors of another version or size are recomputed"""
+    return f"{EMBEDDING_VERSION}:{settings.EMBEDDING_DIM}"
+
+def _features(text: Optional[str], skills: Iterable[str]) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+    tokens = [token for token in tokenize(text) if token not in STOPWORDS]
+    words = Counter(tokens)
+    for word, count in words.items():
+        tf = 1.0 + math.log(count)
+        weights["w:" + word] = WORD_WEIGHT * tf
+        padded = f"<{word}>"
+        for i in range(len(padded) - 2):
+            key = "c:" + padded[i:i + 3]
+            weights[key] = weights.get(key, 0.0) + TRIGRAM_WEIGHT * tf
+    for pair, count in Counter(zip(tokens, tokens[1:])).items():
+        weights["b:" + " ".join(pair)] = BIGRAM_WEIGHT * (1.0 + math.log(count))
+
+    skill_keys = {normalize_skill(skill) for skill in common_skill_matcher.find(text)}
+    skill_keys.update(normalize_skill(skill) for skill in skills if skill and skill.strip())
+    for key in skill_keys:
+        weights["s:" + key] = SKILL_WEIGHT
+        for family in _FAMILIES_BY_SKILL.get(key, ()):
+            weights["f:" + family] = weights.get("f:" + family, 0.0) + FAMILY_WEIGHT
+    return weights
+
+def embed(text: Optional[str], skills: Iterable[str] = ()) -> np.ndarray:
+    """
+    Embed a job or resume into a fixed-size unit vector, locally
+
+    Features are hashed into EMBEDDING_DIM signed buckets (the hashing
+    trick), so there is no vocabulary to train or ship, and the result only
+    depends on the text: every process and every restart agrees.
+
+    Args:
+        text: Job or resume text
+        skills: Skills known for it beyond those the dictionary finds in the text
+
+    Returns:
+        float32 vector of norm 1, or all zeros for an empty text
+    """
+    dim = settings.EMBEDDING_DIM
+    features = _features(text, skills)
+    vector = np.zeros(dim, dtype=np.float32)
+    if not features:
+        return vector
+
+    hashes = np.fromiter(
+        (zlib.crc32(feature.encode("utf-8")) for feature in features), dtype=np.uint32, count=len(features)
+    )
+    weights = np.fromiter(features.values(), dtype=np.float32, count=len(features))
+    # The top hash bit picks the sign so collisions cancel out rather than pile up
+    signs = np.where(hashes >> np.uint32(31), -1.0, 1.0).astype(np.float32)
+    vector += np.bincount(hashes % dim, weights * signs, minlength=dim).astype(np.float32)
+
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+def quantize(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+    """int8 codes and the scale that turns them back into the vector"""
+    peak = float(np.abs(vector).max()) if len(vector) else 0.0
+    if peak == 0.0:
+        return np.zeros(len(vector), dtype=np.int8), 0.0
+    scale = peak / 127.0
+    return np.clip(np.rint(vector / scale), -127, 127).astype(np.int8), scale
+
+def to_document(vector: np.ndarray) -> Dict[str, Any]:
+    """Stored form of a vector: int8 codes, scale and version (about EMBEDDING_DIM bytes)"""
+    codes, scale = quantize(vector)
+    return {"v": embedding_version(), "scale": scale, "codes": Binary(codes.tobytes())}
+
+def from_document(doc: Optional[Dict[str, Any]]) -> Optional[Tuple[np.ndarray, float]]:
+    """int8 codes and scale of a stored vector, or None if missing or of another version"""
+    if not doc or doc.get("v") != embedding_version():
+        return None
+    return np.frombuffer(bytes(doc["codes"]), dtype=np.int8), float(doc["scale"])
@@ -0,0 +1,228 @@
+"""
+Document text extraction on a bounded process pool.
+
+PDF and Word parsing is CPU bound, so it runs in worker processes instead of
+the event loop. Each document gets a page cap and a time budget; a worker that
+overruns its budget is killed by recycling the pool.
+"""
+import io
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Awaitable, BinaryIO, Callable, Optional, Union
+
+import docx
+import PyPDF2
+
+from ..core.config import settings
+from ..core.metrics import metrics
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+PDF_TYPE = "application/pdf"
+WORD_TYPES = ["application/msword", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]
+TEXT_TYPE = "text/plain"
+
+# Extra time the pool gets beyond the in-worker deadline before the worker is killed
+KILL_GRACE_SECONDS = 5.0
+DISCONNECT_POLL_SECONDS = 0.5
+
+class ExtractionTimeout(Exception):
+    """The document could not be parsed within its time budget"""
+
+class ExtractionCancelled(Exception):
+    """The client went away before extraction finished"""
+
+def _extract_text_sync(source: Union[bytes, str], file_type: str, max_pages: int, timeout: float) -> str:
+    """
+    Extract text in a worker process
+
+    Runs at module level so it can be pickled to the pool. The source is the
+    file content or the path of a file on disk, which spares copying large
+    uploads to the worker.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as file_obj:
+            return _extract_from_file_obj(file_obj, file_type, max_pages, timeout)
+    return _extract_from_file_obj(io.BytesIO(source), file_type, max_pages, timeout)
+
+def _extract_from_file_obj(file_obj: BinaryIO, file_type: str, max_pages: int, timeout: float) -> str:
+    """
+    Extract text from an open file. The deadline is checked between PDF pages,
+    so a long document stops early instead of tying up the worker.
+    """
+    deadline = time.monotonic() + timeout
+
+    if file_type == PDF_TYPE:
+        try:
+            pdf_reader = PyPDF2.PdfReader(file_obj)
+            page_count = len(pdf_reader.pages)
+            if page_count > max_pages:
+                logger.warning(f"PDF has {page_count} pages; extracting the first {max_pages}")
+
+            parts = []
+            for page_num in range(min(page_count, max_pages)):
+                if time.monotonic() > deadline:
+                    raise ExtractionTimeout(f"PDF extraction exceeded {timeout:.0f}s after {page_num} pages")
+                parts.append(pdf_reader.pages[page_num].extract_text() or "")
+            return "\n".join(parts)
+        except ExtractionTimeout:
+            raise
+        except Exception as e:
+            logger.error(f"Error extracting text from PDF: {str(e)}")
+            return ""
+
+    elif file_type in WORD_TYPES:
+        try:
+            doc = docx.Document(file_obj)
+            return " ".join([para.text for para in doc.paragraphs])
+        except Exception as e:
+            logger.error(f"Error extracting text from Word document: {str(e)}")
+            return ""
+
+    elif file_type == TEXT_TYPE:
+        try:
+            return file_obj.read().decode("utf-8")
+        except Exception as e:
+            logger.error(f"Error reading text file: {str(e)}")
+            return ""
+
+    else:
+        logger.warning(f"Unsupported file type: {file_type}")
+        return ""
+
+_pool: Optional[ProcessPoolExecutor] = None
+_slots: Optional[asyncio.Semaphore] = None
+_pending = 0
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn keeps the workers free of the parent's event loop and Mongo client threads
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.TEXT_EXTRACTION_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+def _get_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(settings.TEXT_EXTRACTION_WORKERS)
+    return _slots
+
+def _recycle_pool(pool: ProcessPoolExecutor) -> None:
+    """Kill the worker processes (e.g. one stuck past its deadline) so the next call starts fresh"""
+    global _pool
+    if _pool is pool:
+        _pool = None
+        # ProcessPoolExecutor cannot cancel a running task, so terminate its processes
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        metrics.increment("text_extraction.pool_recycled")
+
+def shutdown_extraction_pool() -> None:
+    """Stop the worker processes; called on application shutdown"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def _set_queue_depth(delta: int) -> None:
+    global _pending
+    _pending += delta
+    metrics.set_gauge("text_extraction.queue_depth", _pending)
+
+async def _wait_for_disconnect(is_disconnected: Callable[[], Awaitable[bool]]) -> None:
+    while not await is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+async def extract_text(
+    file_content: Union[bytes, str],
+    file_type: str,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+) -> str:
+    """
+    Extract text from a document without blocking the event loop
+
+    Args:
+        file_content: Binary content of the file, or the path of a file on disk
+        file_type: MIME type of the file
+        is_disconnected: Optional callable (e.g. Request.is_disconnected); when
+            it reports True the extraction is abandoned
+
+    Returns:
+        The extracted text ("" when the document cannot be parsed)
+
+    Raises:
+        ExtractionTimeout: The document exceeded TEXT_EXTRACTION_TIMEOUT_SECONDS
+        ExtractionCancelled: The client disconnected first
+    """
+    # Plain text needs no parsing
+    if file_type == TEXT_TYPE:
+        return _extract_text_sync(file_content, file_type, 0, 0)
+
+    timeout = settings.TEXT_EXTRACTION_TIMEOUT_SECONDS
+    _set_queue_depth(1)
+    try:
+        async with _get_slots():
+            started = time.perf_counter()
+            try:
+                text = await _run_in_pool(file_content, file_type, timeout, is_disconnected)
+            except BrokenProcessPool:
+                # Another document's stuck worker took the pool down with this one; try once more
+                text = await _run_in_pool(file_content, file_type, timeout, is_disconnected)
+            metrics.observe("text_extraction", time.perf_counter() - started)
+            return text
+    finally:
+        _set_queue_depth(-1)
+
+async def _run_in_pool(
+    file_content: Union[bytes, str],
+    file_type: str,
+    timeout: float,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]]
+) -> str:
+    pool = _get_pool()
+    future = asyncio.get_running_loop().run_in_executor(
+        pool,
+        _extract_text_sync,
+        file_content,
+        file_type,
+        settings.TEXT_EXTRACTION_MAX_PAGES,
+        timeout
+    )
+
+    watcher = asyncio.ensure_future(_wait_for_disconnect(is_disconnected)) if is_disconnected else None
+    try:
+        waiters = {future, watcher} if watcher else {future}
+        done, _ = await asyncio.wait(waiters, timeout=timeout + KILL_GRACE_SECONDS,
+                                     return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        if watcher:
+            watcher.cancel()
+
+    if future not in done:
+        # Cancelling drops the document if it is still queued; a running worker
+        # finishes on its own deadline unless it is stuck past the grace period
+        future.cancel()
+        if watcher in done:
+            metrics.increment("text_extraction.cancelled")
+            raise ExtractionCancelled("Client disconnected during text extraction")
+        _recycle_pool(pool)
+        metrics.increment("text_extraction.timeout")
+        raise ExtractionTimeout(f"Text extraction exceeded {timeout:.0f}s")
+
+    try:
+        return future.result()
+    except ExtractionTimeout:
+        metrics.increment("text_extraction.timeout")
+        raise
+    except BrokenProcessPool:
+        _recycle_pool(pool)
+        raise
@@ -1,5 +1,8 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Any, Callable, Optional, List, Tuple
 from bson import ObjectId
 from jose import jwt
 from passlib.context import CryptContext
@@ -7,13 +10,24 @@ from ..core.config import settings
 from ..db.mongodb import get_database
 from ..models.user import UserCreate, UserInDB, User
 from ..models.job import Job
+from ..core.metrics import metrics
+from ..utils.cache import TTLCache
+from ..utils.pagination import InvalidCursor
+from .job_service import get_jobs_page
 import logging
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing. Hashes made with a different bcrypt cost are upgraded on the next login.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+class PasswordHasherBusy(Exception):
+    """Too many password hashes are queued; the request should be retried later"""
+
+# bcrypt releases the GIL, so a small thread pool hashes in parallel off the event loop
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_pending = 0
 
 # JWT functions
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -24,7 +38,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -34,6 +48,57 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _hash_executor
+
+def _set_hash_pending(delta: int) -> None:
+    global _hash_pending
+    _hash_pending += delta
+    metrics.set_gauge("password_hash.pending", _hash_pending)
+
+async def _run_hasher(operation: str, func: Callable, *args) -> Any:
+    """
+    Run a bcrypt operation on the hashing pool
+    
+    Raises:
+        PasswordHasherBusy: PASSWORD_HASH_MAX_PENDING operations are already running or queued
+    """
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        metrics.increment("password_hash.rejected")
+        raise PasswordHasherBusy("Too many sign-in requests, please retry shortly")
+    
+    _set_hash_pending(1)
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        _set_hash_pending(-1)
+        metrics.observe(f"password_hash.{operation}", time.perf_counter() - started)
+
+async def hash_password(password: str) -> str:
+    """Hash a password without blocking the event loop"""
+    return await _run_hasher("hash", pwd_context.hash, password)
+
+async def check_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password without blocking the event loop
+    
+    Returns:
+        (valid, new_hash); new_hash is set when the stored hash should be
+        replaced because the configured bcrypt cost changed
+    """
+    return await _run_hasher("verify", pwd_context.verify_and_update, plain_password, hashed_password)
+
+def shutdown_password_hasher() -> None:
+    """Stop the hashing threads; called on application shutdown"""
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
 # User operations
 async def get_user_by_email(email: str) -> Optional[UserInDB]:
     db = get_database()
@@ -49,6 +114,62 @@ async def get_user_by_id(user_id: str) -> Optional[UserInDB]:
         return UserInDB(**user)
     return None
 
+# Authenticated users by (user_id, token iat). Entries live for USER_CACHE_TTL_SECONDS
+# at most and are dropped on writes to the user; other API processes may keep
+# serving their copy until it expires.
+# Keyed by (user id, token iat) and grouped by user id, so a user's entries are dropped without a scan
+_auth_user_cache = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_ENTRIES,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    group=lambda key: key[0]
+)
+
+async def get_auth_user(user_id: str, issued_at: Optional[int] = None) -> Optional[User]:
+    """
+    Get the public user record for an authenticated request
+    
+    Served from the in-process cache when possible; on a miss only the public
+    fields are read, skipping the password hash and saved jobs.
+    
+    Args:
+        user_id: ID of the user (the token subject)
+        issued_at: The token's iat claim
+        
+    Returns:
+        The user, or None if it does not exist
+    """
+    key = (user_id, issued_at)
+    user = _auth_user_cache.get(key)
+    if user is not None:
+        metrics.increment("auth_user_cache.hit")
+        return user
+    metrics.increment("auth_user_cache.miss")
+    
+    if not ObjectId.is_valid(user_id):
+        return None
+    db = get_database()
+    user_data = await db["users"].find_one(
+        {"_id": ObjectId(user_id)},
+        {"email": 1, "name": 1, "created_at": 1, "last_login": 1, "roles": 1}
+    )
+    if not user_data:
+        return None
+    
+    user = User.model_construct(
+        id=str(user_data["_id"]),
+        email=user_data["email"],
+        name=user_data["name"],
+        created_at=user_data["created_at"],
+        last_login=user_data.get("last_login"),
+        roles=user_data.get("roles") or []
+    )
+    _auth_user_cache.set(key, user)
+    return user
+
+def invalidate_cached_user(user_id: str) -> None:
+    """Drop a user's cached records after the user document changes"""
+    _auth_user_cache.discard_group(user_id)
+
 async def create_user(user: UserCreate) -> User:
     db = get_database()
     
@@ -60,7 +181,7 @@ async def create_user(user: UserCreate) -> User:
     # Create new user
     user_in_db = UserInDB(
         **user.dict(),
-        hashed_password=get_password_hash(user.password),
+        hashed_password=await hash_password(user.password),
         created_at=datetime.utcnow()
     )
     
@@ -83,28 +204,43 @@ async def authenticate_user(email: str, password: str) -> Optional[UserInDB]:
     user = await get_user_by_email(email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await check_password(password, user.hashed_password)
+    if not valid:
         return None
     
-    # Update last login
+    # Update last login, upgrading the stored hash if the bcrypt cost changed
+    update = {"last_login": datetime.utcnow()}
+    if new_hash:
+        update["hashed_password"] = new_hash
+        metrics.increment("password_hash.rehashed")
     db = get_database()
     await db["users"].update_one(
         {"_id": ObjectId(user.id)},
-        {"$set": {"last_login": datetime.utcnow()}}
+        {"$set": update}
     )
+    invalidate_cached_user(str(user.id))
     
     return user
 
 # Saved jobs functionality
-async def get_saved_jobs(user_id: str) -> List[Job]:
+async def get_saved_jobs(
+    user_id: str,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> Tuple[List[Job], Optional[str]]:
     """
-    Get all jobs saved by a user
+    Get one page of the jobs saved by a user, newest first
     
     Args:
         user_id: ID of the user
+        limit: Maximum number of jobs to return
+        cursor: Cursor returned with the previous page
         
     Returns:
-        List of saved jobs
+        (jobs, next_cursor); next_cursor is None on the last page
+        
+    Raises:
+        InvalidCursor: The cursor was not issued for this listing
     """
     db = get_database()
     try:
@@ -115,23 +251,15 @@ async def get_saved_jobs(user_id: str) -> List[Job]:
         )
         
         if not user or "saved_jobs" not in user or not user["saved_jobs"]:
-            return []
-            
-        # Convert saved_jobs to a list of ObjectIds
-        saved_job_ids = [ObjectId(job_id) for job_id in user["saved_jobs"]]
-        
-        # Fetch all the saved jobs
-        jobs = []
-        cursor = db["jobs"].find({"_id": {"$in": saved_job_ids}})
+            return [], None
         
-        async for job_doc in cursor:
-            jobs.append(Job(**job_doc))
-            
-        return jobs
+        return await get_jobs_page(limit, cursor, job_ids=[str(job_id) for job_id in user["saved_jobs"]])
         
+    except InvalidCursor:
+        raise
     except Exception as e:
         logger.error(f"Error getting saved jobs for user {user_id}: {str(e)}")
-        return []
+        return [], None
 
 async def add_saved_job(user_id: str, job_id: str) -> bool:
     """
@@ -0,0 +1,92 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+class TTLCache:
+    """
+    Bounded in-process cache with least-recently-used eviction
+
+    Entries expire ttl seconds after they were stored. Not thread safe; it is
+    meant to be used from the event loop.
+
+    With a `group` function the cache also keeps a side index from group to
+    keys, so every entry of a group (say, all tokens of one user) can be
+    dropped without scanning the cache.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+        group: Optional[Callable[[Hashable], Hashable]] = None
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._group = group
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._groups: Dict[Hashable, Set[Hashable]] = {}
+
+    def _forget(self, key: Hashable) -> None:
+        """Remove a key that has left _entries from the group index"""
+        if self._group is None:
+            return
+        group = self._group(key)
+        keys = self._groups.get(group)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._groups[group]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self._forget(key)
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if self._group is not None:
+            self._groups.setdefault(self._group(key), set()).add(key)
+        while len(self._entries) > self.maxsize:
+            evicted, _ = self._entries.popitem(last=False)
+            self._forget(evicted)
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._forget(key)
+        return entry[1]
+
+    def discard_group(self, group: Hashable) -> int:
+        """Remove every entry of a group in O(entries of the group); returns how many were removed"""
+        keys = self._groups.pop(group, ())
+        for key in keys:
+            self._entries.pop(key, None)
+        return len(keys)
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove every entry whose key matches the predicate; returns how many were removed"""
+        keys = [key for key in self._entries if predicate(key)]
+        for key in keys:
+            del self._entries[key]
+            self._forget(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._groups.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,6 +1,8 @@
-from typing import Optional, Dict, Any, List
-from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from typing import Optional, Dict, Any, List, AsyncIterator, Awaitable, BinaryIO, Callable
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket, AsyncIOMotorGridOut
+from gridfs.errors import NoFile
 from bson import ObjectId
+import hashlib
 import io
 
 from ..db.mongodb import get_database
@@ -28,6 +30,61 @@ async def upload_file(file_content: bytes, filename: str, metadata: Optional[Dic
     
     return str(file_id)
 
+# Matches the default GridFS chunk size, so each read fills about one stored chunk
+UPLOAD_READ_SIZE = 255 * 1024
+
+class FileTooLargeError(Exception):
+    """The upload exceeded the allowed size and was discarded"""
+
+async def upload_stream(
+    read: Callable[[int], Awaitable[bytes]],
+    filename: str,
+    metadata: Optional[Dict[str, Any]] = None,
+    max_size: Optional[int] = None,
+    tee: Optional[BinaryIO] = None
+) -> Dict[str, Any]:
+    """
+    Upload a file to GridFS from an async reader, one chunk at a time
+    
+    Args:
+        read: Async read(size) returning b"" at the end (e.g. UploadFile.read)
+        filename: Name to store the file under
+        metadata: GridFS metadata
+        max_size: Abort and discard the upload once it grows past this many bytes
+        tee: Optional file object that receives a copy of every chunk
+        
+    Returns:
+        Dict with the file_id, its sha256 and length
+        
+    Raises:
+        FileTooLargeError: The upload exceeded max_size
+    """
+    db = get_database()
+    fs = AsyncIOMotorGridFSBucket(db)
+    
+    grid_in = fs.open_upload_stream(filename, metadata=metadata)
+    digest = hashlib.sha256()
+    length = 0
+    try:
+        while True:
+            chunk = await read(UPLOAD_READ_SIZE)
+            if not chunk:
+                break
+            length += len(chunk)
+            if max_size is not None and length > max_size:
+                raise FileTooLargeError(f"File exceeds the upload limit of {max_size:,} bytes")
+            digest.update(chunk)
+            if tee is not None:
+                tee.write(chunk)
+            await grid_in.write(chunk)
+        await grid_in.close()
+    except BaseException:
+        # Removes the chunks written so far
+        await grid_in.abort()
+        raise
+    
+    return {"file_id": str(grid_in._id), "sha256": digest.hexdigest(), "length": length}
+
 async def download_file(file_id: str) -> Optional[bytes]:
     """
     Download a file from GridFS
@@ -47,6 +104,47 @@ async def download_file(file_id: str) -> Optional[bytes]:
         print(f"Error downloading file: {e}")
         return None
 
+async def open_download(file_id: str) -> Optional[AsyncIOMotorGridOut]:
+    """
+    Open a GridFS file for streaming without reading its content
+    """
+    db = get_database()
+    fs = AsyncIOMotorGridFSBucket(db)
+    
+    try:
+        return await fs.open_download_stream(ObjectId(file_id))
+    except NoFile:
+        return None
+    except Exception as e:
+        print(f"Error opening file: {e}")
+        return None
+
+async def iter_chunks(grid_out: AsyncIOMotorGridOut, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+    """
+    Yield a file's bytes chunk by chunk, as stored in GridFS
+    
+    Only one chunk is held in memory at a time.
+    
+    Args:
+        grid_out: File opened with open_download
+        start: First byte to send
+        end: Last byte to send, inclusive (defaults to the end of the file)
+    """
+    remaining = (grid_out.length if end is None else end + 1) - start
+    try:
+        if start:
+            grid_out.seek(start)
+        while remaining > 0:
+            chunk = await grid_out.readchunk()
+            if not chunk:
+                break
+            if len(chunk) > remaining:
+                chunk = chunk[:remaining]
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        grid_out.close()
+
 async def delete_file(file_id: str) -> bool:
     """
     Delete a file from GridFS
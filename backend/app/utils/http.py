@@ -0,0 +1,55 @@
+from typing import Optional, Tuple
+
+class RangeNotSatisfiable(Exception):
+    """The requested byte range lies outside the resource"""
+
+def parse_range_header(range_header: Optional[str], length: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range HTTP Range header
+
+    Args:
+        range_header: Value of the Range header (e.g. "bytes=0-1023", "bytes=500-", "bytes=-500")
+        length: Size of the resource in bytes
+
+    Returns:
+        (start, end) with end inclusive, or None when the whole resource should
+        be sent (no header, another unit, multiple ranges or a malformed value)
+
+    Raises:
+        RangeNotSatisfiable: The range starts beyond the end of the resource
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        # Multipart byte ranges are not supported; serving the full body is allowed
+        return None
+
+    first, last = (part.strip() for part in spec.split("-", 1))
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            suffix = int(last)
+            if suffix <= 0 or length == 0:
+                raise RangeNotSatisfiable()
+            return max(length - suffix, 0), length - 1
+        start = int(first)
+        end = int(last) if last else length - 1
+    except ValueError:
+        return None
+
+    if start >= length:
+        raise RangeNotSatisfiable()
+    if end < start:
+        return None
+    return start, min(end, length - 1)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches the ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
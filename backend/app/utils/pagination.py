@@ -0,0 +1,73 @@
+import base64
+import binascii
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId, json_util
+
+# Response header carrying the cursor of the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor this server did not issue"""
+
+def encode_cursor(kind: str, *values: Any) -> str:
+    """
+    Build an opaque page cursor
+
+    Args:
+        kind: What the cursor pages through, checked when it is decoded
+        values: Sort key of the last item on the page (datetimes and ObjectIds keep their type)
+
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json_util.dumps([kind, *values]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, kind: str, size: int) -> List[Any]:
+    """
+    Read the sort key back out of a cursor from encode_cursor
+
+    Raises:
+        InvalidCursor: The cursor is malformed or belongs to another listing
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json_util.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if not isinstance(values, list) or len(values) != size + 1 or values[0] != kind:
+        raise InvalidCursor("Cursor does not belong to this listing")
+    return values[1:]
+
+def _naive_utc(value: datetime) -> datetime:
+    # json_util returns aware datetimes; documents read through motor are naive UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def encode_recency_cursor(fetched_at: datetime, doc_id: Any) -> str:
+    """Cursor after a document in (fetched_at, _id) descending order"""
+    return encode_cursor("recency", fetched_at, doc_id)
+
+def recency_filter(cursor: Optional[str]) -> Dict[str, Any]:
+    """
+    Query filter for the page after a cursor from encode_recency_cursor
+
+    Pair it with sort [("fetched_at", -1), ("_id", -1)] so MongoDB walks the
+    (fetched_at, _id) index from the cursor instead of skipping documents.
+
+    Raises:
+        InvalidCursor: The cursor is malformed or belongs to another listing
+    """
+    if not cursor:
+        return {}
+    fetched_at, doc_id = decode_cursor(cursor, "recency", 2)
+    if not isinstance(fetched_at, datetime) or not isinstance(doc_id, (str, ObjectId)):
+        raise InvalidCursor("Malformed cursor")
+    fetched_at = _naive_utc(fetched_at)
+    return {"$or": [
+        {"fetched_at": {"$lt": fetched_at}},
+        {"fetched_at": fetched_at, "_id": {"$lt": doc_id}},
+    ]}
@@ -0,0 +1,120 @@
+"""
+Task queue worker.
+
+Claims tasks from the MongoDB task queue and runs them, renewing each task's
+lease while it runs. Run as many worker processes as needed, independently of
+the API:
+
+    python -m app.worker [--concurrency 4] [--types analyze_resume_skills]
+
+SIGINT/SIGTERM stop claiming new tasks and let running ones finish.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List
+
+from .core.config import settings
+from .core.metrics import metrics
+from .db.mongodb import connect_to_mongo, close_mongo_connection
+from .services import task_queue, skill_service
+from .services.text_extraction import shutdown_extraction_pool
+from .services.llm_client import shutdown_llm_client
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Task type -> handler taking the task payload and whether this is the task's
+# final attempt, and returning a result document
+TASK_HANDLERS: Dict[str, Callable[[Dict[str, Any], bool], Awaitable[Dict[str, Any]]]] = {
+    skill_service.ANALYSIS_TASK_TYPE: skill_service.run_analysis_task,
+}
+
+class Worker:
+    def __init__(self, task_types: List[str], concurrency: int):
+        self.task_types = task_types
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.stopping = asyncio.Event()
+
+    async def _keep_lease(self, task: Dict[str, Any]):
+        """Renew the lease until cancelled; stops if another worker took the task over"""
+        interval = settings.TASK_LEASE_SECONDS / 3
+        while True:
+            await asyncio.sleep(interval)
+            if not await task_queue.renew_lease(task["_id"], self.worker_id):
+                logger.warning(f"Lost the lease on task {task['_id']}")
+                return
+
+    async def run_task(self, task: Dict[str, Any]):
+        handler = TASK_HANDLERS[task["type"]]
+        lease_keeper = asyncio.create_task(self._keep_lease(task))
+        started = time.monotonic()
+        try:
+            result = await handler(task["payload"], task["attempts"] >= task["max_attempts"])
+            metrics.observe(f"tasks.{task['type']}", time.monotonic() - started)
+            await task_queue.complete(task["_id"], self.worker_id, result)
+            metrics.increment(f"tasks.{task['type']}.succeeded")
+            logger.info(f"Task {task['_id']} ({task['type']}) succeeded")
+        except task_queue.PermanentTaskError as e:
+            await task_queue.fail(task, self.worker_id, str(e), permanent=True)
+            metrics.increment(f"tasks.{task['type']}.dead")
+        except Exception as e:
+            status = await task_queue.fail(task, self.worker_id, f"{type(e).__name__}: {e}")
+            metrics.increment(f"tasks.{task['type']}.{'dead' if status == task_queue.STATUS_DEAD else 'retried'}")
+        finally:
+            lease_keeper.cancel()
+
+    async def _slot(self):
+        """One concurrent claim/run loop"""
+        while not self.stopping.is_set():
+            try:
+                task = await task_queue.claim(self.worker_id, self.task_types)
+            except Exception as e:
+                logger.error(f"Error claiming a task: {str(e)}")
+                task = None
+
+            if task is None:
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), timeout=settings.WORKER_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self.run_task(task)
+
+    async def run(self):
+        logger.info(f"Worker {self.worker_id} processing {', '.join(self.task_types)} with concurrency {self.concurrency}")
+        await asyncio.gather(*(self._slot() for _ in range(self.concurrency)))
+        logger.info(f"Worker {self.worker_id} stopped")
+
+async def main(task_types: List[str], concurrency: int):
+    await connect_to_mongo()
+    worker = Worker(task_types, concurrency)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stopping.set)
+
+    try:
+        await worker.run()
+    finally:
+        shutdown_extraction_pool()
+        shutdown_llm_client()
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a task queue worker")
+    parser.add_argument("--concurrency", type=int, default=settings.WORKER_CONCURRENCY)
+    parser.add_argument("--types", nargs="+", choices=sorted(TASK_HANDLERS), default=sorted(TASK_HANDLERS))
+    args = parser.parse_args()
+    asyncio.run(main(args.types, args.concurrency))
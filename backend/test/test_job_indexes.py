@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from app.db.mongodb import mongodb
+from app.services.job_search_index import JobSearchIndex
+from app.services.job_skill_index import JobSkillIndex
+from app.services.job_vector_index import JobVectorIndex
+from app.services.skill_taxonomy import skill_ids
+
+JOB_COUNT = 200
+CATCH_UPS = 11
+
+@pytest.fixture
+def db():
+    """In-memory jobs collection, all changed within the watermark overlap"""
+    mongodb.db = mongomock_motor.AsyncMongoMockClient()["test"]
+    now = datetime.utcnow().replace(microsecond=0)
+    jobs = [
+        {
+            "title": f"Python developer {i}",
+            "company": "Acme",
+            "job_description": "Python, Docker and SQL",
+            "extracted_skills": ["Python", "Docker", "SQL"],
+            "updated_at": now - timedelta(seconds=i % 30),
+        }
+        for i in range(JOB_COUNT)
+    ]
+    asyncio.run(mongodb.db.jobs.insert_many(jobs))
+    yield mongodb.db
+    mongodb.db = None
+
+def catch_up_repeatedly(index) -> None:
+    async def run():
+        for _ in range(CATCH_UPS):
+            await index.catch_up()
+    asyncio.run(run())
+
+def test_skill_index_catch_up_skips_unchanged_jobs(db):
+    index = JobSkillIndex(snapshot_path="unused.npz")
+    catch_up_repeatedly(index)
+
+    assert len(index) == JOB_COUNT
+    assert len(index._job_ids) == len(index)
+    assert all(len(posting) == JOB_COUNT for posting in index._postings.values())
+
+def test_skill_index_catch_up_reindexes_changed_jobs(db):
+    index = JobSkillIndex(snapshot_path="unused.npz")
+    catch_up_repeatedly(index)
+
+    job = asyncio.run(db.jobs.find_one({}))
+    asyncio.run(db.jobs.update_one(
+        {"_id": job["_id"]},
+        {"$set": {"extracted_skills": ["Go"], "updated_at": datetime.utcnow() + timedelta(seconds=1)}}
+    ))
+    catch_up_repeatedly(index)
+
+    assert len(index) == JOB_COUNT
+    assert len(index._job_ids) == JOB_COUNT + 1
+    assert index.top_k(skill_ids(["Go"]), k=5) == [(str(job["_id"]), 1.0, 1)]
+
+def test_search_index_catch_up_skips_unchanged_jobs(db):
+    index = JobSearchIndex(snapshot_path="unused.npz")
+    catch_up_repeatedly(index)
+
+    assert len(index) == JOB_COUNT
+    assert len(index._job_ids) == len(index)
+    assert len(index._tokens) == len(index)
+    assert len(index._postings[index._terms["python"]]) == JOB_COUNT
+    assert len(index.search("python", k=JOB_COUNT + 10)) == JOB_COUNT
+
+def test_vector_index_catch_up_skips_unchanged_jobs(db, tmp_path):
+    index = JobVectorIndex(snapshot_dir=str(tmp_path))
+    catch_up_repeatedly(index)
+
+    assert len(index) == JOB_COUNT
+    assert len(index._job_ids) == len(index)
+    assert index._tail_size == JOB_COUNT
+
+def test_vector_index_retrains_during_refresh(db, tmp_path):
+    index = JobVectorIndex(snapshot_dir=str(tmp_path))
+
+    async def run():
+        await index.ensure_loaded()
+        await index._save_task
+        assert index._tail_size == 0
+
+        # Half of the jobs change, which passes VECTOR_INDEX_RETRAIN_FRACTION
+        changed = [job["_id"] async for job in db.jobs.find({}, {"_id": 1}).limit(JOB_COUNT // 2)]
+        await db.jobs.update_many(
+            {"_id": {"$in": changed}},
+            {"$set": {"title": "Go developer", "embedding": None, "updated_at": datetime.utcnow() + timedelta(seconds=1)}}
+        )
+        index._refreshed_at = 0.0
+        await index.ensure_loaded()
+        assert index._save_task is not None
+        await index._save_task
+
+    asyncio.run(run())
+    assert len(index) == JOB_COUNT
+    assert len(index._job_ids) == len(index)
+    assert index._tail_size == 0
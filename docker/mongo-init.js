@@ -39,17 +39,12 @@ db.createCollection("skill_relationships");
 db.createCollection("fs.files");
 db.createCollection("fs.chunks");
 
+// Indexes for collections the backend queries are declared in
+// backend/app/db/indexes.py and built at startup (or with
+// `python -m app.db.indexes apply --background`)
+
 // Create indexes for performance
-db.users.createIndex({ email: 1 }, { unique: true });
-db.profiles.createIndex({ user_id: 1 }, { unique: true });
 db.skills.createIndex({ name: 1 }, { unique: true });
-db.user_skills.createIndex({ profile_id: 1, skill_id: 1 });
-db.resumes.createIndex({ profile_id: 1 });
-db.resumes.createIndex({ profile_id: 1, is_current: 1 });
-db.resume_versions.createIndex({ resume_id: 1 });
-db.resume_versions.createIndex({ job_id: 1 });
-db.jobs.createIndex({ posted_date: -1 });
-db.jobs.createIndex({ source: 1, source_id: 1 }, { unique: true });
 db.user_job_interactions.createIndex(
   { user_id: 1, job_id: 1 },
   { unique: true }
@@ -57,8 +52,5 @@ db.user_job_interactions.createIndex(
 db.user_career_plans.createIndex({ user_id: 1 });
 db.skill_relationships.createIndex({ source_skill_id: 1, target_skill_id: 1 });
 
-// Create TTL index for job cache expiration
-db.jobs.createIndex({ cached_until: 1 }, { expireAfterSeconds: 0 });
-
 // Create index on GridFS chunks
 db.fs.chunks.createIndex({ files_id: 1, n: 1 }, { unique: true });
@@ -3,6 +3,8 @@ import { AxiosError } from 'axios'
 
 interface AtsAnalysisResult {
   score: number
+  skillCoverage?: number
+  keywordCoverage?: number
   suggestions: Array<{
     type: 'success' | 'warning'
     message: string
@@ -10,6 +12,9 @@ interface AtsAnalysisResult {
   keywordAnalysis: Array<{
     name: string
     found: boolean
+    weight?: number
+    isSkill?: boolean
+    count?: number
   }>
 }
 
@@ -47,8 +47,10 @@ export const useResumeStore = defineStore('resume', () => {
       // Set the master resume as the current one
       if (Array.isArray(allResumes.value) && allResumes.value.length > 0) {
         console.log('Setting master resume from', allResumes.value.length, 'resumes')
+        // The list only carries summaries; load the master resume with its parsed content
+        const current = allResumes.value.find((resume) => resume.is_current)
         masterResume.value =
-          allResumes.value.find((resume) => resume.is_current) || allResumes.value[0]
+          (current && (await resumeService.getCurrentUserResume())) || current || allResumes.value[0]
         console.log(
           'Master resume set:',
           masterResume.value ? masterResume.value.original_filename : 'none',